@@ -0,0 +1,72 @@
+"""
+Embedding wall time of utils/f1_history_vectordb.py per batch size, against a local fake
+embeddings backend that sleeps like an API round trip and an in-memory index.
+
+    python benchmarks/bench_embedder.py [--seasons 12] [--rounds 22] [--latency 0.2] [--batch-sizes 1 16 64]
+
+Batch size 1 makes one call per text, like the embedder's previous embed_query calls.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "utils"))
+os.environ.setdefault("PINECONE_API_KEY", "bench")
+os.environ.setdefault("EMBEDDINGS_BACKEND", "fake")
+
+import f1_history_vectordb  # noqa: E402
+
+
+class SlowFakeEmbeddings:
+    """Deterministic fake vectors, with `latency` seconds per call plus `per_text` per text."""
+
+    def __init__(self, latency, per_text):
+        self.fake = f1_history_vectordb.create_embeddings("fake")
+        self.latency, self.per_text = latency, per_text
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        time.sleep(self.latency + self.per_text * len(texts))
+        return self.fake.embed_documents(texts)
+
+
+def season_data(season, rounds):
+    result = {"Driver": {"givenName": "Max", "familyName": "Verstappen"}, "Constructor": {"name": "Red Bull"}}
+    races = [{"round": str(r), "raceName": f"Round {r} GP", "date": f"{season}-03-01", "Results": [result] * 20}
+             for r in range(1, rounds + 1)]
+    return {"season": season, "races": races, "drivers": [], "constructors": []}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seasons", type=int, default=12)
+    parser.add_argument("--rounds", type=int, default=22)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per embedding call")
+    parser.add_argument("--per-text", type=float, default=0.001, help="extra seconds per embedded text")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 64])
+    args = parser.parse_args()
+
+    f1_history_vectordb.F1DataEnhancedEmbedder.download_json_from_s3 = \
+        lambda self, season: season_data(season, args.rounds)
+    f1_history_vectordb.F1DataEnhancedEmbedder.load_race_results = lambda self, season: None
+
+    print(f"{'batch':<8}{'texts':>8}{'calls':>8}{'seconds':>10}{'texts/s':>10}")
+    for batch_size in args.batch_sizes:
+        backend = SlowFakeEmbeddings(args.latency, args.per_text)
+        f1_history_vectordb.embeddings = backend
+        embedder = f1_history_vectordb.F1DataEnhancedEmbedder(index=f1_history_vectordb.InMemoryIndex(), batch_size=batch_size)
+        texts = args.seasons * (4 + 2 * args.rounds)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            embedder.batch_embed_seasons(2013, 2013 + args.seasons - 1)
+        elapsed = time.perf_counter() - start
+        print(f"{batch_size:<8}{texts:>8}{backend.calls:>8}{elapsed:>10.2f}{texts / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Seconds per season for utils/f1_history_jolpica.py, sequential vs concurrent, against a
+local mock of the Jolpica API that adds latency and answers every Nth request with a 429
+and a Retry-After header. Also counts the requests per season with and without bulk mode.
+
+    python benchmarks/bench_jolpica_fetch.py [--rounds 22] [--latency 0.15] [--throttle-every 15]
+
+The shared rate limiter runs with --burst-rate (Jolpica allows 4 requests per second).
+With --backfill-seasons N, also times a backfill of N seasons for each --processes count,
+with uploads skipped.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "utils"))
+
+import f1_history_jolpica  # noqa: E402
+
+
+class MockJolpicaHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.count += 1
+            throttled = server.throttle_every and server.count % server.throttle_every == 0
+        time.sleep(server.latency)
+        if throttled:
+            server.throttled += 1
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.end_headers()
+            return
+
+        url = urlparse(self.path)
+        parts = url.path[:-len(".json")].strip("/").split("/")[2:]
+        races = [{"round": str(i), "raceName": f"Round {i} GP", "Circuit": {}} for i in range(1, server.rounds + 1)]
+        if parts[1:] == ["races"]:
+            payload = {"MRData": {"RaceTable": {"Races": races}}}
+        elif parts[1:] in (["results"], ["qualifying"]):
+            # Season-wide rows, 20 per round, served in limit/offset pages like the real API
+            row_key = "Results" if parts[1] == "results" else "QualifyingResults"
+            query = parse_qs(url.query)
+            limit, offset = int(query.get("limit", ["30"])[0]), int(query.get("offset", ["0"])[0])
+            rows = [(race, {"position": str(p)}) for race in races for p in range(1, 21)][offset:offset + limit]
+            page = []
+            for race, row in rows:
+                if not page or page[-1]["round"] != race["round"]:
+                    page.append(dict(race, **{row_key: []}))
+                page[-1][row_key].append(row)
+            payload = {"MRData": {"total": str(server.rounds * 20), "RaceTable": {"Races": page}}}
+        else:
+            payload = {"MRData": {"RaceTable": {"Races": [{"Results": [{"position": "1"}] * 20}]}}}
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_server(rounds, latency, throttle_every):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockJolpicaHandler)
+    server.lock = threading.Lock()
+    server.rounds, server.latency, server.throttle_every = rounds, latency, throttle_every
+    server.count = server.throttled = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/ergast/f1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=22, help="rounds in the mock season")
+    parser.add_argument("--latency", type=float, default=0.15, help="seconds the mock API takes per request")
+    parser.add_argument("--throttle-every", type=int, default=15, help="answer every Nth request with a 429")
+    parser.add_argument("--burst-rate", type=float, default=20, help="rate limiter requests per second")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--backfill-seasons", type=int, default=0, help="seasons in the backfill run")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(args.rounds, args.latency, args.throttle_every)
+    f1_history_jolpica.BASE_URL = base_url
+    f1_history_jolpica.response_cache = None
+
+    print(f"{'workers':<10}{'requests':>10}{'429s':>8}{'seconds':>10}{'req/s':>8}{'limiter wait':>14}")
+    for workers in args.workers:
+        f1_history_jolpica.rate_limiter = f1_history_jolpica.create_rate_limiter(args.burst_rate, 10 ** 6)
+        server.count = server.throttled = 0
+        start = time.perf_counter()
+        season = f1_history_jolpica.process_season_data(2023, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert len(season["race_details"]) == args.rounds
+        print(f"{workers:<10}{server.count:>10}{server.throttled:>8}{elapsed:>10.2f}"
+              f"{server.count / elapsed:>8.1f}{f1_history_jolpica.rate_limiter.waited:>13.1f}s")
+
+    print(f"\n{'mode':<10}{'requests':>10}")
+    for bulk in (False, True):
+        f1_history_jolpica.rate_limiter = f1_history_jolpica.create_rate_limiter(args.burst_rate, 10 ** 6)
+        server.count = server.throttled = 0
+        f1_history_jolpica.process_season_data(2023, workers=max(args.workers), bulk=bulk)
+        print(f"{'bulk' if bulk else 'per-round':<10}{server.count - server.throttled:>10}")
+
+    if args.backfill_seasons:
+        # Forked workers inherit the mock API settings and the no-op upload
+        f1_history_jolpica.upload_to_s3 = lambda data, key: True
+        seasons = list(range(2024 - args.backfill_seasons + 1, 2025))
+        print(f"\n{'processes':<10}{'seasons':>10}{'requests':>10}{'seconds':>10}{'req/s':>8}")
+        for processes in args.processes:
+            f1_history_jolpica.rate_limiter = f1_history_jolpica.create_rate_limiter(args.burst_rate, 10 ** 6)
+            server.count = server.throttled = 0
+            start = time.perf_counter()
+            f1_history_jolpica.backfill(seasons, processes=processes,
+                                        limiter=f1_history_jolpica.SharedRateLimiter.create(args.burst_rate, 10 ** 6),
+                                        mp_context=multiprocessing.get_context("fork"))
+            elapsed = time.perf_counter() - start
+            print(f"{processes:<10}{len(seasons):>10}{server.count:>10}{elapsed:>10.2f}{server.count / elapsed:>8.1f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
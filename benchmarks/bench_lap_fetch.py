@@ -0,0 +1,80 @@
+"""
+Races/minute for the HTTP and Selenium fetch backends of utils/lap_analysis.py
+(Selenium with and without the "text" resource policy),
+measured against the recorded Autosport fixtures served from a loopback server.
+
+    python benchmarks/bench_lap_fetch.py [--rounds 20]
+
+The Selenium backend is skipped when Chrome/chromedriver cannot be started.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "utils"))
+
+import lap_analysis  # noqa: E402
+
+FIXTURES_DIR = os.path.join(ROOT, "streamlit_app", "tests", "fixtures", "autosport")
+RACE_PAGES = ["race_bahrain.html", "race_saudi.html"]
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=FIXTURES_DIR))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_backend(client, links):
+    start = time.perf_counter()
+    scraped = 0
+    for link in links:
+        _, race_data = lap_analysis.scrape_race_content(client, link)
+        scraped += race_data is not None
+    elapsed = time.perf_counter() - start
+    return scraped, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20, help="times each fixture race is scraped")
+    args = parser.parse_args()
+
+    server, base_url = start_fixture_server()
+    links = [f"{base_url}/{page}" for page in RACE_PAGES] * args.rounds
+
+    backends = [("http", lap_analysis.create_http_session, lambda s: s.close())]
+    for policy in ("off", "text"):
+        backends.append((f"selenium/{policy}", lambda policy=policy: lap_analysis.create_webdriver(policy),
+                         lambda d: d.quit()))
+
+    print(f"{'backend':<16}{'races':>8}{'seconds':>10}{'races/min':>12}")
+    for name, factory, close in backends:
+        try:
+            client = factory()
+        except Exception as e:
+            print(f"{name:<16}skipped: {e.__class__.__name__}: {str(e).splitlines()[0]}")
+            continue
+        try:
+            scraped, elapsed = run_backend(client, links)
+        finally:
+            close(client)
+        print(f"{name:<16}{scraped:>8}{elapsed:>10.2f}{scraped / elapsed * 60:>12.0f}")
+
+    lap_analysis.readiness_stats.log_summary()
+    lap_analysis.network_stats.log_summary()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
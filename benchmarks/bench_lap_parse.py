@@ -0,0 +1,95 @@
+"""
+Parse throughput and peak memory of the message extractors in utils/lap_analysis.py.
+
+    python benchmarks/bench_lap_parse.py [--messages 3000] [page.html ...]
+
+Saved race pages can be passed as arguments. Without them, a large race page is
+synthesised from the recorded fixtures. Each extractor runs in a fresh process so
+its peak RSS (which includes lxml's C-level tree) is measured separately.
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import resource
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "utils"))
+
+import lap_analysis  # noqa: E402
+
+FIXTURES_DIR = os.path.join(ROOT, "streamlit_app", "tests", "fixtures", "autosport")
+MESSAGE_RE = re.compile(r'<div class="mslt-msg.*?</div>\s*</div>', re.S)
+
+
+def synthesise_page(message_count):
+    """Build one fully expanded race page with `message_count` messages."""
+    templates = []
+    for name in ["race_bahrain.html", "race_bahrain_more1.html", "race_saudi.html"]:
+        with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+            templates.extend(MESSAGE_RE.findall(f.read()))
+
+    messages = []
+    for i in range(message_count):
+        minute, second = divmod(i, 60)
+        timestamp = f"2024-03-02T{13 + minute // 60:02d}:{minute % 60:02d}:{second:02d}Z"
+        message = re.sub(r'datetime="[^"]*"', f'datetime="{timestamp}"', templates[i % len(templates)])
+        # Pad the comment so pages approach the size of a real race blog
+        messages.append(message.replace("</p>", " Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>"))
+
+    # Surround messages with the kind of page chrome the live blog carries
+    chrome = '<nav class="ms-nav">' + '<a href="/x">link</a>' * 500 + '</nav>'
+    return f"<html><head><title>Bahrain GP live: Race</title></head><body>{chrome}" \
+           f"<div class=\"mslt-feed\">{''.join(reversed(messages))}</div>{chrome}</body></html>"
+
+
+def measure(extractor, pages, repeat, queue):
+    before_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            lap_analysis.parse_race_messages(html, extractor=extractor)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_delta = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before_rss
+    queue.put((elapsed, peak, rss_delta))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", help="saved race page HTML files")
+    parser.add_argument("--messages", type=int, default=3000, help="messages in the synthesised page")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = [open(path, encoding="utf-8").read() for path in args.pages]
+    else:
+        pages = [synthesise_page(args.messages)]
+
+    total_mb = sum(len(html.encode("utf-8")) for html in pages) / 1e6
+    reference = [lap_analysis.parse_race_messages(html, extractor="soup") for html in pages]
+    print(f"{len(pages)} page(s), {total_mb:.1f} MB, {sum(map(len, reference))} messages\n")
+
+    extractors = ["soup"] + (["lxml"] if lap_analysis.lxml else [])
+    ctx = multiprocessing.get_context("fork")
+    print(f"{'extractor':<10}{'pages/s':>10}{'MB/s':>10}{'py peak MB':>12}{'rss +MB':>10}{'identical':>11}")
+    for extractor in extractors:
+        identical = [lap_analysis.parse_race_messages(html, extractor=extractor) for html in pages] == reference
+        queue = ctx.Queue()
+        process = ctx.Process(target=measure, args=(extractor, pages, args.repeat, queue))
+        process.start()
+        elapsed, peak, rss_delta = queue.get()
+        process.join()
+        runs = len(pages) * args.repeat
+        print(f"{extractor:<10}{runs / elapsed:>10.2f}{total_mb * args.repeat / elapsed:>10.2f}"
+              f"{peak / 1e6:>12.1f}{rss_delta / 1024:>10.1f}{str(identical):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Upsert throughput of utils/f1_history_vectordb.py's UpsertWriter against an in-memory index
+that spends --latency seconds per request, compared with one request per vector.
+
+    python benchmarks/bench_upsert.py [--vectors 600] [--latency 0.05] [--workers 1 4 8]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "utils"))
+os.environ.setdefault("PINECONE_API_KEY", "bench")
+os.environ.setdefault("EMBEDDINGS_BACKEND", "fake")
+
+import f1_history_vectordb  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=600)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per upsert request")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vectors = [(f"2023_race_{i}_winner", [rng.uniform(-1, 1) for _ in range(f1_history_vectordb.EMBEDDING_DIMENSION)],
+                {"text": f"Race {i} winner", "category": "race_results", "season": "2023"})
+               for i in range(args.vectors)]
+
+    print(f"{'mode':<22}{'requests':>10}{'seconds':>10}{'vectors/s':>12}")
+    index = f1_history_vectordb.InMemoryIndex(latency=args.latency)
+    start = time.perf_counter()
+    for vector in vectors:
+        index.upsert(vectors=[vector])
+    elapsed = time.perf_counter() - start
+    print(f"{'one per request':<22}{index.requests:>10}{elapsed:>10.2f}{len(vectors) / elapsed:>12.1f}")
+
+    for workers in args.workers:
+        index = f1_history_vectordb.InMemoryIndex(latency=args.latency)
+        writer = f1_history_vectordb.UpsertWriter(index, workers=workers)
+        for vector in vectors:
+            writer.add(*vector)
+        writer.close()
+        stats = writer.stats()
+        print(f"{f'writer, {workers} workers':<22}{stats['requests']:>10}{stats['seconds']:>10.2f}"
+              f"{stats['vectors_per_second']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
+import os
+
 from langchain_community.utilities import SQLDatabase
 
+F1_STORE_PATH = os.getenv("F1_STORE_PATH", os.path.join(".cache", "f1_history.sqlite"))
+
 
 def get_connection():
 
@@ -12,3 +16,9 @@ def get_connection():
     url="mysql+mysqlconnector://{0}:{1}@{2}:{3}/{4}".format(user,password,host,port,database)
     db = SQLDatabase.from_uri(url)  
     return db
+
+
+def get_history_connection():
+    """Read-only connection to the normalized F1 history store built by utils/f1_history_store.py."""
+    url = "sqlite:///file:{0}?mode=ro&uri=true".format(os.path.abspath(F1_STORE_PATH))
+    return SQLDatabase.from_uri(url)
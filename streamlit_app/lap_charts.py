@@ -0,0 +1,89 @@
+import numpy as np
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Layout of the lap time arrays written by utils/lap_times.py, which imports it from here:
+# one int32 array of shape (3, drivers, laps) per race holding lap time in milliseconds,
+# running position and pit stops per lap, with 0 where a driver has no data for a lap.
+# The index records each race's driver order.
+LAP_TIMES_PREFIX = "laps"
+LAP_INDEX_KEY = f"{LAP_TIMES_PREFIX}/index.json"
+
+# Planes of a race array
+TIME, POSITION, PIT = range(3)
+
+
+class RaceArrays(NamedTuple):
+    """One race's lap data: `drivers` in row order and the (3, drivers, laps) int32 array."""
+    drivers: List[str]
+    data: np.ndarray
+
+    @property
+    def lap_count(self) -> int:
+        return self.data.shape[2]
+
+
+def cumulative_times(race: RaceArrays) -> np.ndarray:
+    """
+    Race time in ms at the end of each lap, per driver; NaN from the first lap a driver has no time for.
+    """
+    times = race.data[TIME]
+    running = np.logical_and.accumulate(times > 0, axis=1)
+    return np.where(running, np.cumsum(times, axis=1, dtype=np.int64), np.nan)
+
+
+def gaps_to_leader(race: RaceArrays) -> np.ndarray:
+    """Gap in ms to the car leading at the end of each lap; NaN once a driver stops running."""
+    elapsed = cumulative_times(race)
+    leader = np.full(race.data.shape[2], np.nan)
+    running = ~np.isnan(elapsed).all(axis=0)
+    leader[running] = np.nanmin(elapsed[:, running], axis=0)
+    return elapsed - leader
+
+
+def interval(race: RaceArrays, driver_id: str, other_id: str) -> np.ndarray:
+    """Gap in ms of one driver to another at the end of each lap (positive when behind)."""
+    elapsed = cumulative_times(race)
+    return elapsed[race.drivers.index(driver_id)] - elapsed[race.drivers.index(other_id)]
+
+
+def position_trace(race: RaceArrays, driver_id: Optional[str] = None) -> np.ndarray:
+    """Running position per lap, 0 where a driver has no data; one driver's row or all of them."""
+    positions = np.asarray(race.data[POSITION])
+    return positions if driver_id is None else positions[race.drivers.index(driver_id)]
+
+
+def stint_pace(race: RaceArrays, driver_id: str) -> List[Dict[str, Any]]:
+    """
+    A driver's stints between pit stops, with the mean and best time of their clean laps:
+    the opening lap, in-laps and out-laps are left out.
+    """
+    row = race.drivers.index(driver_id)
+    times = np.asarray(race.data[TIME, row], dtype=np.int64)
+    pits = np.asarray(race.data[PIT, row]) > 0
+    laps = np.flatnonzero(times > 0)
+    if not laps.size:
+        return []
+    # Stints change on the lap after a pit stop; the in-lap belongs to the stint it ends
+    stint = np.concatenate(([0], np.cumsum(pits[:-1])))
+    out_lap = np.concatenate(([True], pits[:-1]))
+    clean = (times > 0) & ~pits & ~out_lap
+    stints = stint[laps[-1]] + 1
+    total = np.bincount(stint[clean], weights=times[clean], minlength=stints)
+    count = np.bincount(stint[clean], minlength=stints)
+    best = np.full(stints, np.iinfo(np.int64).max)
+    np.minimum.at(best, stint[clean], times[clean])
+
+    pace = []
+    for number in range(stints):
+        in_stint = np.flatnonzero((stint == number) & (times > 0))
+        if not in_stint.size:
+            continue
+        pace.append({
+            "stint": number + 1,
+            "start_lap": int(in_stint[0]) + 1,
+            "end_lap": int(in_stint[-1]) + 1,
+            "clean_laps": int(count[number]),
+            "mean_ms": float(total[number] / count[number]) if count[number] else None,
+            "best_ms": int(best[number]) if count[number] else None,
+        })
+    return pace
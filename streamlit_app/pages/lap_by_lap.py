@@ -3,14 +3,23 @@ import boto3
 import json
 from openai import OpenAI
 import os
+import gzip
+import numpy as np
+import pandas as pd
 from dotenv import load_dotenv
-from datetime import datetime
 import io
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from lap_charts import LAP_INDEX_KEY, RaceArrays, gaps_to_leader, position_trace, stint_pace
+
 # Load environment variables
 load_dotenv()
 
@@ -19,6 +28,7 @@ client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 s3 = boto3.client('s3')
 S3_BUCKET_NAME= "f1-historical-data"
 S3_BUCKET_NAME_LAP="f1-lap-analysis-data"
+RACE_INDEX_KEY = "races/index.json"
 
 # Predefined Grand Prix list
 grand_prix_list = [
@@ -102,7 +112,48 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Fetch race data from S3
+# Read an S3 object body, decompressing it if it was uploaded with a gzip or zstd Content-Encoding
+def read_body(response):
+    body = response['Body'].read()
+    encoding = response.get('ContentEncoding')
+    if encoding == 'gzip' or body[:2] == b'\x1f\x8b':
+        return gzip.decompress(body)
+    if encoding == 'zstd' or body[:4] == b'\x28\xb5\x2f\xfd':
+        if zstandard is None:
+            raise RuntimeError("the file is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body)).read()
+    return body
+
+# Fetch the per-race shard index from S3; None if the bucket only has the legacy file.
+# Other errors, such as a zstd file without the zstandard package, are shown rather than hidden
+@st.cache_data
+def fetch_race_index():
+    try:
+        response = s3.get_object(
+            Bucket=S3_BUCKET_NAME_LAP,
+            Key=RACE_INDEX_KEY
+        )
+        return json.loads(read_body(response).decode('utf-8'))
+    except s3.exceptions.NoSuchKey:
+        return None
+    except Exception as e:
+        st.error(f"Error fetching {RACE_INDEX_KEY}: {e}")
+        return None
+
+# Fetch a single race shard from S3
+@st.cache_data
+def fetch_race_shard(key):
+    try:
+        response = s3.get_object(
+            Bucket=S3_BUCKET_NAME_LAP,
+            Key=key
+        )
+        return json.loads(read_body(response).decode('utf-8'))
+    except Exception as e:
+        st.error(f"Error fetching race data: {e}")
+        return None
+
+# Fetch legacy race data (all races in one file) from S3
 @st.cache_data
 def fetch_race_data():
     try:
@@ -110,11 +161,100 @@ def fetch_race_data():
             Bucket=S3_BUCKET_NAME_LAP,
             Key='race_data.json'
         )
-        return json.loads(response['Body'].read().decode('utf-8'))
+        return json.loads(read_body(response).decode('utf-8'))
     except Exception as e:
         st.error(f"Error fetching race data: {e}")
         return {}
 
+# Fetch the lap time index from S3; None until lap times have been ingested
+@st.cache_data
+def fetch_lap_index():
+    try:
+        response = s3.get_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=LAP_INDEX_KEY
+        )
+        return json.loads(read_body(response).decode('utf-8'))
+    except s3.exceptions.NoSuchKey:
+        return None
+    except Exception as e:
+        st.error(f"Error fetching {LAP_INDEX_KEY}: {e}")
+        return None
+
+# Fetch one race's lap time array (lap time, position and pit stops per driver and lap) from S3
+@st.cache_data
+def fetch_lap_array(key):
+    try:
+        response = s3.get_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=key
+        )
+        return np.load(io.BytesIO(read_body(response)), allow_pickle=False)
+    except Exception as e:
+        st.error(f"Error fetching lap times: {e}")
+        return None
+
+# Find the lap times of the selected race
+def find_race_laps(lap_index, selected_country, selected_year):
+    if lap_index is None:
+        return None
+    key, info = next(
+        ((key, info) for key, info in lap_index['races'].items()
+         if selected_year == info['season']
+         and (selected_country.lower() in (info['raceName'] or '').lower()
+              or selected_country.lower() == (info['country'] or '').lower())),
+        (None, None)
+    )
+    if key is None:
+        return None
+    data = fetch_lap_array(key)
+    return RaceArrays(info['drivers'], data) if data is not None else None
+
+# Show position traces, gaps to the leader and stint pace, computed from the lap arrays
+def show_lap_times(race):
+    laps = pd.RangeIndex(1, race.lap_count + 1, name="Lap")
+    positions = pd.DataFrame(position_trace(race).T, index=laps, columns=race.drivers).replace(0, np.nan)
+    gaps = pd.DataFrame(gaps_to_leader(race).T / 1000, index=laps, columns=race.drivers)
+
+    st.markdown("### Positions")
+    st.line_chart(positions)
+    st.markdown("### Gap to Leader (s)")
+    st.line_chart(gaps)
+    st.markdown("### Stint Pace")
+    stints = [
+        dict(stint, driver=driver, mean_s=stint['mean_ms'] and stint['mean_ms'] / 1000,
+             best_s=stint['best_ms'] and stint['best_ms'] / 1000)
+        for driver in race.drivers for stint in stint_pace(race, driver)
+    ]
+    st.dataframe(pd.DataFrame(stints, columns=["driver", "stint", "start_lap", "end_lap", "clean_laps",
+                                               "mean_s", "best_s"]), hide_index=True)
+
+# Season of a legacy race from its first message: the leading digits of its ISO time,
+# so races are matched without parsing timestamps
+def race_year(messages):
+    return int(messages[0]['time'][:4]) if messages else None
+
+# Find the commentary for the selected race, downloading only that race's shard
+def find_race(race_index, selected_country, selected_year):
+    if race_index is None:
+        race_data = fetch_race_data()
+        return next(
+            (info['race'] for title, info in race_data.items()
+             if selected_country.lower() in title.lower()
+             and selected_year == race_year(info['race'])),
+            None
+        )
+
+    key = next(
+        (key for key, info in race_index['races'].items()
+         if selected_country.lower() in info['title'].lower() and selected_year == info['season']),
+        None
+    )
+    if key is None:
+        return None
+    shard = fetch_race_shard(key)
+    return shard['race'] if shard else None
+
 # Format summary for consistent output
 def format_summary(summary):
     formatted_summary = []
@@ -242,12 +382,14 @@ def create_pdf(race_summary, selected_year, selected_gp):
 
 
 # Main logic
-race_data = fetch_race_data()
+race_index = fetch_race_index()
 
 if 'race_summary' not in st.session_state:
     st.session_state['race_summary'] = 'Lap Analysis Will Appear Here'
 if 'analysis_in_progress' not in st.session_state:
     st.session_state['analysis_in_progress'] = False
+if 'lap_times_race' not in st.session_state:
+    st.session_state['lap_times_race'] = None
 
 col1, col2 = st.columns([1, 3])
 
@@ -268,12 +410,7 @@ with col1:
         st.session_state['race_summary'] = 'Generating analysis...'
         st.session_state['analysis_in_progress'] = True
 
-        selected_race = next(
-            (info['race'] for title, info in race_data.items()
-             if selected_country.lower() in title.lower()
-             and selected_year == datetime.fromisoformat(info['race'][0]['time'].replace('Z', '+00:00')).year),
-            None
-        )
+        selected_race = find_race(race_index, selected_country, selected_year)
 
         if selected_race:
             prompt = prepare_prompt(selected_race)
@@ -288,6 +425,9 @@ with col1:
         st.session_state['analysis_in_progress'] = False
         st.rerun()
 
+    if st.button("Show Lap Times"):
+        st.session_state['lap_times_race'] = (selected_country, selected_year)
+
     if st.button("Download Results"):
         pdf_buffer = create_pdf(st.session_state['race_summary'], selected_year, selected_country)
         st.download_button(
@@ -320,4 +460,13 @@ with col2:
                     {st.session_state['race_summary'].replace('\n', '<br>')}
                 </div>
             </div>
-        """, unsafe_allow_html=True)
\ No newline at end of file
+        """, unsafe_allow_html=True)
+
+    if st.session_state['lap_times_race']:
+        lap_country, lap_year = st.session_state['lap_times_race']
+        st.markdown(f"## {lap_country} GP {lap_year} Lap Times")
+        race_laps = find_race_laps(fetch_lap_index(), lap_country, lap_year)
+        if race_laps is None:
+            st.info("No lap times found for the selected year and country.")
+        else:
+            show_lap_times(race_laps)
@@ -30,6 +30,7 @@ def get_graph():
     graph.add_node("oracle", run_oracle)
     graph.add_node("rag_search", run_tool)
     graph.add_node("racepass_info", run_tool)
+    graph.add_node("f1_history_sql", run_tool)
     graph.add_node("final_answer", run_tool)
 
     graph.set_entry_point("oracle")
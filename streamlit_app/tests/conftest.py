@@ -0,0 +1,323 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import urllib.error
+import urllib.request
+from functools import partial
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin, urlparse, parse_qs
+
+import boto3
+import pytest
+from moto import mock_aws
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+
+import lap_analysis
+
+# The vector DB module builds its Pinecone client and embeddings backend at import time
+os.environ.setdefault("PINECONE_API_KEY", "test")
+os.environ.setdefault("EMBEDDINGS_BACKEND", "fake")
+os.environ.setdefault("EMBED_CACHE", "0")
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "autosport")
+S3_TEST_BUCKET = "f1-test-artifacts"
+
+LOAD_MORE_RE = re.compile(r'<button class="mslt-more__btn"[^>]*data-url="([^"]+)"[^>]*>.*?</button>', re.S)
+TITLE_RE = re.compile(r"<title>(.*?)</title>", re.S)
+MESSAGE_RE = re.compile(r'<div class="mslt-msg(?: [^"]*)?"[^>]*>.*?</div>\s*</div>', re.S)
+ID_RE = re.compile(r'^<div[^>]*\bid="([^"]*)"')
+DATETIME_RE = re.compile(r'<time[^>]*\bdatetime="([^"]*)"')
+
+
+class AutosportFixtureHandler(SimpleHTTPRequestHandler):
+    """Serves the recorded Autosport pages, mapping /live/?p=N to live_pN.html."""
+
+    def translate_path(self, path):
+        parsed = urlparse(path)
+        if parsed.path.rstrip("/") == "/live":
+            page = parse_qs(parsed.query).get("p", ["0"])[0]
+            return os.path.join(self.directory, f"live_p{page}.html")
+        return super().translate_path(parsed.path)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def autosport_server():
+    """Loopback HTTP server serving the Autosport fixtures; yields its base URL."""
+    handler = partial(AutosportFixtureHandler, directory=FIXTURES_DIR)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class LoopbackButton:
+    def __init__(self, driver, match):
+        self.driver = driver
+        self.match = match
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def click(self):
+        fragment = self.driver._fetch(urljoin(self.driver.current_url, self.match.group(1)))
+        self.driver._html = self.driver._html.replace(self.match.group(0), fragment, 1)
+        self.driver.clicks += 1
+
+
+class LoopbackDriver:
+    """
+    Minimal stand-in for a Chrome WebDriver that loads pages over plain HTTP and
+    emulates the live blog 'Load more' button by splicing in the next fragment.
+    """
+
+    def __init__(self):
+        self._html = ""
+        self.current_url = None
+        self.pages_loaded = 0
+        self.clicks = 0
+        self.harvest_calls = 0
+        self.quit_called = False
+
+    def _fetch(self, url):
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                return response.read().decode("utf-8")
+        except urllib.error.URLError as e:
+            raise WebDriverException(f"Failed to load {url}: {e}")
+
+    def get(self, url):
+        self._html = self._fetch(url)
+        self.current_url = url
+        self.pages_loaded += 1
+
+    @property
+    def page_source(self):
+        return self._html
+
+    @property
+    def title(self):
+        match = TITLE_RE.search(self._html)
+        return match.group(1) if match else ""
+
+    def execute_script(self, script, *args):
+        """Python emulation of the lap_analysis page state and harvest scripts."""
+        if script == lap_analysis.PAGE_STATE_SCRIPT:
+            return {
+                "messages": len(MESSAGE_RE.findall(self._html)),
+                "load_more": bool(re.search(r'<button class="mslt-more__btn"', self._html)),
+                "listing_items": len(re.findall(r'<a class="ms-item"', self._html)),
+            }
+        if script != lap_analysis.HARVEST_SCRIPT:
+            raise WebDriverException("LoopbackDriver only runs the lap_analysis scripts")
+        prune = args[0]
+        harvested = []
+
+        def mark(match):
+            node = match.group(0)
+            if "data-harvested" in node.split(">", 1)[0]:
+                return node
+            msg_id = ID_RE.search(node)
+            timestamp = DATETIME_RE.search(node)
+            harvested.append([msg_id.group(1) if msg_id else "", timestamp.group(1) if timestamp else "", node])
+            return node.replace(">", ' data-harvested="1">', 1)
+
+        self._html = MESSAGE_RE.sub(mark, self._html)
+        if prune:
+            done = [m for m in MESSAGE_RE.finditer(self._html) if "data-harvested" in m.group(0).split(">", 1)[0]]
+            for match in reversed(done[:-1]):
+                self._html = self._html[:match.start()] + self._html[match.end():]
+        self.harvest_calls += 1
+        return harvested
+
+    def find_element(self, by, value):
+        if value == "button.mslt-more__btn":
+            match = LOAD_MORE_RE.search(self._html)
+            if match:
+                return LoopbackButton(self, match)
+        raise NoSuchElementException(value)
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def loopback_driver_factory():
+    """Factory producing LoopbackDriver instances; created drivers are kept on .drivers."""
+    drivers = []
+
+    def factory():
+        driver = LoopbackDriver()
+        drivers.append(driver)
+        return driver
+
+    factory.drivers = drivers
+    return factory
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    """S3 client backed by moto's in-process S3, with one empty bucket."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=S3_TEST_BUCKET)
+        yield client
+
+
+JOLPICA_ROUND_ROWS = {
+    # Round 3 has not been raced yet, so it has no results
+    "results": {"1": 3, "2": 3, "3": 0},
+    "qualifying": {"1": 1, "2": 1, "3": 1},
+}
+
+
+def jolpica_race(round_number, kind=None):
+    race = {"season": "2023", "round": round_number, "raceName": f"Round {round_number} GP",
+            "date": f"2023-03-0{round_number}", "Circuit": {"circuitName": f"Circuit {round_number}"}}
+    if kind == "results":
+        race["Results"] = [{"position": str(p), "Driver": {"driverId": f"driver_{p}"}}
+                           for p in range(1, JOLPICA_ROUND_ROWS["results"][round_number] + 1)]
+    elif kind == "qualifying":
+        race["QualifyingResults"] = [{"position": str(p)}
+                                     for p in range(1, JOLPICA_ROUND_ROWS["qualifying"][round_number] + 1)]
+    elif kind == "pitstops":
+        race["PitStops"] = [{"driverId": "max_verstappen", "stop": "1", "lap": "2"}]
+    return race
+
+
+# Lap timings (lap, driver, time, position) of the races that have been run; Verstappen
+# pits on lap 2 and Pérez leads from then on
+JOLPICA_LAP_TIMINGS = [
+    ("1", "max_verstappen", "1:40.000", "1"), ("1", "perez", "1:41.000", "2"),
+    ("2", "perez", "1:35.500", "1"), ("2", "max_verstappen", "1:50.000", "2"),
+    ("3", "perez", "1:35.000", "1"), ("3", "max_verstappen", "1:36.000", "2"),
+    ("4", "perez", "1:35.000", "1"), ("4", "max_verstappen", "1:34.000", "2"),
+]
+
+
+def paginate(query, rows):
+    limit = int(query.get("limit", ["30"])[0])
+    offset = int(query.get("offset", ["0"])[0])
+    return rows[offset:offset + limit], {"limit": str(limit), "offset": str(offset), "total": str(len(rows))}
+
+
+def jolpica_payload(path, query=None):
+    """
+    Ergast-shaped response for a fake three-round 2023 season. Season-wide results and
+    qualifying, and lap times, are paginated over rows with limit/offset, like the real API.
+    """
+    parts = path.strip("/").split("/")[2:]  # drop "ergast/f1"
+    query = query or {}
+    rounds = ["1", "2", "3"]
+    if parts[1:] == ["races"]:
+        return {"MRData": {"RaceTable": {"Races": [jolpica_race(r) for r in rounds]}}}
+    if parts[1:] == ["drivers"]:
+        return {"MRData": {"DriverTable": {"Drivers": [{"driverId": "max_verstappen"}]}}}
+    if parts[1:] == ["constructors"]:
+        return {"MRData": {"ConstructorTable": {"Constructors": [{"constructorId": "red_bull"}]}}}
+    if parts[1:] in (["driverStandings"], ["constructorStandings"]):
+        return {"MRData": {"StandingsTable": {"StandingsLists": [{"round": "3"}]}}}
+    if len(parts) == 2 and parts[1] in JOLPICA_ROUND_ROWS:
+        row_key = "Results" if parts[1] == "results" else "QualifyingResults"
+        rows = [(r, row) for r in rounds for row in jolpica_race(r, parts[1])[row_key]]
+        rows, page = paginate(query, rows)
+        races = []
+        for r, row in rows:
+            if not races or races[-1]["round"] != r:
+                races.append(dict(jolpica_race(r), **{row_key: []}))
+            races[-1][row_key].append(row)
+        return {"MRData": dict(page, RaceTable={"season": "2023", "Races": races})}
+    if len(parts) == 3 and parts[2] == "laps":
+        if not JOLPICA_ROUND_ROWS["results"][parts[1]]:
+            return {"MRData": {"total": "0", "RaceTable": {"Races": []}}}
+        timings, page = paginate(query, JOLPICA_LAP_TIMINGS)
+        laps = []
+        for lap, driver, time, position in timings:
+            if not laps or laps[-1]["number"] != lap:
+                laps.append({"number": lap, "Timings": []})
+            laps[-1]["Timings"].append({"driverId": driver, "position": position, "time": time})
+        return {"MRData": dict(page, RaceTable={"Races": [dict(jolpica_race(parts[1]), Laps=laps)]})}
+    if len(parts) == 3:
+        if parts[2] in JOLPICA_ROUND_ROWS and not JOLPICA_ROUND_ROWS[parts[2]][parts[1]]:
+            return {"MRData": {"RaceTable": {"Races": []}}}
+        return {"MRData": {"RaceTable": {"Races": [jolpica_race(parts[1], parts[2])]}}}
+    return None
+
+
+class JolpicaHandler(BaseHTTPRequestHandler):
+    """Mock Jolpica API; the first `throttle` requests for each path get a 429."""
+
+    def do_GET(self):
+        server = self.server
+        path = urlparse(self.path).path
+        if not path.endswith(".json"):
+            self.send_error(404)
+            return
+        path = path[:-len(".json")]
+        with server.lock:
+            server.requests.append(path)
+            hits = server.hits[path] = server.hits.get(path, 0) + 1
+        if hits <= server.throttle:
+            self.send_response(429)
+            if server.retry_after is not None:
+                self.send_header("Retry-After", server.retry_after)
+            self.end_headers()
+            return
+        payload = jolpica_payload(path, parse_qs(urlparse(self.path).query))
+        if payload is None:
+            self.send_error(404)
+            return
+        body = json.dumps(payload).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            with server.lock:
+                server.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def jolpica_server(monkeypatch):
+    """
+    Mock Jolpica API with f1_history_jolpica pointed at it, a permissive rate limiter
+    and the response cache disabled.
+    """
+    import f1_history_jolpica
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), JolpicaHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.hits = {}
+    server.throttle = 0
+    server.retry_after = "0"
+    server.not_modified = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(f1_history_jolpica, "BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/ergast/f1")
+    monkeypatch.setattr(f1_history_jolpica, "rate_limiter", f1_history_jolpica.create_rate_limiter(1000, 10 ** 7))
+    monkeypatch.setattr(f1_history_jolpica, "response_cache", None)
+    yield server
+    server.shutdown()
+    server.server_close()
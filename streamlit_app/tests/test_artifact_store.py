@@ -0,0 +1,86 @@
+import hashlib
+import json
+
+import pytest
+
+import artifact_store
+
+from .conftest import S3_TEST_BUCKET as BUCKET
+
+
+SEASON = {
+    "season": 2023,
+    "races": [{"round": str(i), "raceName": f"Grand Prix {i}", "circuit": {"circuitName": "Circuit ü"}}
+              for i in range(1, 23)],
+}
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "zstd", "identity"])
+def test_write_json_round_trip(s3_client, encoding):
+    store = artifact_store.S3Store(BUCKET, client=s3_client)
+
+    written = artifact_store.write_json(store, "f1-data/2023/2023_season_data.json", SEASON, encoding=encoding)
+
+    head = s3_client.head_object(Bucket=BUCKET, Key="f1-data/2023/2023_season_data.json")
+    raw = s3_client.get_object(Bucket=BUCKET, Key="f1-data/2023/2023_season_data.json")["Body"].read()
+    assert head.get("ContentEncoding") == (None if encoding == "identity" else encoding)
+    assert head["Metadata"]["sha256"] == written["sha256"] == hashlib.sha256(raw).hexdigest()
+    assert written["bytes"] == len(raw)
+
+    body = store.read("f1-data/2023/2023_season_data.json")
+    assert json.loads(body) == SEASON
+    # Compact separators, no indentation
+    assert b"\n" not in body and b'"season":2023' in body
+
+
+def test_large_bodies_use_multipart_upload(s3_client, monkeypatch):
+    monkeypatch.setattr("moto.s3.models.S3_UPLOAD_PART_MIN_SIZE", 1024)
+    store = artifact_store.S3Store(BUCKET, client=s3_client, part_size=4096)
+    calls = []
+    upload_part = s3_client.upload_part
+    monkeypatch.setattr(s3_client, "upload_part", lambda **kwargs: calls.append(kwargs) or upload_part(**kwargs))
+    data = {"laps": [hashlib.sha256(str(i).encode()).hexdigest() for i in range(500)]}
+
+    written = artifact_store.write_json(store, "big.json", data, encoding="identity")
+
+    assert written["bytes"] > 4 * 4096
+    assert len(calls) == -(-written["bytes"] // 4096)
+    assert all(call["ChecksumAlgorithm"] == "SHA256" for call in calls)
+    assert json.loads(store.read("big.json")) == data
+
+
+def test_failed_multipart_upload_is_aborted(s3_client, monkeypatch):
+    monkeypatch.setattr("moto.s3.models.S3_UPLOAD_PART_MIN_SIZE", 1024)
+    store = artifact_store.S3Store(BUCKET, client=s3_client, part_size=1024)
+
+    def chunks():
+        yield b"x" * 4096
+        raise RuntimeError("serializer failed")
+
+    with pytest.raises(RuntimeError):
+        store.write_stream("broken.json", chunks())
+
+    assert s3_client.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+    assert store.read("broken.json") is None
+
+
+def test_read_rejects_checksum_mismatch(s3_client):
+    store = artifact_store.S3Store(BUCKET, client=s3_client)
+    s3_client.put_object(Bucket=BUCKET, Key="tampered.json", Body=b"{}", Metadata={"sha256": "0" * 64})
+
+    with pytest.raises(ValueError):
+        store.read("tampered.json")
+
+
+def test_local_store_streams_and_decompresses(tmp_path):
+    store = artifact_store.LocalStore(str(tmp_path))
+
+    artifact_store.write_json(store, "f1-data/2023/2023_season_data.json", SEASON, encoding="gzip")
+
+    raw = (tmp_path / "f1-data" / "2023" / "2023_season_data.json").read_bytes()
+    assert raw[:2] == artifact_store.GZIP_MAGIC
+    assert json.loads(store.read("f1-data/2023/2023_season_data.json")) == SEASON
+
+
+def test_s3_client_is_shared_per_process():
+    assert artifact_store.get_s3_client() is artifact_store.get_s3_client()
@@ -0,0 +1,274 @@
+import json
+import datetime
+import multiprocessing
+import time
+
+import requests
+
+import f1_history_jolpica
+
+from .conftest import S3_TEST_BUCKET as BUCKET
+
+
+def test_upload_to_s3_writes_compressed_season(s3_client, monkeypatch):
+    monkeypatch.setattr(f1_history_jolpica, "s3_client", s3_client)
+    monkeypatch.setattr(f1_history_jolpica, "S3_BUCKET_NAME", BUCKET)
+    season = {"season": 2023, "races": [], "race_details": [{"round": "1", "results": None}]}
+
+    f1_history_jolpica.upload_to_s3(season, "f1-data/2023/2023_season_data.json")
+
+    response = s3_client.get_object(Bucket=BUCKET, Key="f1-data/2023/2023_season_data.json")
+    assert response["ContentEncoding"] == "gzip"
+    assert json.loads(f1_history_jolpica.S3Store(BUCKET, client=s3_client).read(
+        "f1-data/2023/2023_season_data.json")) == season
+
+
+def test_concurrent_season_fetch_matches_sequential(jolpica_server):
+    sequential = f1_history_jolpica.process_season_data(2023, workers=1, bulk=False)
+    concurrent = f1_history_jolpica.process_season_data(2023, workers=8, bulk=False)
+
+    assert concurrent == sequential
+    assert [race["round"] for race in concurrent["race_details"]] == ["1", "2", "3"]
+    assert concurrent["race_details"][1]["qualifying"][0]["QualifyingResults"] == [{"position": "1"}]
+    assert concurrent["standings"]["drivers"] == [{"round": "3"}]
+    # 5 season endpoints plus results, qualifying and pit stops for 3 rounds, per run
+    assert len(jolpica_server.requests) == 2 * (5 + 3 * 3)
+
+
+def test_fetch_data_honours_retry_after(jolpica_server):
+    jolpica_server.throttle = 1
+    jolpica_server.retry_after = "1"
+
+    start = time.monotonic()
+    data = f1_history_jolpica.fetch_data(f"{f1_history_jolpica.BASE_URL}/2023/drivers", initial_delay=60)
+
+    # Waited for Retry-After, not the 60 s exponential backoff delay
+    assert 0.9 <= time.monotonic() - start < 10
+    assert data["MRData"]["DriverTable"]["Drivers"] == [{"driverId": "max_verstappen"}]
+
+
+def test_fetch_data_keeps_contract_on_errors(jolpica_server):
+    assert f1_history_jolpica.fetch_data(f"{f1_history_jolpica.BASE_URL}/2023/unknown") is None
+
+    jolpica_server.throttle = 5
+    jolpica_server.retry_after = None
+    assert f1_history_jolpica.fetch_data(f"{f1_history_jolpica.BASE_URL}/2023/races", max_retries=2,
+                                         initial_delay=0) is None
+
+
+def test_rate_limiter_enforces_burst_rate():
+    limiter = f1_history_jolpica.create_rate_limiter(burst_rate=20, hourly_limit=10 ** 6)
+
+    start = time.monotonic()
+    for _ in range(30):
+        limiter.acquire()
+
+    # 20 tokens up front, the remaining 10 at 20 per second
+    assert time.monotonic() - start >= 0.45
+    assert limiter.waited > 0
+
+
+def test_retry_after_accepts_http_dates():
+    response = requests.Response()
+    response.headers["Retry-After"] = "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert f1_history_jolpica.retry_after_seconds(response) == 0.0
+    response.headers["Retry-After"] = "7"
+    assert f1_history_jolpica.retry_after_seconds(response) == 7.0
+
+
+def test_completed_seasons_are_served_from_cache(jolpica_server, monkeypatch, tmp_path):
+    cache = f1_history_jolpica.ResponseCache(str(tmp_path / "jolpica.sqlite"))
+    monkeypatch.setattr(f1_history_jolpica, "response_cache", cache)
+
+    first = f1_history_jolpica.process_season_data(2023)
+    requests_made = len(jolpica_server.requests)
+    second = f1_history_jolpica.process_season_data(2023)
+
+    assert second == first
+    # 5 season endpoints, one page each of bulk results and qualifying, per-round pit stops
+    assert len(jolpica_server.requests) == requests_made == 5 + 2 + 3
+
+    # A later run opens the same cache file
+    monkeypatch.setattr(f1_history_jolpica, "response_cache",
+                        f1_history_jolpica.ResponseCache(str(tmp_path / "jolpica.sqlite")))
+    assert f1_history_jolpica.process_season_data(2023) == first
+    assert len(jolpica_server.requests) == requests_made
+
+
+def test_current_season_is_revalidated_with_etag(jolpica_server, monkeypatch, tmp_path):
+    cache = f1_history_jolpica.ResponseCache(str(tmp_path / "jolpica.sqlite"))
+    monkeypatch.setattr(f1_history_jolpica, "response_cache", cache)
+    endpoint = f"{f1_history_jolpica.BASE_URL}/{time.localtime().tm_year}/drivers"
+
+    first = f1_history_jolpica.fetch_data(endpoint)
+    assert f1_history_jolpica.fetch_data(endpoint) == first
+    assert len(jolpica_server.requests) == 1
+
+    # Once the TTL has passed, a conditional request revalidates the entry
+    monkeypatch.setattr(f1_history_jolpica, "JOLPICA_CACHE_TTL", 0)
+    assert f1_history_jolpica.fetch_data(endpoint) == first
+    assert len(jolpica_server.requests) == 2
+    assert jolpica_server.not_modified == 1
+
+
+def test_cache_ttl_policy(monkeypatch):
+    monkeypatch.setattr(f1_history_jolpica, "JOLPICA_CACHE_TTL", 600)
+    current = time.localtime().tm_year
+
+    assert f1_history_jolpica.cache_ttl("https://api.jolpi.ca/ergast/f1/2013/1/results.json") is None
+    assert f1_history_jolpica.cache_ttl(f"https://api.jolpi.ca/ergast/f1/{current}/races.json") == 600
+    assert f1_history_jolpica.cache_ttl("https://api.jolpi.ca/ergast/f1/current/driverStandings.json") == 600
+
+    # Fetched before the season ended: not final, even once the year is over
+    mid_season = time.mktime((2013, 6, 1, 12, 0, 0, 0, 0, -1))
+    after_season = time.mktime((2014, 1, 2, 12, 0, 0, 0, 0, -1))
+    assert f1_history_jolpica.cache_ttl("https://api.jolpi.ca/ergast/f1/2013/races.json", mid_season) == 600
+    assert f1_history_jolpica.cache_ttl("https://api.jolpi.ca/ergast/f1/2013/races.json", after_season) is None
+
+
+def test_mid_season_entry_is_revalidated_after_the_season(jolpica_server, monkeypatch, tmp_path):
+    cache = f1_history_jolpica.ResponseCache(str(tmp_path / "jolpica.sqlite"))
+    monkeypatch.setattr(f1_history_jolpica, "response_cache", cache)
+    endpoint = f"{f1_history_jolpica.BASE_URL}/2022/drivers"
+    first = f1_history_jolpica.fetch_data(endpoint)
+
+    # The entry was cached in the middle of the 2022 season
+    with cache._connection() as connection:
+        connection.execute("UPDATE responses SET fetched_at = ?", (time.mktime((2022, 6, 1, 12, 0, 0, 0, 0, -1)),))
+    assert f1_history_jolpica.fetch_data(endpoint) == first
+    assert len(jolpica_server.requests) == 2
+
+    # Revalidated after the season ended, it is final from then on
+    assert f1_history_jolpica.fetch_data(endpoint) == first
+    assert len(jolpica_server.requests) == 2
+
+
+def test_bulk_mode_is_byte_compatible_with_per_round_requests(jolpica_server, monkeypatch):
+    # Two rows per page, so races are split across pages
+    monkeypatch.setattr(f1_history_jolpica, "JOLPICA_PAGE_LIMIT", 2)
+
+    per_round = f1_history_jolpica.process_season_data(2023, bulk=False)
+    per_round_requests = len(jolpica_server.requests)
+    bulk = f1_history_jolpica.process_season_data(2023, bulk=True)
+    bulk_requests = len(jolpica_server.requests) - per_round_requests
+
+    assert json.dumps(bulk, indent=2) == json.dumps(per_round, indent=2)
+    assert bulk["race_details"][2]["results"] == []
+    assert [len(race["results"][0]["Results"]) for race in bulk["race_details"][:2]] == [3, 3]
+    # 5 season endpoints, 3 pages of results, 2 of qualifying and per-round pit stops
+    assert per_round_requests == 5 + 3 * 3
+    assert bulk_requests == 5 + 3 + 2 + 3
+
+
+def test_bulk_mode_falls_back_to_per_round_requests(jolpica_server, monkeypatch):
+    expected = f1_history_jolpica.process_season_data(2023, bulk=False)
+    real_fetch = f1_history_jolpica.fetch_data
+
+    def no_bulk_qualifying(endpoint, *args, **kwargs):
+        if endpoint.endswith("/2023/qualifying"):
+            return None
+        return real_fetch(endpoint, *args, **kwargs)
+
+    monkeypatch.setattr(f1_history_jolpica, "fetch_data", no_bulk_qualifying)
+    assert f1_history_jolpica.process_season_data(2023, bulk=True) == expected
+
+
+def test_refresh_season_fetches_only_missing_and_provisional_rounds(jolpica_server, s3_client, monkeypatch):
+    monkeypatch.setattr(f1_history_jolpica, "s3_client", s3_client)
+    monkeypatch.setattr(f1_history_jolpica, "S3_BUCKET_NAME", BUCKET)
+    uploads = []
+    upload_to_s3 = f1_history_jolpica.upload_to_s3
+    monkeypatch.setattr(f1_history_jolpica, "upload_to_s3", lambda data, key: uploads.append(key) or upload_to_s3(data, key))
+    store = f1_history_jolpica.S3Store(BUCKET, client=s3_client)
+    key = f1_history_jolpica.season_key(2023)
+
+    # Nothing stored yet: the whole season is fetched
+    assert f1_history_jolpica.refresh_season(2023) == ["1", "2", "3"]
+    full = json.loads(store.read(key))
+    assert full == f1_history_jolpica.process_season_data(2023)
+    jolpica_server.requests.clear()
+
+    # Round 3 has no results yet, so only it is refetched; nothing changed, nothing is written
+    assert f1_history_jolpica.refresh_season(2023) == []
+    assert len(jolpica_server.requests) == 5 + 3
+    assert uploads == [key]
+
+    # A stored file missing round 2 and with a failed round 1 fetch is completed and rewritten
+    partial = json.loads(json.dumps(full))
+    partial["race_details"][0]["results"] = None
+    del partial["race_details"][1]
+    upload_to_s3(partial, key)
+    jolpica_server.requests.clear()
+
+    assert f1_history_jolpica.refresh_season(2023) == ["1", "2"]
+    # No stored round is final, so results and qualifying come from the bulk endpoints
+    assert len(jolpica_server.requests) == 5 + 2 + 3
+    assert json.loads(store.read(key)) == full
+    assert uploads == [key, key]
+
+
+def test_incremental_run_records_changed_rounds(jolpica_server, s3_client, monkeypatch):
+    monkeypatch.setattr(f1_history_jolpica, "s3_client", s3_client)
+    monkeypatch.setattr(f1_history_jolpica, "S3_BUCKET_NAME", BUCKET)
+    store = f1_history_jolpica.S3Store(BUCKET, client=s3_client)
+
+    def changed_rounds():
+        return json.loads(store.read(f1_history_jolpica.changed_rounds_key(2023)))["rounds"]
+
+    f1_history_jolpica.main(["--incremental", "--seasons", "2023"])
+    assert changed_rounds() == ["1", "2", "3"]
+
+    # A later run with nothing new records that no round changed
+    f1_history_jolpica.main(["--incremental", "--seasons", "2023"])
+    assert changed_rounds() == []
+
+
+def test_is_provisional():
+    race = {"date": "2023-03-05", "results": [{}], "qualifying": [{}], "pitStops": []}
+    today = datetime.date(2023, 3, 20)
+
+    assert not f1_history_jolpica.is_provisional(race, today)
+    assert f1_history_jolpica.is_provisional(race, datetime.date(2023, 3, 8))
+    assert f1_history_jolpica.is_provisional(dict(race, results=[]), today)
+    assert f1_history_jolpica.is_provisional(dict(race, pitStops=None), today)
+
+
+def test_parse_seasons():
+    assert f1_history_jolpica.parse_seasons("2013-2016") == [2013, 2014, 2015, 2016]
+    assert f1_history_jolpica.parse_seasons("2021") == [2021]
+    assert f1_history_jolpica.parse_seasons("2019, 2021-2022,2019") == [2019, 2021, 2022]
+
+
+def drain_shared_limiter(limiter_state, limits, count):
+    limiter = f1_history_jolpica.SharedRateLimiter(limiter_state, limits)
+    for _ in range(count):
+        limiter.acquire()
+
+
+def test_shared_rate_limiter_is_shared_between_processes():
+    limiter = f1_history_jolpica.SharedRateLimiter.create(burst_rate=10, hourly_limit=10 ** 6)
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=drain_shared_limiter, args=(limiter.state, limiter.limits, 10))
+               for _ in range(2)]
+
+    start = time.monotonic()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+
+    # 10 tokens up front, the other 10 at 10 per second; separate buckets would not wait at all
+    assert time.monotonic() - start >= 0.9
+    assert limiter.waited > 0
+
+
+def test_backfill_processes_seasons_in_parallel(jolpica_server, s3_client, monkeypatch):
+    monkeypatch.setattr(f1_history_jolpica, "s3_client", s3_client)
+    monkeypatch.setattr(f1_history_jolpica, "S3_BUCKET_NAME", BUCKET)
+
+    statuses = f1_history_jolpica.backfill([2022, 2023], processes=2, mp_context=multiprocessing.get_context("fork"))
+
+    assert sorted((status["season"], status["status"], status["races"]) for status in statuses) == [
+        (2022, "ok", 3), (2023, "ok", 3)]
+    # Both seasons were fetched, each by its own process
+    assert {path.split("/")[3] for path in jolpica_server.requests} == {"2022", "2023"}
@@ -0,0 +1,91 @@
+import json
+
+import artifact_store
+import f1_history_store
+
+
+def driver(driver_id, given, family):
+    return {"driverId": driver_id, "code": driver_id[:3].upper(), "givenName": given, "familyName": family,
+            "nationality": "Dutch"}
+
+
+VER = driver("max_verstappen", "Max", "Verstappen")
+PER = driver("perez", "Sergio", "Pérez")
+RBR = {"constructorId": "red_bull", "name": "Red Bull", "nationality": "Austrian"}
+
+
+def result(position, racer, points):
+    return {"position": str(position), "positionText": str(position), "points": str(points), "grid": "1",
+            "laps": "57", "status": "Finished", "Driver": racer, "Constructor": RBR,
+            "Time": {"millis": str(5600000 + position)}}
+
+
+SEASON = {
+    "season": 2023,
+    "races": [{"round": str(r), "raceName": f"Round {r} GP", "date": f"2023-03-0{r}",
+               "Circuit": {"circuitId": f"c{r}", "circuitName": f"Circuit {r}",
+                           "Location": {"locality": "Sakhir", "country": "Bahrain"}}}
+              for r in (1, 2)],
+    "drivers": [VER, PER],
+    "constructors": [RBR],
+    "standings": {
+        "drivers": [{"round": "2", "DriverStandings": [
+            {"position": "1", "points": "43", "wins": "1", "Driver": VER, "Constructors": [RBR]}]}],
+        "constructors": [{"round": "2", "ConstructorStandings": [
+            {"position": "1", "points": "87", "wins": "2", "Constructor": RBR}]}],
+    },
+    "race_details": [
+        {"round": "1", "raceName": "Round 1 GP", "date": "2023-03-01",
+         "results": [{"round": "1", "Results": [result(1, VER, 25), result(2, PER, 18)]}],
+         "qualifying": [{"round": "1", "QualifyingResults": [
+             {"position": "1", "Q1": "1:31.0", "Driver": VER, "Constructor": RBR}]}],
+         "pitStops": [{"driverId": "max_verstappen", "stop": "1", "lap": "15", "duration": "22.1"}]},
+        {"round": "2", "raceName": "Round 2 GP", "date": "2023-03-02",
+         "results": [{"round": "2", "Results": [result(1, PER, 25), result(2, VER, 18)]}],
+         "qualifying": [], "pitStops": []},
+    ],
+}
+
+
+def test_load_season_normalizes_tables(tmp_path):
+    connection = f1_history_store.connect(str(tmp_path / "f1.sqlite"))
+    f1_history_store.load_season(connection, SEASON)
+    # Reloading a season replaces its rows
+    f1_history_store.load_season(connection, SEASON)
+
+    counts = {table: connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ("races", "drivers", "constructors", "results", "qualifying", "pit_stops",
+                            "driver_standings", "constructor_standings", "season_drivers")}
+    assert counts == {"races": 2, "drivers": 2, "constructors": 1, "results": 4, "qualifying": 1, "pit_stops": 1,
+                      "driver_standings": 1, "constructor_standings": 1, "season_drivers": 2}
+
+    rows = f1_history_store.driver_results(connection, "perez", season=2023)
+    assert [(row["round"], row["position"], row["points"]) for row in rows] == [(1, 2, 18.0), (2, 1, 25.0)]
+
+    races = f1_history_store.race_results(connection, 2023)
+    assert races[1]["Results"][0]["Driver"]["familyName"] == "Pérez"
+    assert races[0]["Results"][0]["Constructor"]["name"] == "Red Bull"
+
+
+def test_driver_lookups_use_the_index(tmp_path):
+    connection = f1_history_store.connect(str(tmp_path / "f1.sqlite"))
+    plan = connection.execute("EXPLAIN QUERY PLAN SELECT * FROM results WHERE driver_id = ? AND season = ?",
+                              ("perez", 2023)).fetchall()
+    assert any("results_driver" in row["detail"] for row in plan)
+
+
+def test_build_store_skips_unchanged_seasons(tmp_path):
+    store = artifact_store.LocalStore(str(tmp_path / "seasons"))
+    artifact_store.write_json(store, "f1-data/2023/2023_season_data.json", SEASON)
+    path = str(tmp_path / "f1.sqlite")
+
+    assert f1_history_store.build_store([2022, 2023], path=path, store=store) == [2023]
+    assert f1_history_store.build_store([2023], path=path, store=store) == []
+
+    changed = json.loads(json.dumps(SEASON))
+    changed["race_details"][1]["results"][0]["Results"].pop()
+    artifact_store.write_json(store, "f1-data/2023/2023_season_data.json", changed)
+    assert f1_history_store.build_store([2023], path=path, store=store) == [2023]
+
+    connection = f1_history_store.connect(path, read_only=True)
+    assert connection.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 3
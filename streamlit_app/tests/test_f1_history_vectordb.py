@@ -0,0 +1,260 @@
+import time
+
+import httpx
+import openai
+import pytest
+
+import f1_history_vectordb
+
+
+class CountingEmbeddings:
+    """Fake embeddings backend that counts calls and can fail the first few with a 429."""
+
+    def __init__(self, failures=0, retry_after=None):
+        self.fake = f1_history_vectordb.create_embeddings("fake")
+        self.calls = []
+        self.failures = failures
+        self.retry_after = retry_after
+
+    def embed_documents(self, texts):
+        self.calls.append(len(texts))
+        if self.failures:
+            self.failures -= 1
+            headers = {"retry-after": self.retry_after} if self.retry_after else {}
+            response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "https://api.openai.com"))
+            raise openai.RateLimitError("rate limited", response=response, body=None)
+        return self.fake.embed_documents(texts)
+
+
+def race(round_number):
+    def result(given, family, team):
+        return {"Driver": {"givenName": given, "familyName": family}, "Constructor": {"name": team}}
+    return {"round": str(round_number), "raceName": f"Round {round_number} GP", "date": "2023-03-05",
+            "Results": [result("Max", "Verstappen", "Red Bull")] + [result("Sergio", "Pérez", "Red Bull")] * 5}
+
+
+@pytest.fixture
+def season(monkeypatch):
+    season = {"season": 2023, "races": [race(r) for r in (1, 2, 3)], "drivers": [], "constructors": []}
+    monkeypatch.setattr(f1_history_vectordb.F1DataEnhancedEmbedder, "download_json_from_s3", lambda self, s: season)
+    monkeypatch.setattr(f1_history_vectordb.F1DataEnhancedEmbedder, "load_race_results", lambda self, s: None)
+    return season
+
+
+@pytest.fixture
+def embedder(season):
+    return f1_history_vectordb.F1DataEnhancedEmbedder(index=f1_history_vectordb.InMemoryIndex(), batch_size=4)
+
+
+def test_texts_are_embedded_in_batches_with_the_same_ids(embedder, monkeypatch):
+    backend = CountingEmbeddings()
+    monkeypatch.setattr(f1_history_vectordb, "embeddings", backend)
+
+    embedder.generate_embeddings_for_season(2023)
+
+    # 4 season summaries plus a winner and a top 5 text per round, 4 texts per call
+    assert backend.calls == [4, 4, 2]
+    assert embedder.index.requests == 1
+    assert set(embedder.index.vectors) == {
+        "2023_races_summary", "2023_drivers_summary", "2023_constructors_summary", "2023_standings_summary",
+        *(f"2023_race_{r}_{kind}" for r in (1, 2, 3) for kind in ("winner", "top5")),
+    }
+    values, metadata = embedder.index.vectors["2023_race_2_winner"]
+    assert metadata == {"text": "Race Round 2 GP (2023-03-05): Winner - Max Verstappen (Red Bull).",
+                        "category": "race_results", "season": "2023", "data_type": "item-level"}
+    assert values == backend.fake.embed_query(metadata["text"])
+
+
+def test_rate_limited_batches_are_retried(embedder, monkeypatch):
+    backend = CountingEmbeddings(failures=2, retry_after="3")
+    monkeypatch.setattr(f1_history_vectordb, "embeddings", backend)
+    waits = []
+    monkeypatch.setattr(f1_history_vectordb.time, "sleep", waits.append)
+
+    embedder.generate_embeddings_for_season(2023)
+
+    assert backend.calls == [4, 4, 4, 4, 2]
+    assert waits == [3.0, 3.0]
+    assert len(embedder.index.vectors) == 10
+
+
+def test_retries_give_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(f1_history_vectordb, "embeddings", CountingEmbeddings(failures=5))
+    monkeypatch.setattr(f1_history_vectordb.time, "sleep", lambda seconds: None)
+
+    with pytest.raises(openai.RateLimitError):
+        f1_history_vectordb.embed_with_retry(["text"], max_retries=3)
+
+
+def vector(i):
+    return f"vec-{i}", [0.125] * 8, {"text": f"text {i}"}
+
+
+def test_upsert_writer_batches_by_count_and_bytes():
+    index = f1_history_vectordb.InMemoryIndex()
+    size = f1_history_vectordb.vector_payload_bytes(*vector(0))
+
+    writer = f1_history_vectordb.UpsertWriter(index, max_vectors=4, max_bytes=10 ** 6)
+    for i in range(10):
+        writer.add(*vector(i))
+    writer.close()
+    assert (index.requests, len(index.vectors)) == (3, 10)
+
+    index = f1_history_vectordb.InMemoryIndex()
+    writer = f1_history_vectordb.UpsertWriter(index, max_vectors=100, max_bytes=3 * size)
+    for i in range(10):
+        writer.add(*vector(i))
+    writer.close()
+    assert (index.requests, len(index.vectors)) == (4, 10)
+    assert writer.stats()["vectors"] == 10 and writer.stats()["bytes"] >= 10 * size - 10
+
+
+def test_upsert_writer_sends_batches_concurrently():
+    class SlowIndex(f1_history_vectordb.InMemoryIndex):
+        def __init__(self):
+            super().__init__(latency=0.2)
+            self.in_flight = self.peak = 0
+
+        def upsert(self, vectors):
+            with self.lock:
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+            try:
+                return super().upsert(vectors)
+            finally:
+                with self.lock:
+                    self.in_flight -= 1
+
+    index = SlowIndex()
+    writer = f1_history_vectordb.UpsertWriter(index, max_vectors=1, workers=4)
+    start = time.monotonic()
+    for i in range(8):
+        writer.add(*vector(i))
+    writer.close()
+
+    assert len(index.vectors) == 8
+    assert index.peak == 4
+    assert time.monotonic() - start < 8 * 0.2
+
+
+def test_upsert_errors_are_raised():
+    class FailingIndex(f1_history_vectordb.InMemoryIndex):
+        def upsert(self, vectors):
+            raise RuntimeError("upsert rejected")
+
+    writer = f1_history_vectordb.UpsertWriter(FailingIndex())
+    writer.add(*vector(0))
+    with pytest.raises(RuntimeError):
+        writer.close()
+
+
+def test_embedding_cache_skips_unchanged_texts(season, monkeypatch, tmp_path):
+    backend = CountingEmbeddings()
+    monkeypatch.setattr(f1_history_vectordb, "embeddings", backend)
+    index = f1_history_vectordb.InMemoryIndex()
+
+    def run(index_name="f1-data-index"):
+        cache = f1_history_vectordb.EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+        embedder = f1_history_vectordb.F1DataEnhancedEmbedder(index_name, index=index, batch_size=4, cache=cache)
+        embedder.generate_embeddings_for_season(2023)
+        return dict(cache.stats(), unchanged=embedder.unchanged)
+
+    assert run() == {"hits": 0, "misses": 10, "hit_rate": 0.0, "unchanged": 0}
+    first = dict(index.vectors)
+    calls, requests = len(backend.calls), index.requests
+
+    # Nothing changed: no embedding calls and no upserts
+    assert run()["unchanged"] == 10
+    assert (len(backend.calls), index.requests) == (calls, requests)
+
+    # A renamed race changes the season summary and its two race texts; only those are embedded
+    season["races"][1]["raceName"] = "Round 2 Sprint GP"
+    stats = run()
+    assert (stats["unchanged"], stats["misses"]) == (7, 3)
+    assert backend.calls[calls:] == [3] and index.requests == requests + 1
+
+    # A new index is filled from the cache without embedding calls
+    season["races"][1]["raceName"] = "Round 2 GP"
+    index.vectors.clear()
+    assert run("f1-data-index-v2") == {"hits": 10, "misses": 0, "hit_rate": 1.0, "unchanged": 0}
+    assert index.vectors == first
+    assert backend.calls[calls:] == [3]
+
+
+def test_delta_indexing_upserts_changed_rounds_and_deletes_stale_vectors(season, monkeypatch, tmp_path):
+    backend = CountingEmbeddings()
+    monkeypatch.setattr(f1_history_vectordb, "embeddings", backend)
+    index = f1_history_vectordb.InMemoryIndex()
+    cache = f1_history_vectordb.EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+
+    def run(rounds=None):
+        embedder = f1_history_vectordb.F1DataEnhancedEmbedder(index=index, batch_size=4, cache=cache)
+        embedder.generate_embeddings_for_season(2023, rounds=rounds)
+        return embedder
+
+    run()
+    assert len(cache.manifest("f1-data-index", 2023)) == len(index.vectors) == 10
+
+    # Round 3 is dropped from the schedule and round 2's winner changes
+    del season["races"][2]
+    season["races"][1]["Results"] = season["races"][1]["Results"][::-1]
+    upserted = []
+    monkeypatch.setattr(index, "upsert", lambda vectors: upserted.extend(unique_id for unique_id, _, _ in vectors))
+    embedder = run(rounds=["2", "3"])
+
+    assert sorted(upserted) == ["2023_race_2_top5", "2023_race_2_winner", "2023_races_summary"]
+    assert (embedder.unchanged, embedder.deleted) == (3, 2)
+    assert "2023_race_3_winner" not in index.vectors and "2023_race_1_winner" in index.vectors
+    assert sorted(cache.manifest("f1-data-index", 2023)) == sorted(
+        [f"2023_{category}_summary" for category in ("races", "drivers", "constructors", "standings")]
+        + [f"2023_race_{r}_{kind}" for r in (1, 2) for kind in ("winner", "top5")])
+
+    # Rounds outside the list are left alone, even when they are missing from the data
+    del season["races"][0]
+    assert run(rounds=["2"]).deleted == 0
+    assert "2023_race_1_winner" in index.vectors
+
+    # A requested round that is still scheduled but has no results keeps its vectors
+    season["races"].insert(0, {key: value for key, value in race(1).items() if key != "Results"})
+    assert run(rounds=["1"]).deleted == 0
+
+    # A requested round dropped from the schedule loses its vectors, even though no race
+    # vectors were generated in this run
+    del season["races"][0]
+    assert run(rounds=["1"]).deleted == 2
+    assert "2023_race_1_winner" not in index.vectors
+
+    # Without race results at all, the indexed race vectors are kept
+    monkeypatch.setitem(season, "races", [])
+    assert run().deleted == 0
+
+
+def test_vector_round():
+    assert f1_history_vectordb.vector_round("2023_race_12_top5") == "12"
+    assert f1_history_vectordb.vector_round("2023_races_summary") is None
+
+
+def test_rounds_apply_to_a_single_season(season, monkeypatch):
+    with pytest.raises(SystemExit):
+        f1_history_vectordb.parse_args(["--rounds", "5,6"])
+    args = f1_history_vectordb.parse_args(["--season", "2023", "--rounds", "5,6"])
+    assert (args.start, args.end, args.rounds) == (2023, 2023, ["5", "6"])
+
+    embedder = f1_history_vectordb.F1DataEnhancedEmbedder(index=f1_history_vectordb.InMemoryIndex())
+    with pytest.raises(ValueError):
+        embedder.batch_embed_seasons(2013, 2023, rounds=["5"])
+
+
+def test_changed_rounds_are_read_per_season(season, monkeypatch):
+    recorded = {2022: ["2"], 2023: []}
+    monkeypatch.setattr(f1_history_vectordb.F1DataEnhancedEmbedder, "load_changed_rounds",
+                        lambda self, s: recorded.get(s))
+    calls = []
+    monkeypatch.setattr(f1_history_vectordb.F1DataEnhancedEmbedder, "generate_embeddings_for_season",
+                        lambda self, s, wait=True, rounds=None: calls.append((s, rounds)))
+    embedder = f1_history_vectordb.F1DataEnhancedEmbedder(index=f1_history_vectordb.InMemoryIndex())
+
+    embedder.batch_embed_seasons(2021, 2023, changed_rounds=True)
+
+    # 2021 has no record and is skipped; 2023 changed no round, so only its summaries are checked
+    assert calls == [(2022, ["2"]), (2023, [])]
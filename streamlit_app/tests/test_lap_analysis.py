@@ -0,0 +1,868 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pyarrow.parquet as pq
+import pytest
+
+import lap_analysis
+from .conftest import FIXTURES_DIR, MESSAGE_RE
+
+
+@pytest.fixture
+def no_delays(monkeypatch, tmp_path):
+    monkeypatch.setattr(lap_analysis, "LINK_DELAY", 0)
+    monkeypatch.setattr(lap_analysis, "readiness_stats", lap_analysis.ReadinessStats())
+    monkeypatch.chdir(tmp_path)
+
+
+def test_scrape_race_content_expands_load_more(no_delays, autosport_server, loopback_driver_factory):
+    driver = loopback_driver_factory()
+
+    title, race = lap_analysis.scrape_race_content(driver, f"{autosport_server}/race_bahrain.html")
+
+    assert title == "Bahrain GP live: Race"
+    assert race["country"] == "Bahrain"
+    assert driver.clicks == 2
+    # The message with an unparseable timestamp is dropped
+    assert [m["event"] for m in race["race"]] == [
+        "lights_out", "safety_car", "non_keyword_message", "penalty", "checkered_flag"
+    ]
+    assert race["race"][0].to_dict() == {
+        "time": "2024-03-02T15:03:00+00:00",
+        "event": "lights_out",
+        "comment": "Lights out and away we go!",
+    }
+
+
+def test_concurrent_scrape_matches_sequential(no_delays, autosport_server, loopback_driver_factory):
+    links = [
+        f"{autosport_server}/race_bahrain.html",
+        f"{autosport_server}/race_saudi.html",
+    ]
+
+    sequential = lap_analysis.sequential_scrape(loopback_driver_factory(), links)
+    concurrent, stats = lap_analysis.concurrent_scrape(links, workers=2, driver_factory=loopback_driver_factory)
+
+    assert concurrent == sequential
+    assert set(concurrent) == {"Bahrain GP live: Race", "Saudi Arabian GP live: Race day"}
+    assert [s["worker"] for s in stats] == [0, 1]
+    assert sum(s["scraped"] for s in stats) == 2
+    assert all(s["wall_seconds"] >= s["scrape_seconds"] for s in stats)
+    assert all(d.quit_called for d in loopback_driver_factory.drivers[1:])
+
+
+def test_concurrent_scrape_records_failed_links(no_delays, autosport_server, loopback_driver_factory):
+    links = [
+        f"{autosport_server}/race_saudi.html",
+        f"{autosport_server}/missing_race.html",
+    ]
+
+    results, stats = lap_analysis.concurrent_scrape(links, workers=4, driver_factory=loopback_driver_factory)
+
+    assert list(results) == ["Saudi Arabian GP live: Race day"]
+    # Pool is bounded by the number of links
+    assert len(stats) == 2
+    with open("failed_links.json", encoding="utf-8") as f:
+        assert json.load(f) == [f"{autosport_server}/missing_race.html"]
+
+
+def test_concurrent_scrape_driver_startup_failure(no_delays, autosport_server):
+    def broken_factory():
+        raise RuntimeError("chrome not found")
+
+    links = [f"{autosport_server}/race_saudi.html"]
+    results, stats = lap_analysis.concurrent_scrape(links, workers=1, driver_factory=broken_factory)
+
+    assert results == {}
+    assert stats[0]["scraped"] == 0
+    with open("failed_links.json", encoding="utf-8") as f:
+        assert json.load(f) == links
+
+
+def test_browser_pool_reuses_and_recycles_sessions(no_delays, autosport_server, loopback_driver_factory):
+    links = [f"{autosport_server}/race_saudi.html"] * 5
+    pool = lap_analysis.BrowserPool(1, max_pages=2, factory=loopback_driver_factory)
+
+    results, _ = lap_analysis.concurrent_scrape(links, workers=1, browser_pool=pool)
+    pool.close()
+
+    assert list(results) == ["Saudi Arabian GP live: Race day"]
+    # Sessions are reused until they have loaded max_pages pages, then replaced
+    assert [d.pages_loaded for d in loopback_driver_factory.drivers] == [2, 2, 1]
+    assert pool.stats == {"created": 3, "leases": 5, "recycled": 2, "discarded": 0}
+    assert all(d.quit_called for d in loopback_driver_factory.drivers)
+
+
+def test_browser_pool_warm_and_discard(loopback_driver_factory):
+    pool = lap_analysis.BrowserPool(2, factory=loopback_driver_factory)
+    pool.warm()
+    assert pool.stats["created"] == 2
+
+    with pool.lease() as first:
+        pass
+    with pool.lease() as second:
+        assert second is first
+    with pytest.raises(lap_analysis.WebDriverException):
+        with pool.lease() as broken:
+            raise lap_analysis.WebDriverException("tab crashed")
+
+    assert broken.quit_called
+    assert pool.stats["created"] == 2
+    assert pool.stats["discarded"] == 1
+    pool.close()
+
+
+def crashing_factory(loopback_driver_factory, crash_on_page):
+    """Loopback drivers whose first session crashes on its `crash_on_page`-th page load."""
+    def factory():
+        driver = loopback_driver_factory()
+        if len(loopback_driver_factory.drivers) == 1:
+            get = driver.get
+
+            def crash(url):
+                if driver.pages_loaded + 1 == crash_on_page:
+                    raise lap_analysis.WebDriverException("chrome not reachable")
+                get(url)
+            driver.get = crash
+        return driver
+    return factory
+
+
+def test_crashed_session_is_replaced(no_delays, autosport_server, loopback_driver_factory):
+    links = [f"{autosport_server}/race_saudi.html"] * 3
+    pool = lap_analysis.BrowserPool(1, factory=crashing_factory(loopback_driver_factory, 2))
+
+    results, stats = lap_analysis.concurrent_scrape(links, workers=1, browser_pool=pool)
+    pool.close()
+
+    assert list(results) == ["Saudi Arabian GP live: Race day"]
+    assert (stats[0]["scraped"], stats[0]["failed"]) == (2, 1)
+    # The crashed session was quit and the remaining link ran on a fresh one
+    first, second = loopback_driver_factory.drivers
+    assert first.quit_called and (first.pages_loaded, second.pages_loaded) == (1, 1)
+    assert pool.stats == {"created": 2, "leases": 3, "recycled": 0, "discarded": 1}
+
+
+def test_incremental_scrape_renews_a_crashed_session(no_delays, autosport_server, loopback_driver_factory):
+    links = [f"{autosport_server}/race_saudi.html", f"{autosport_server}/race_saudi.html?again"]
+    pool = lap_analysis.BrowserPool(1, factory=crashing_factory(loopback_driver_factory, 1))
+
+    with pool.lease() as driver:
+        _, failed = lap_analysis.incremental_scrape(driver, links, {}, {}, pool=pool)
+        assert driver.driver is loopback_driver_factory.drivers[1]
+
+    assert failed == links[:1]
+    assert pool.stats["discarded"] == 1
+
+
+def test_sequential_scrape_renews_a_crashed_session(no_delays, monkeypatch, tmp_path, autosport_server,
+                                                    loopback_driver_factory):
+    monkeypatch.chdir(tmp_path)
+    links = [f"{autosport_server}/race_saudi.html", f"{autosport_server}/race_saudi.html?again"]
+    pool = lap_analysis.BrowserPool(1, factory=crashing_factory(loopback_driver_factory, 1))
+
+    with pool.lease() as driver:
+        results = lap_analysis.sequential_scrape(driver, links, pool=pool)
+        assert driver.driver is loopback_driver_factory.drivers[1]
+
+    assert list(results) == ["Saudi Arabian GP live: Race day"]
+    assert pool.stats["discarded"] == 1
+
+
+def test_chromedriver_path_is_pinned(monkeypatch, tmp_path):
+    driver_binary = tmp_path / "chromedriver"
+    driver_binary.write_text("")
+    installs = []
+
+    class FakeManager:
+        def __init__(self, driver_version=None):
+            self.driver_version = driver_version
+
+        def install(self):
+            installs.append(self.driver_version)
+            return str(driver_binary)
+
+    monkeypatch.setattr(lap_analysis, "ChromeDriverManager", FakeManager)
+    monkeypatch.setattr(lap_analysis, "CHROMEDRIVER_PATH", None)
+    monkeypatch.setattr(lap_analysis, "CHROMEDRIVER_VERSION", "126.0.6478.126")
+    monkeypatch.setattr(lap_analysis, "DRIVER_PIN_FILE", str(tmp_path / "pin" / "chromedriver.json"))
+
+    for _ in range(2):
+        lap_analysis.resolve_chromedriver_path.cache_clear()
+        assert lap_analysis.resolve_chromedriver_path() == str(driver_binary)
+
+    # Only the first resolution downloads; the second reads the pin file
+    assert installs == ["126.0.6478.126"]
+    lap_analysis.resolve_chromedriver_path.cache_clear()
+
+
+def test_rejected_chromedriver_pin_is_resolved_again(monkeypatch, tmp_path):
+    pin = {"path": str(tmp_path / "chromedriver-old"), "version": None}
+    (tmp_path / "chromedriver-old").write_text("")
+    (tmp_path / "chromedriver-new").write_text("")
+    (tmp_path / "chromedriver.json").write_text(json.dumps(pin))
+    started = []
+
+    class FakeManager:
+        def __init__(self, driver_version=None):
+            pass
+
+        def install(self):
+            return str(tmp_path / "chromedriver-new")
+
+    class FakeChrome:
+        def __init__(self, service=None, options=None):
+            started.append(os.path.basename(service.path))
+            if service.path == pin["path"]:
+                raise lap_analysis.SessionNotCreatedException("This version of ChromeDriver only supports Chrome 126")
+
+        def set_page_load_timeout(self, seconds):
+            pass
+
+        def implicitly_wait(self, seconds):
+            pass
+
+    monkeypatch.setattr(lap_analysis, "ChromeDriverManager", FakeManager)
+    monkeypatch.setattr(lap_analysis.webdriver, "Chrome", FakeChrome)
+    monkeypatch.setattr(lap_analysis, "WEBDRIVER_URL", None)
+    monkeypatch.setattr(lap_analysis, "CHROMEDRIVER_PATH", None)
+    monkeypatch.setattr(lap_analysis, "CHROMEDRIVER_VERSION", None)
+    monkeypatch.setattr(lap_analysis, "DRIVER_PIN_FILE", str(tmp_path / "chromedriver.json"))
+    lap_analysis.resolve_chromedriver_path.cache_clear()
+
+    lap_analysis.create_webdriver("off")
+
+    assert started == ["chromedriver-old", "chromedriver-new"]
+    assert json.loads((tmp_path / "chromedriver.json").read_text())["path"] == str(tmp_path / "chromedriver-new")
+    lap_analysis.resolve_chromedriver_path.cache_clear()
+
+
+def test_create_webdriver_applies_resource_policy(monkeypatch):
+    cdp_calls = []
+
+    class FakeChrome:
+        def __init__(self, service=None, options=None):
+            self.options = options
+
+        def set_page_load_timeout(self, seconds):
+            pass
+
+        def implicitly_wait(self, seconds):
+            pass
+
+        def execute_cdp_cmd(self, cmd, params):
+            cdp_calls.append((cmd, params))
+
+    class FakeBlocker:
+        def __init__(self, driver, policy, block_urls=False):
+            blockers.append((policy.name, block_urls))
+
+        def start(self):
+            return self
+
+    blockers = []
+    monkeypatch.setattr(lap_analysis.webdriver, "Chrome", FakeChrome)
+    monkeypatch.setattr(lap_analysis, "ResourceTypeBlocker", FakeBlocker)
+    monkeypatch.setattr(lap_analysis, "WEBDRIVER_URL", None)
+    monkeypatch.setattr(lap_analysis, "CHROMEDRIVER_PATH", "/usr/bin/chromedriver")
+    lap_analysis.resolve_chromedriver_path.cache_clear()
+
+    driver = lap_analysis.create_webdriver("text")
+    assert driver.options.capabilities["goog:loggingPrefs"] == {"performance": "ALL"}
+    assert [cmd for cmd, _ in cdp_calls] == ["Network.enable", "Network.setBlockedURLs"]
+    blocked = cdp_calls[1][1]["urls"]
+    assert "*.woff*" in blocked and "*.css*" in blocked and "*doubleclick.net*" in blocked
+    # URL patterns went through execute_cdp_cmd; the blocker only intercepts by type
+    assert blockers == [("text", False)]
+
+    cdp_calls.clear()
+    lap_analysis.create_webdriver("off")
+    assert cdp_calls == [] and len(blockers) == 1
+    lap_analysis.resolve_chromedriver_path.cache_clear()
+
+
+class FakeDevToolsSession:
+    """Runs real DevTools commands far enough to record them, and replays paused requests."""
+
+    def __init__(self, paused_ids):
+        self.commands = []
+        self.paused_ids = paused_ids
+
+    async def execute(self, command):
+        request = next(command)
+        self.commands.append((request["method"], request.get("params", {})))
+
+    def listen(self, event_type, buffer_size=10):
+        async def events():
+            for request_id in self.paused_ids:
+                yield SimpleNamespace(request_id=request_id)
+        return events()
+
+
+def test_resource_type_blocker_fails_disallowed_types():
+    from selenium.webdriver.common.devtools import v131
+    session = FakeDevToolsSession([v131.fetch.RequestId("1"), v131.fetch.RequestId("2")])
+
+    class RemoteDriver:
+        @asynccontextmanager
+        async def bidi_connection(self):
+            yield SimpleNamespace(session=session, devtools=v131)
+
+    blocker = lap_analysis.apply_resource_policy(RemoteDriver(), lap_analysis.RESOURCE_POLICIES["text"])
+    blocker.thread.join(5)
+
+    methods = [method for method, _ in session.commands]
+    assert methods == ["Network.enable", "Network.setBlockedURLs", "Fetch.enable",
+                       "Fetch.failRequest", "Fetch.failRequest"]
+    types = {pattern["resourceType"] for pattern in session.commands[2][1]["patterns"]}
+    assert {"Image", "Font", "Ping", "WebSocket", "Other"} <= types
+    assert not types & {"Document", "Script", "XHR", "Fetch"}
+    assert session.commands[3][1] == {"requestId": "1", "errorReason": "BlockedByClient"}
+    assert blocker.blocked == 2
+
+
+def test_resource_policy_fails_loudly_without_devtools():
+    class RemoteDriver:
+        @asynccontextmanager
+        async def bidi_connection(self):
+            raise lap_analysis.WebDriverException("Unable to find url to connect to from capabilities")
+            yield
+
+    with pytest.raises(RuntimeError, match="could not be applied"):
+        lap_analysis.apply_resource_policy(RemoteDriver(), lap_analysis.RESOURCE_POLICIES["strict"])
+    assert lap_analysis.apply_resource_policy(RemoteDriver(), None) is None
+
+
+def test_page_traffic_is_reported_per_page(no_delays, monkeypatch, autosport_server, loopback_driver_factory):
+    def event(method, **params):
+        return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+    driver = loopback_driver_factory()
+    driver.get_log = lambda log_type: [
+        event("Network.requestWillBeSent", requestId="1"),
+        event("Network.requestWillBeSent", requestId="2"),
+        event("Network.requestWillBeSent", requestId="3"),
+        event("Network.loadingFinished", requestId="1", encodedDataLength=12000),
+        event("Network.loadingFinished", requestId="2", encodedDataLength=3000),
+        event("Network.loadingFailed", requestId="3", blockedReason="inspector"),
+    ]
+    stats = lap_analysis.NetworkStats()
+    monkeypatch.setattr(lap_analysis, "network_stats", stats)
+
+    lap_analysis.scrape_race_content(driver, f"{autosport_server}/race_saudi.html")
+
+    assert stats.pages["race"] == [{
+        "url": f"{autosport_server}/race_saudi.html", "bytes": 15000, "requests": 3, "blocked": 1
+    }]
+    assert stats.totals("race")["blocked"] == 1
+
+
+def test_get_race_links_over_http(no_delays, autosport_server):
+    session = lap_analysis.create_http_session()
+
+    links = lap_analysis.get_race_links(session, base_url=autosport_server)
+
+    assert sorted(links) == [
+        f"{autosport_server}/race_abu_dhabi.html",
+        f"{autosport_server}/race_bahrain.html",
+        f"{autosport_server}/race_las_vegas.html",
+        f"{autosport_server}/race_saudi.html",
+    ]
+
+
+def test_discover_race_links_is_ordered_and_self_terminating(no_delays, autosport_server):
+    session = lap_analysis.create_http_session()
+
+    items = lap_analysis.discover_race_links(session, base_url=autosport_server, workers=3)
+
+    # Page 2 lists only a test session and is skipped; page 4 lists nothing and ends the walk
+    assert items == [
+        {"url": f"{autosport_server}/race_bahrain.html", "title": "Bahrain GP live: Race",
+         "published": "2024-03-02T14:00:00Z"},
+        {"url": f"{autosport_server}/race_saudi.html", "title": "Saudi Arabian GP live: Race day",
+         "published": "2024-03-09T16:00:00Z"},
+        {"url": f"{autosport_server}/race_abu_dhabi.html", "title": "Abu Dhabi GP live: Race",
+         "published": "2023-11-26T12:00:00Z"},
+        {"url": f"{autosport_server}/race_las_vegas.html", "title": "Las Vegas GP live: Race",
+         "published": "2023-11-19T06:00:00Z"},
+    ]
+
+
+def test_discover_race_links_stops_at_known_race(no_delays, autosport_server, loopback_driver_factory):
+    driver = loopback_driver_factory()
+
+    links = lap_analysis.get_race_links(
+        driver, base_url=autosport_server, known={f"{autosport_server}/race_saudi.html"}
+    )
+
+    assert links == [f"{autosport_server}/race_bahrain.html"]
+    assert driver.pages_loaded == 1
+
+
+def test_empty_http_listing_falls_back_to_selenium(no_delays, monkeypatch, autosport_server,
+                                                     loopback_driver_factory):
+    # The HTTP backend only gets a JS shell; the browser sees the rendered listing
+    fetch_page = lap_analysis.fetch_page
+    monkeypatch.setattr(lap_analysis, "fetch_page", lambda session, url: (
+        "<html><body><div id='app'></div></body></html>" if "/live/" in url else fetch_page(session, url)))
+    session = lap_analysis.create_http_session()
+
+    with pytest.raises(lap_analysis.EmptyListing):
+        lap_analysis.get_race_links(session, base_url=autosport_server)
+
+    pool = lap_analysis.BrowserPool(1, factory=loopback_driver_factory)
+    links = lap_analysis.get_race_links(session, base_url=autosport_server, pool=pool)
+    pool.close()
+
+    assert len(links) == 4
+    assert pool.stats["leases"] == 1
+
+
+def test_discover_race_links_retries_and_raises_on_listing_errors(no_delays, autosport_server,
+                                                                   loopback_driver_factory):
+    driver = loopback_driver_factory()
+    get = driver.get
+    failures = {"count": 1}
+
+    def flaky_get(url):
+        if url.endswith("p=1") and failures["count"]:
+            failures["count"] -= 1
+            raise lap_analysis.WebDriverException("net::ERR_CONNECTION_RESET")
+        get(url)
+    driver.get = flaky_get
+
+    # A transient error on page 1 is retried rather than ending discovery there
+    assert len(lap_analysis.get_race_links(driver, base_url=autosport_server)) == 4
+
+    # An error that persists fails discovery instead of silently skipping the older races
+    failures["count"] = lap_analysis.LISTING_RETRIES + 1
+    with pytest.raises(lap_analysis.WebDriverException):
+        lap_analysis.get_race_links(driver, base_url=autosport_server)
+
+
+def test_http_backend_matches_selenium_output(no_delays, autosport_server, loopback_driver_factory):
+    session = lap_analysis.create_http_session()
+
+    for page in ["race_bahrain.html", "race_saudi.html"]:
+        link = f"{autosport_server}/{page}"
+        assert lap_analysis.scrape_race_content(session, link) == \
+            lap_analysis.scrape_race_content(loopback_driver_factory(), link)
+
+
+def test_http_scrape_falls_back_to_selenium(no_delays, monkeypatch, autosport_server, loopback_driver_factory):
+    monkeypatch.setattr(lap_analysis, "create_webdriver", loopback_driver_factory)
+    session = lap_analysis.create_http_session()
+    links = [f"{autosport_server}/race_saudi.html", f"{autosport_server}/race_monaco.html"]
+
+    assert lap_analysis.scrape_race_content(session, links[1]) == (None, None)
+
+    results = lap_analysis.http_scrape(session, links)
+
+    assert set(results) == {"Saudi Arabian GP live: Race day", "Monaco GP live: Race"}
+    # Only the link without a followable feed URL went through the browser
+    assert [d.pages_loaded for d in loopback_driver_factory.drivers] == [1]
+
+
+def counting_session():
+    session = lap_analysis.create_http_session()
+    session.requested = []
+    session.hooks["response"].append(lambda r, *args, **kwargs: session.requested.append(r.url))
+    return session
+
+
+def test_incremental_scrape_skips_complete_races(no_delays, autosport_server):
+    links = [f"{autosport_server}/race_bahrain.html", f"{autosport_server}/race_saudi.html"]
+    race_data, manifest = {}, {}
+    now = datetime(2024, 12, 1, tzinfo=timezone.utc)
+
+    changed, failed = lap_analysis.incremental_scrape(counting_session(), links, race_data, manifest, now=now)
+
+    assert (changed, failed) == (2, [])
+    entry = manifest[links[0]]
+    assert entry["title"] == "Bahrain GP live: Race"
+    assert entry["last_time"] == "2024-03-02T16:35:12+00:00"
+    assert entry["message_count"] == 5
+    assert entry["complete"] is True
+    assert entry["content_hash"] == lap_analysis.race_content_hash(race_data["Bahrain GP live: Race"]["race"])
+
+    session = counting_session()
+    changed, failed = lap_analysis.incremental_scrape(session, links, race_data, manifest, now=now)
+
+    assert (changed, failed) == (0, [])
+    assert session.requested == []
+
+
+def test_incremental_scrape_appends_new_messages(no_delays, autosport_server):
+    link = f"{autosport_server}/race_bahrain.html"
+    title = "Bahrain GP live: Race"
+    race_data, manifest = {}, {}
+    now = datetime(2024, 3, 2, 16, 40, tzinfo=timezone.utc)
+    lap_analysis.incremental_scrape(counting_session(), [link], race_data, manifest, now=now)
+    assert manifest[link]["complete"] is False
+
+    # Pretend the last run stopped just after the penalty message
+    race_data[title]["race"] = race_data[title]["race"][:-1]
+    manifest[link] = lap_analysis.build_manifest_entry(title, race_data[title]["race"], now)
+    assert manifest[link]["last_time"] == "2024-03-02T16:10:40+00:00"
+
+    session = counting_session()
+    changed, _ = lap_analysis.incremental_scrape(session, [link], race_data, manifest, now=now)
+
+    assert changed == 1
+    # The newest page already reaches seen messages, so no 'Load more' pages are fetched
+    assert session.requested == [link]
+    assert [m["event"] for m in race_data[title]["race"]][-2:] == ["penalty", "checkered_flag"]
+    assert manifest[link]["message_count"] == 5
+
+
+def test_run_incremental_with_local_store(no_delays, monkeypatch, tmp_path, autosport_server):
+    monkeypatch.setattr(lap_analysis, "FETCH_BACKEND", "http")
+    store = lap_analysis.LocalStore(str(tmp_path / "bucket"))
+
+    race_data, manifest = lap_analysis.run_incremental(store, base_url=autosport_server)
+
+    assert set(race_data) == {"Bahrain GP live: Race", "Saudi Arabian GP live: Race day", "Abu Dhabi GP live: Race",
+                              "Las Vegas GP live: Race"}
+    assert json.loads(store.read(lap_analysis.MANIFEST_KEY)) == manifest
+    index = json.loads(store.read(lap_analysis.RACE_INDEX_KEY))
+    assert sorted(index["races"]) == ["races/2023/las-vegas.json", "races/2024/abu-dhabi.json",
+                                      "races/2024/bahrain.json", "races/2024/saudi.json"]
+    assert store.read(lap_analysis.RACE_DATA_KEY) is None
+
+    writes = []
+    monkeypatch.setattr(store, "write", lambda *args, **kwargs: writes.append(args))
+    monkeypatch.setattr(store, "write_stream", lambda *args, **kwargs: writes.append(args))
+    lap_analysis.run_incremental(store, base_url=autosport_server)
+    assert writes == []
+
+
+def test_lxml_extractor_matches_full_soup():
+    pages = ["race_bahrain.html", "race_bahrain_more1.html", "race_bahrain_more2.html", "race_saudi.html"]
+    html = "".join(open(os.path.join(FIXTURES_DIR, page), encoding="utf-8").read() for page in pages)
+    html += (
+        '<div class="mslt-msg mslt-msg__flag_red extra" id="edge">'
+        '<time class="x mslt-msg__time" datetime=" 2024-03-02T15:40:00Z ">15:40</time>'
+        '<div class="mslt-msg__body ms-article-content"><p>Red &amp; <b>yellow</b></p>\n<p>flags</p></div></div>'
+        '<div class="mslt-msg"><time class="mslt-msg__time" datetime="2024-03-02T15:41:00Z"></time>'
+        '<div class="mslt-msg__body">no article-content class, skipped</div></div>'
+    )
+
+    expected = lap_analysis.parse_race_messages(html, extractor="soup")
+
+    assert lap_analysis.parse_race_messages(html, extractor="lxml") == expected
+    assert len(expected) == 8
+    assert {"time": "2024-03-02T15:40:00+00:00", "event": "red_flag", "comment": "Red & yellow\nflags"} in [
+        m.to_dict() for m in expected
+    ]
+
+
+@pytest.mark.parametrize("prune", [False, True])
+def test_harvesting_matches_full_page_parse(no_delays, monkeypatch, autosport_server, loopback_driver_factory, prune):
+    link = f"{autosport_server}/race_bahrain.html"
+    monkeypatch.setattr(lap_analysis, "HARVEST_MESSAGES", False)
+    expected = lap_analysis.scrape_race_content(loopback_driver_factory(), link)
+
+    driver = loopback_driver_factory()
+    title, messages = lap_analysis.harvest_race_messages(driver, link, prune=prune)
+
+    assert (title, {"country": "Bahrain", "race": messages}) == expected
+    # One harvest for the initial page plus one per expansion
+    assert driver.harvest_calls == 3
+    if prune:
+        assert len(MESSAGE_RE.findall(driver.page_source)) == 1
+
+
+def test_harvesting_stops_at_seen_messages(no_delays, autosport_server, loopback_driver_factory):
+    driver = loopback_driver_factory()
+    since = datetime(2024, 3, 2, 16, 0, tzinfo=timezone.utc)
+
+    _, messages = lap_analysis.harvest_race_messages(driver, f"{autosport_server}/race_bahrain.html", since=since)
+
+    assert driver.clicks == 0
+    assert [m["event"] for m in messages] == ["non_keyword_message", "penalty", "checkered_flag"]
+
+
+def test_harvest_new_messages_deduplicates(no_delays, autosport_server, loopback_driver_factory):
+    driver = loopback_driver_factory()
+    driver.get(f"{autosport_server}/race_saudi.html")
+
+    messages = lap_analysis.harvest_new_messages(driver, {"mslt-msg-2002"})
+
+    assert [m["event"] for m in messages] == ["crash"]
+    assert lap_analysis.harvest_new_messages(driver, set()) == []
+
+
+def test_readiness_is_recorded_per_page_kind(no_delays, autosport_server, loopback_driver_factory):
+    lap_analysis.scrape_race_content(loopback_driver_factory(), f"{autosport_server}/race_bahrain.html")
+
+    stats = lap_analysis.readiness_stats
+    assert len(stats.samples["race_page"]) == 1
+    assert len(stats.samples["load_more"]) == 2
+    assert sum(stats.histogram("load_more").values()) == 2
+    assert stats.timeouts == {}
+
+
+def test_load_more_that_never_loads_times_out(no_delays, monkeypatch, autosport_server, loopback_driver_factory):
+    from .conftest import LoopbackButton
+    monkeypatch.setattr(LoopbackButton, "click", lambda self: None)
+    monkeypatch.setattr(lap_analysis, "load_more_timeout", lap_analysis.AdaptiveTimeout(0.2, 0.1, 1))
+
+    title, race = lap_analysis.scrape_race_content(loopback_driver_factory(), f"{autosport_server}/race_bahrain.html")
+
+    # A truncated race is a failed scrape, not a result that would be marked complete
+    assert (title, race) == (None, None)
+    # The adaptive wait, then one more at the maximum timeout
+    assert lap_analysis.readiness_stats.timeouts == {"load_more": 2}
+
+
+def test_load_more_click_errors_fail_the_scrape(no_delays, monkeypatch, autosport_server, loopback_driver_factory):
+    from selenium.common.exceptions import ElementClickInterceptedException
+    from .conftest import LoopbackButton
+
+    def intercepted(self):
+        raise ElementClickInterceptedException("cookie banner would receive the click")
+    monkeypatch.setattr(LoopbackButton, "click", intercepted)
+
+    # Not mistaken for the end of the commentary
+    assert lap_analysis.scrape_race_content(loopback_driver_factory(), f"{autosport_server}/race_bahrain.html") == (
+        None, None)
+
+
+def test_slow_load_more_is_waited_for_up_to_the_maximum(no_delays, monkeypatch, autosport_server,
+                                                        loopback_driver_factory):
+    from .conftest import LoopbackButton
+    click = LoopbackButton.click
+    monkeypatch.setattr(LoopbackButton, "click", lambda self: threading.Timer(0.4, click, (self,)).start())
+    monkeypatch.setattr(lap_analysis, "load_more_timeout", lap_analysis.AdaptiveTimeout(0.2, 0.1, 2))
+
+    title, race = lap_analysis.scrape_race_content(loopback_driver_factory(), f"{autosport_server}/race_bahrain.html")
+
+    assert len(race["race"]) > 3
+    assert lap_analysis.readiness_stats.timeouts["load_more"] >= 1
+
+
+def test_adaptive_timeout_follows_observed_waits():
+    timeout = lap_analysis.AdaptiveTimeout(initial=5, minimum=1, maximum=30, factor=3.0, alpha=0.5)
+    assert timeout.timeout == 5
+
+    timeout.observe(0.1)
+    assert timeout.timeout == 1
+    timeout.observe(2.1)
+    assert timeout.average == pytest.approx(1.1)
+    assert timeout.timeout == pytest.approx(3.3)
+    for _ in range(10):
+        timeout.observe(60)
+    assert timeout.timeout == 30
+
+
+def test_race_message_parses_timestamps_once(monkeypatch):
+    message = lap_analysis.RaceMessage.from_dict(
+        {"time": "2024-03-02T17:03:00+02:00", "event": "lights_out", "comment": "Go!"}
+    )
+    assert message.time == "2024-03-02T15:03:00+00:00"
+    assert message.to_dict() == {"time": "2024-03-02T15:03:00+00:00", "event": "lights_out", "comment": "Go!"}
+    assert (message["event"], message["comment"]) == ("lights_out", "Go!")
+
+    # Serialized messages carry the epoch timestamp, so loading them never parses
+    monkeypatch.setattr(lap_analysis, "parse_timestamp", None)
+    assert lap_analysis.decode_messages(lap_analysis.encode_messages([message])) == [message]
+    assert lap_analysis.RaceMessage.from_dict(message.to_record()).event is message.event
+
+
+def test_race_shards_and_legacy_compatibility(tmp_path):
+    store = lap_analysis.LocalStore(str(tmp_path))
+    message = lap_analysis.RaceMessage.from_dict(
+        {"time": "2023-07-09T14:00:00+00:00", "event": "lights_out", "comment": "Go!"}
+    )
+    race_data = {
+        "British GP live: Race": {"country": "British", "race": [message]},
+        "Sakhir GP live: Race": {"country": "Unknown", "race": [message]},
+        "British GP live: Race day": {"country": "British", "race": [message]},
+    }
+    index = {"races": {}}
+
+    lap_analysis.write_race_shards(store, race_data, list(race_data), index)
+
+    assert sorted(index["races"]) == [
+        "races/2023/british-gp-live-race-day.json",
+        "races/2023/british.json",
+        "races/2023/sakhir-gp-live-race.json",
+    ]
+    entry = index["races"]["races/2023/british.json"]
+    with open(tmp_path / "races" / "2023" / "british.json", "rb") as f:
+        stored = f.read()
+    assert entry["bytes"] == len(stored)
+    assert entry["sha256"] == hashlib.sha256(stored).hexdigest()
+    assert (entry["season"], entry["messages"]) == (2023, 1)
+    body = store.read("races/2023/british.json")
+    assert stored != body
+    assert b"\n" not in body and b", " not in body
+    assert lap_analysis.read_race_shard(store, "races/2023/british.json") == ("British GP live: Race", race_data["British GP live: Race"])
+
+    # Re-writing a known race keeps its key
+    assert lap_analysis.assign_shard_key(index, "British GP live: Race", race_data["British GP live: Race"]) == "races/2023/british.json"
+
+    assert json.loads(body)["race"] == [
+        {"time": "2023-07-09T14:00:00+00:00", "ts": 1688911200000000, "event": "lights_out", "comment": "Go!"}
+    ]
+
+    assert lap_analysis.write_legacy_race_data(store) == race_data
+    assert json.loads(store.read(lap_analysis.RACE_DATA_KEY))["British GP live: Race"] == {
+        "country": "British", "race": [{"time": "2023-07-09T14:00:00+00:00", "event": "lights_out", "comment": "Go!"}]
+    }
+
+
+def test_commentary_parquet_export(tmp_path, monkeypatch):
+    store = lap_analysis.LocalStore(str(tmp_path))
+    race_data = {
+        "Bahrain GP live: Race": {"country": "Bahrain", "race": lap_analysis.decode_messages([
+            {"time": "2024-03-02T15:03:00+00:00", "event": "lights_out", "comment": "Go!"},
+            {"time": "2024-03-02T15:30:55+00:00", "event": "safety_car", "comment": "Safety car."},
+        ])},
+        "British GP live: Race": {"country": "British", "race": lap_analysis.decode_messages([
+            {"time": "2023-07-09T14:12:00+00:00", "event": "safety_car", "comment": "SC again."},
+        ])},
+    }
+    index = {"races": {}}
+    lap_analysis.write_race_shards(store, race_data, list(race_data), index)
+
+    lap_analysis.write_commentary_parquet(store, index)
+
+    path = tmp_path / "races" / "commentary"
+    assert sorted(os.listdir(path)) == ["2023.parquet", "2024.parquet"]
+    metadata = pq.ParquetFile(path / "2024.parquet").metadata
+    assert (metadata.num_rows, metadata.num_row_groups) == (2, 1)
+
+    table = lap_analysis.read_commentary(str(path))
+    assert table.schema == lap_analysis.COMMENTARY_SCHEMA
+    assert table.column("season").to_pylist() == [2023, 2024, 2024]
+    assert table.column("time")[0].as_py() == datetime(2023, 7, 9, 14, 12, tzinfo=timezone.utc)
+
+    # Rebuilding one season reads and rewrites only that season's races
+    read = []
+    read_race_shard = lap_analysis.read_race_shard
+    monkeypatch.setattr(lap_analysis, "read_race_shard", lambda store, key: read.append(key) or read_race_shard(store, key))
+    rebuilt = lap_analysis.write_commentary_parquet(store, index, {2023})
+    assert read == ["races/2023/british.json"] and rebuilt.num_rows == 1
+    assert pq.ParquetFile(path / "2024.parquet").metadata.num_rows == 2
+
+    safety_cars = lap_analysis.read_commentary(
+        str(path), columns=["season", "race"], filters=[("event", "=", "safety_car")]
+    )
+    assert safety_cars.column_names == ["season", "race"]
+    assert safety_cars.to_pylist() == [
+        {"season": 2023, "race": "British GP live: Race"},
+        {"season": 2024, "race": "Bahrain GP live: Race"},
+    ]
+
+
+def test_resume_requires_incremental_mode(monkeypatch):
+    monkeypatch.setattr(lap_analysis, "INCREMENTAL", False)
+    with pytest.raises(SystemExit):
+        lap_analysis.parse_args(["--resume"])
+    with pytest.raises(SystemExit):
+        lap_analysis.parse_args(["--checkpoint-dir", "/tmp/run"])
+    assert lap_analysis.parse_args([]).checkpoint_dir == lap_analysis.CHECKPOINT_DIR
+
+    monkeypatch.setattr(lap_analysis, "INCREMENTAL", True)
+    assert lap_analysis.parse_args(["--resume"]).resume
+
+
+def test_resume_after_crash_uses_checkpoint(no_delays, monkeypatch, tmp_path, autosport_server):
+    monkeypatch.setattr(lap_analysis, "FETCH_BACKEND", "http")
+    store = lap_analysis.LocalStore(str(tmp_path / "bucket"))
+    checkpoint_dir = str(tmp_path / "checkpoint")
+    real_scrape = lap_analysis.scrape_race_content
+    scraped = []
+
+    def crash_on_second_race(driver, link, since=None):
+        if len(scraped) == 1:
+            raise RuntimeError("chrome crashed")
+        scraped.append(link)
+        return real_scrape(driver, link, since=since)
+
+    monkeypatch.setattr(lap_analysis, "scrape_race_content", crash_on_second_race)
+    with pytest.raises(RuntimeError):
+        lap_analysis.run_incremental(store, base_url=autosport_server, checkpoint_dir=checkpoint_dir)
+
+    assert store.read(lap_analysis.MANIFEST_KEY) is None
+    checkpoint = lap_analysis.ScrapeCheckpoint(checkpoint_dir)
+    assert list(checkpoint.completed()) == scraped
+
+    def tracking_scrape(driver, link, since=None):
+        scraped.append(link)
+        return real_scrape(driver, link, since=since)
+
+    monkeypatch.setattr(lap_analysis, "scrape_race_content", tracking_scrape)
+    race_data, manifest = lap_analysis.run_incremental(
+        store, base_url=autosport_server, resume=True, checkpoint_dir=checkpoint_dir
+    )
+
+    # Every race was scraped exactly once across both runs
+    assert sorted(scraped) == sorted(manifest)
+    assert len(manifest) == 4
+    assert len(json.loads(store.read(lap_analysis.RACE_INDEX_KEY))["races"]) == 4
+    assert checkpoint.links() is None
+
+
+def test_failed_links_are_retried_in_later_runs(no_delays, monkeypatch, tmp_path, autosport_server,
+                                                loopback_driver_factory):
+    monkeypatch.setattr(lap_analysis, "FETCH_BACKEND", "http")
+    monkeypatch.setattr(lap_analysis, "RETRY_PASSES", 0)
+    store = lap_analysis.LocalStore(str(tmp_path / "bucket"))
+    saudi = f"{autosport_server}/race_saudi.html"
+    real_scrape = lap_analysis.scrape_race_content
+    outage = {"active": True}
+
+    def flaky_scrape(driver, link, since=None):
+        if link == saudi and outage["active"]:
+            return None, None
+        return real_scrape(driver, link, since=since)
+
+    monkeypatch.setattr(lap_analysis, "scrape_race_content", flaky_scrape)
+    monkeypatch.setattr(lap_analysis, "create_webdriver", loopback_driver_factory)
+    lap_analysis.run_incremental(store, base_url=autosport_server)
+
+    queue = json.loads(store.read(lap_analysis.RETRY_QUEUE_KEY))
+    assert list(queue) == [saudi]
+    assert queue[saudi]["attempts"] == 1
+
+    # Later run: the link is no longer listed but is still due for a retry, and now succeeds
+    monkeypatch.setattr(lap_analysis, "get_race_links", lambda client, base_url, known=None, pool=None: [])
+    monkeypatch.setattr(lap_analysis, "RETRY_BASE_DELAY", 0)
+    store.write(lap_analysis.RETRY_QUEUE_KEY, json.dumps(
+        {saudi: dict(queue[saudi], next_attempt="2000-01-01T00:00:00+00:00")}
+    ).encode("utf-8"))
+    outage["active"] = False
+    _, manifest = lap_analysis.run_incremental(store, base_url=autosport_server)
+
+    assert saudi in manifest
+    assert json.loads(store.read(lap_analysis.RETRY_QUEUE_KEY)) == {}
+
+
+def test_retry_queue_backoff_and_counters():
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    retry_queue = lap_analysis.RetryQueue(base_delay=10, max_attempts=3)
+
+    retry_queue.record_failure("a", now)
+    retry_queue.record_failure("b", now)
+    assert retry_queue.due(now) == []
+    assert retry_queue.next_due() == now + timedelta(seconds=10)
+
+    later = now + timedelta(seconds=10)
+    assert retry_queue.due(later) == ["a", "b"]
+    retry_queue.record_attempt("a")
+    retry_queue.record_failure("a", later)
+    assert retry_queue.entries["a"]["next_attempt"] == (later + timedelta(seconds=20)).isoformat()
+    retry_queue.record_attempt("b")
+    retry_queue.record_success("b")
+
+    retry_queue.record_failure("a", later)
+    assert retry_queue.entries["a"]["permanent"] is True
+    assert retry_queue.due(later + timedelta(days=1)) == []
+    assert retry_queue.stats == {"retried": 2, "recovered": 1, "permanently_failed": 1}
@@ -0,0 +1,36 @@
+import numpy as np
+
+from streamlit_app import lap_charts
+
+
+def race_laps():
+    times = np.array([[100000, 110000, 96000, 94000, 93000],
+                      [101000, 95500, 95000, 95000, 0]], dtype=np.int32)
+    data = np.zeros((3,) + times.shape, dtype=np.int32)
+    data[lap_charts.TIME] = times
+    data[lap_charts.PIT, 0, 1] = 1
+    return lap_charts.RaceArrays(["max_verstappen", "perez"], data)
+
+
+def test_gaps_and_intervals():
+    race = race_laps()
+
+    gaps = lap_charts.gaps_to_leader(race)
+    np.testing.assert_array_equal(gaps[0, :4], [0, 13500, 14500, 13500])
+    np.testing.assert_array_equal(gaps[1, :4], [1000, 0, 0, 0])
+    # Pérez retired on the last lap, so Verstappen leads it
+    assert np.isnan(gaps[1, 4]) and gaps[0, 4] == 0
+    np.testing.assert_array_equal(lap_charts.interval(race, "perez", "max_verstappen")[:4],
+                                  [1000, -13500, -14500, -13500])
+
+
+def test_stint_pace_skips_opening_in_and_out_laps():
+    race = race_laps()
+
+    assert lap_charts.stint_pace(race, "max_verstappen") == [
+        {"stint": 1, "start_lap": 1, "end_lap": 2, "clean_laps": 0, "mean_ms": None, "best_ms": None},
+        {"stint": 2, "start_lap": 3, "end_lap": 5, "clean_laps": 2, "mean_ms": 93500.0, "best_ms": 93000},
+    ]
+    assert lap_charts.stint_pace(race, "perez") == [
+        {"stint": 1, "start_lap": 1, "end_lap": 4, "clean_laps": 3, "mean_ms": 95166.66666666667, "best_ms": 95000},
+    ]
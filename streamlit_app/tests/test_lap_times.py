@@ -0,0 +1,46 @@
+import numpy as np
+
+import artifact_store
+import f1_history_jolpica
+import lap_times
+
+
+def test_parse_lap_time():
+    assert lap_times.parse_lap_time("1:37.284") == 97284
+    assert lap_times.parse_lap_time("58.1") == 58100
+    assert lap_times.parse_lap_time("1:02:03.500") == 3723500
+    assert lap_times.parse_lap_time("") == lap_times.parse_lap_time("DNF") == 0
+
+
+def test_ingest_lap_times_builds_memory_mapped_arrays(jolpica_server, monkeypatch, tmp_path):
+    # Two timings per page, so laps are split across pages
+    monkeypatch.setattr(f1_history_jolpica, "JOLPICA_PAGE_LIMIT", 2)
+    store = artifact_store.LocalStore(str(tmp_path))
+
+    # Round 3 has not been run yet
+    assert f1_history_jolpica.ingest_lap_times(2023, store=store) == ["1", "2"]
+    assert f1_history_jolpica.ingest_lap_times(2023, store=store) == []
+    assert f1_history_jolpica.ingest_lap_times(2023, rounds=["2"], store=store) == ["2"]
+
+    entry = lap_times.load_lap_index(store)["races"]["laps/2023/01.npy"]
+    assert entry["drivers"] == ["max_verstappen", "perez"] and entry["laps"] == 4
+    race = lap_times.load_race_laps(store, "laps/2023/01.npy", entry["drivers"])
+    assert isinstance(race.data, np.memmap) and race.data.dtype == np.int32
+    assert race.times.tolist() == [[100000, 110000, 96000, 94000], [101000, 95500, 95000, 95000]]
+    assert race.pits.tolist() == [[0, 1, 0, 0], [0, 0, 0, 0]]
+    assert race.positions[race.row("max_verstappen")].tolist() == [1, 2, 2, 2]
+
+
+
+def test_ingest_lap_times_reuses_season_pit_stops(jolpica_server, tmp_path):
+    season_data = f1_history_jolpica.process_season_data(2023)
+    assert season_data["race_details"][0]["pitStops"] == [{"driverId": "max_verstappen", "stop": "1", "lap": "2"}]
+    fetched = len(jolpica_server.requests)
+
+    store = artifact_store.LocalStore(str(tmp_path))
+    assert f1_history_jolpica.ingest_lap_times(2023, store=store, season_data=season_data) == ["1", "2"]
+
+    # Only the laps are requested; the schedule and pit stops come from the season data
+    assert sorted(jolpica_server.requests[fetched:]) == [f"/ergast/f1/2023/{r}/laps" for r in "123"]
+    entry = lap_times.load_lap_index(store)["races"]["laps/2023/01.npy"]
+    assert lap_times.load_race_laps(store, "laps/2023/01.npy", entry["drivers"]).pits.tolist() == [[0, 1, 0, 0], [0, 0, 0, 0]]
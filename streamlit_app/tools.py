@@ -10,7 +10,7 @@ from openai import OpenAIError, NotFoundError
 import streamlit as st
 from state import State,QueryOutput
 from langchain import hub
-from db import get_connection
+from db import get_connection, get_history_connection
 import time
 import os
 import logging
@@ -36,13 +36,18 @@ logging.basicConfig(level=logging.DEBUG, filename="research_agent_debug.log")
 
 
 
-def write_query(state: State):
+HISTORY_TABLES = ["seasons", "races", "drivers", "constructors", "season_drivers", "season_constructors",
+                  "results", "qualifying", "pit_stops", "driver_standings", "constructor_standings"]
+
+
+def write_query(state: State, database=None, table_names=("validation_table",)):
     """Generate SQL query to fetch information."""
+    database = database or db
     prompt = query_prompt_template.invoke(
         {
-            "dialect": db.dialect,
+            "dialect": database.dialect,
             "top_k": 5,
-            "table_info": db.get_table_info(table_names=["validation_table"]),
+            "table_info": database.get_table_info(table_names=list(table_names)),
             "input": state["question"],
         }
     )
@@ -50,9 +55,9 @@ def write_query(state: State):
     result = structured_llm.invoke(prompt)
     return {"query": result["query"]}
 
-def execute_query(state: State):
+def execute_query(state: State, database=None):
     """Execute SQL query."""
-    execute_query_tool = QuerySQLDataBaseTool(db=db)
+    execute_query_tool = QuerySQLDataBaseTool(db=database or db)
     return {"result": execute_query_tool.invoke(state["query"])}
 
 @tool("racepass_info")
@@ -65,6 +70,16 @@ def racepass_info(question: str):
     res = execute_query({"query": sql_qry})
         
     return res["result"]
+
+
+@tool("f1_history_sql")
+def f1_history_sql(question: str):
+    """Answers questions about historical F1 races, results, qualifying, pit stops and
+    championship standings from 2013 onwards using text2SQL over the F1 history store."""
+    history_db = get_history_connection()
+    sql_qry = write_query({"question": question}, database=history_db, table_names=HISTORY_TABLES)
+    res = execute_query({"query": sql_qry}, database=history_db)
+    return res["result"]
     
     
 
@@ -283,6 +298,7 @@ llm = ChatOpenAI(
 tools=[
     rag_search,
     racepass_info,
+    f1_history_sql,
     final_answer
 ]
 
@@ -313,6 +329,7 @@ def run_oracle(state: list):
 tool_str_to_func = {
     "rag_search": rag_search,
     "racepass_info": racepass_info,
+    "f1_history_sql": f1_history_sql,
     "final_answer": final_answer
 }
     
@@ -0,0 +1,282 @@
+import os
+import io
+import json
+import zlib
+import base64
+import hashlib
+import logging
+import threading
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
+AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
+AWS_REGION = os.getenv("AWS_REGION")
+
+# One S3 client per process, with a connection pool sized for parallel uploads
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "16"))
+
+# JSON artifacts are streamed through a compressor ("gzip", "zstd" or "identity") and
+# uploaded in multipart chunks once they grow past one part
+ARTIFACT_ENCODING = os.getenv("ARTIFACT_ENCODING", "gzip")
+MULTIPART_PART_SIZE = int(os.getenv("ARTIFACT_MULTIPART_PART_SIZE", str(8 * 1024 * 1024)))
+JSON_CHUNK_SIZE = 64 * 1024
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    The S3 client shared by everything in this process. Clients are not fork-safe,
+    so a forked worker gets its own.
+    """
+    pid = os.getpid()
+    with _clients_lock:
+        if pid not in _clients:
+            _clients[pid] = boto3.client(
+                's3',
+                aws_access_key_id=AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+                region_name=AWS_REGION,
+                config=Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS, retries={"mode": "adaptive"})
+            )
+        return _clients[pid]
+
+
+class Compressor:
+    """
+    Incremental compressor for one Content-Encoding.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        elif encoding == "zstd":
+            if zstandard is None:
+                raise ValueError("zstd encoding requires the zstandard package")
+            self._compressor = zstandard.ZstdCompressor(level=6).compressobj()
+        elif encoding == "identity":
+            self._compressor = None
+        else:
+            raise ValueError(f"Unsupported content encoding: {encoding}")
+
+    def compress(self, data):
+        return self._compressor.compress(data) if self._compressor else data
+
+    def flush(self):
+        return self._compressor.flush() if self._compressor else b""
+
+
+def decompress(body):
+    """
+    Decode a gzip or zstd body, recognised by its magic bytes; anything else is returned as is.
+    """
+    if body[:2] == GZIP_MAGIC:
+        return zlib.decompress(body, 47)
+    if body[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError("zstd body requires the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body)).read()
+    return body
+
+
+def iter_json_chunks(obj, chunk_size=JSON_CHUNK_SIZE):
+    """
+    Serialize `obj` as compact UTF-8 JSON in chunks of about `chunk_size` bytes,
+    without building the whole document in memory.
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    buffer = []
+    size = 0
+    for fragment in encoder.iterencode(obj):
+        data = fragment.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def write_json(store, key, obj, encoding=None):
+    """
+    Stream `obj` into the store as compact JSON, compressed with `encoding`
+    (ARTIFACT_ENCODING by default). Returns the stored size and sha256.
+    """
+    compressor = Compressor(encoding or ARTIFACT_ENCODING)
+
+    def compressed_chunks():
+        for chunk in iter_json_chunks(obj):
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    return store.write_stream(key, compressed_chunks(), content_type="application/json",
+                              content_encoding=compressor.encoding)
+
+
+def sha256_b64(data):
+    return base64.b64encode(hashlib.sha256(data).digest()).decode("ascii")
+
+
+class S3Store:
+    """
+    Read and write scraper artifacts as objects in an S3 bucket.
+    """
+
+    def __init__(self, bucket_name, client=None, part_size=None):
+        self.bucket_name = bucket_name
+        self.client = client or get_s3_client()
+        self.part_size = part_size or MULTIPART_PART_SIZE
+
+    def read(self, key):
+        """
+        Return the object body as bytes, decompressed if it was stored with a
+        Content-Encoding, or None if the key does not exist.
+        """
+        try:
+            response = self.client.get_object(Bucket=self.bucket_name, Key=key)
+            body = response['Body'].read()
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+        expected = response.get('Metadata', {}).get('sha256')
+        if expected and hashlib.sha256(body).hexdigest() != expected:
+            raise ValueError(f"Checksum mismatch for s3://{self.bucket_name}/{key}")
+        return decompress(body)
+
+    def write(self, key, data, content_type="application/json"):
+        self.client.put_object(Bucket=self.bucket_name, Key=key, Body=data, ContentType=content_type)
+        logger.info(f"Wrote s3://{self.bucket_name}/{key} ({len(data)} bytes)")
+
+    def write_stream(self, key, chunks, content_type="application/json", content_encoding="identity"):
+        """
+        Upload an iterable of byte chunks. Bodies up to one part go up with a single
+        put_object whose sha256 is also kept in the object metadata and checked by read();
+        larger ones as a multipart upload, each part carrying its SHA-256 checksum for S3
+        to verify. Returns {"bytes", "sha256"} of the stored body.
+        """
+        digest = hashlib.sha256()
+        buffer = bytearray()
+        total = 0
+        upload_id = None
+        parts = []
+        extra = {"ContentType": content_type}
+        if content_encoding != "identity":
+            extra["ContentEncoding"] = content_encoding
+
+        def upload_part(data):
+            response = self.client.upload_part(
+                Bucket=self.bucket_name, Key=key, UploadId=upload_id, PartNumber=len(parts) + 1,
+                Body=data, ChecksumAlgorithm="SHA256", ChecksumSHA256=sha256_b64(data)
+            )
+            parts.append({"PartNumber": len(parts) + 1, "ETag": response["ETag"],
+                          "ChecksumSHA256": response.get("ChecksumSHA256", sha256_b64(data))})
+
+        try:
+            for chunk in chunks:
+                digest.update(chunk)
+                total += len(chunk)
+                buffer.extend(chunk)
+                while len(buffer) > self.part_size:
+                    if upload_id is None:
+                        upload_id = self.client.create_multipart_upload(
+                            Bucket=self.bucket_name, Key=key, ChecksumAlgorithm="SHA256", **extra
+                        )["UploadId"]
+                    upload_part(bytes(buffer[:self.part_size]))
+                    del buffer[:self.part_size]
+
+            sha256 = digest.hexdigest()
+            if upload_id is None:
+                self.client.put_object(
+                    Bucket=self.bucket_name, Key=key, Body=bytes(buffer), Metadata={"sha256": sha256},
+                    ChecksumAlgorithm="SHA256", ChecksumSHA256=sha256_b64(bytes(buffer)), **extra
+                )
+            else:
+                upload_part(bytes(buffer))
+                self.client.complete_multipart_upload(
+                    Bucket=self.bucket_name, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+                )
+        except Exception:
+            if upload_id is not None:
+                self.client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+            raise
+
+        logger.info(f"Wrote s3://{self.bucket_name}/{key} ({total} bytes, {content_encoding}, {len(parts) or 1} parts)")
+        return {"bytes": total, "sha256": sha256}
+
+    def __repr__(self):
+        return f"S3Store({self.bucket_name!r})"
+
+
+class LocalStore:
+    """
+    Local filesystem stand-in for S3Store; keys map to paths under a root directory.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def read(self, key):
+        """
+        Return the file contents as bytes, decompressed if they are gzip or zstd,
+        or None if the key does not exist.
+        """
+        try:
+            with open(self._path(key), "rb") as f:
+                return decompress(f.read())
+        except FileNotFoundError:
+            return None
+
+    def write(self, key, data, content_type="application/json"):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial object
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        logger.info(f"Wrote {path} ({len(data)} bytes)")
+
+    def write_stream(self, key, chunks, content_type="application/json", content_encoding="identity"):
+        """
+        Write an iterable of byte chunks; the encoding is recovered from the magic bytes on read.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        digest = hashlib.sha256()
+        total = 0
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                digest.update(chunk)
+                total += len(chunk)
+        os.replace(tmp_path, path)
+        logger.info(f"Wrote {path} ({total} bytes, {content_encoding})")
+        return {"bytes": total, "sha256": digest.hexdigest()}
+
+    def __repr__(self):
+        return f"LocalStore({self.root!r})"
@@ -1,10 +1,23 @@
+import argparse
 import os
+import re
 import json
-import boto3
+import hashlib
+import sqlite3
 import requests
+import multiprocessing
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+from datetime import date, datetime, timezone
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlencode
 from dotenv import load_dotenv
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional
+
+from artifact_store import LocalStore, S3Store, get_s3_client, write_json
+from lap_times import RaceLaps, load_lap_index, race_laps_key, write_lap_index
 
 load_dotenv()
 
@@ -15,36 +28,316 @@ S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
 
 BASE_URL = "https://api.jolpi.ca/ergast/f1"
 
-# Initialize S3 Client
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION,
-)
+# Jolpica's documented limits for unauthenticated clients: bursts of 4 requests per second
+# and 500 requests per hour sustained. Every fetch in the process draws from the same buckets.
+JOLPICA_BURST_RATE = float(os.getenv("JOLPICA_BURST_RATE", "4"))
+JOLPICA_HOURLY_LIMIT = float(os.getenv("JOLPICA_HOURLY_LIMIT", "500"))
+JOLPICA_WORKERS = int(os.getenv("JOLPICA_WORKERS", "4"))
+HTTP_POOL_SIZE = 16
+HTTP_TIMEOUT = 30
+MAX_RETRY_DELAY = 300
+
+# Responses are cached on disk. Seasons before the current year never change, so their
+# entries never expire; current-season (and season-less) entries are revalidated with
+# ETag/Last-Modified once older than JOLPICA_CACHE_TTL seconds.
+JOLPICA_CACHE = os.getenv("JOLPICA_CACHE", "1") == "1"
+JOLPICA_CACHE_PATH = os.getenv("JOLPICA_CACHE_PATH", os.path.join(".cache", "jolpica.sqlite"))
+JOLPICA_CACHE_TTL = int(os.getenv("JOLPICA_CACHE_TTL", "3600"))
+# Bulk mode: results and qualifying for a whole season come from the season-wide endpoints,
+# paginated with limit/offset (the API serves at most 100 rows per page) and split back
+# into rounds. Pit stops are only served per round, so a 22-round season takes 37 requests
+# instead of 71, about half (benchmarks/bench_jolpica_fetch.py counts them).
+JOLPICA_BULK = os.getenv("JOLPICA_BULK", "1") == "1"
+JOLPICA_PAGE_LIMIT = int(os.getenv("JOLPICA_PAGE_LIMIT", "100"))
+BULK_ROW_KEYS = {"results": "Results", "qualifying": "QualifyingResults"}
+# Incremental mode refreshes only the current season's new and provisional rounds. A round
+# stays provisional until its data is complete and its race is JOLPICA_PROVISIONAL_DAYS old,
+# since stewards' decisions can still change the classification.
+JOLPICA_INCREMENTAL = os.getenv("JOLPICA_INCREMENTAL", "0") == "1"
+JOLPICA_PROVISIONAL_DAYS = int(os.getenv("JOLPICA_PROVISIONAL_DAYS", "7"))
+# Lap times go to this local directory if set, else to the S3 bucket
+LAP_TIMES_DIR = os.getenv("LAP_TIMES_DIR")
+# Seasons backfilled at once, each in its own process; all of them share one rate limiter
+JOLPICA_PROCESSES = int(os.getenv("JOLPICA_PROCESSES", "4"))
+FIRST_SEASON = 2013
+
+SEASON_RE = re.compile(r"/f1/(\d{4})(?:/|$)")
+
+# Shared, pooled S3 client
+s3_client = get_s3_client()
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter over one or more token buckets; a request needs a token from
+    every bucket. A 429 pauses all callers until the server's Retry-After has passed.
+    """
+
+    def __init__(self, buckets: List[TokenBucket]):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.paused_until = 0.0
+        self.waited = 0.0
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                for bucket in self.buckets:
+                    bucket.refill(now)
+                wait = max([self.paused_until - now] + [bucket.wait_time() for bucket in self.buckets])
+                if wait <= 0:
+                    for bucket in self.buckets:
+                        bucket.tokens -= 1
+                    return
+                self.waited += wait
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class SharedTokenBucket(TokenBucket):
+    """TokenBucket whose tokens and refill time live in a shared array, at `offset`."""
+
+    def __init__(self, rate: float, capacity: float, state, offset: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.state = state
+        self.offset = offset
+
+    @property
+    def tokens(self) -> float:
+        return self.state[self.offset]
+
+    @tokens.setter
+    def tokens(self, value: float):
+        self.state[self.offset] = value
+
+    @property
+    def updated(self) -> float:
+        return self.state[self.offset + 1]
+
+    @updated.setter
+    def updated(self, value: float):
+        self.state[self.offset + 1] = value
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    RateLimiter whose state lives in a multiprocessing.Array, so every process handed the
+    same state draws from the same buckets and honours the same 429 pause. The monotonic
+    clock is system-wide, so refill times agree between processes.
+    """
+
+    def __init__(self, state, limits: List[tuple]):
+        self.state = state
+        self.limits = limits
+        self.lock = state.get_lock()
+        self.buckets = [SharedTokenBucket(rate, capacity, state, 2 + 2 * i) for i, (rate, capacity) in enumerate(limits)]
+
+    @classmethod
+    def create(cls, burst_rate: float = JOLPICA_BURST_RATE, hourly_limit: float = JOLPICA_HOURLY_LIMIT) -> "SharedRateLimiter":
+        limits = [(burst_rate, burst_rate), (hourly_limit / 3600, hourly_limit)]
+        now = time.monotonic()
+        state = multiprocessing.Array('d', [0.0, 0.0] + [value for _, capacity in limits for value in (capacity, now)])
+        return cls(state, limits)
+
+    @property
+    def paused_until(self) -> float:
+        return self.state[0]
+
+    @paused_until.setter
+    def paused_until(self, value: float):
+        self.state[0] = value
+
+    @property
+    def waited(self) -> float:
+        return self.state[1]
+
+    @waited.setter
+    def waited(self, value: float):
+        self.state[1] = value
+
+
+class ResponseCache:
+    """
+    Content-addressed response cache in SQLite: bodies are stored once per sha256, and each
+    URL points at its current body together with the validators needed to revalidate it.
+    Each process opens its own connection; SQLite handles locking between processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self._connections = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        pid = os.getpid()
+        if pid not in self._connections:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS bodies (sha256 TEXT PRIMARY KEY, body BLOB NOT NULL);
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL REFERENCES bodies (sha256),
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL
+                );
+            """)
+            self._connections[pid] = connection
+        return self._connections[pid]
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self._connection().execute(
+                "SELECT b.body, r.etag, r.last_modified, r.fetched_at FROM responses r "
+                "JOIN bodies b ON b.sha256 = r.sha256 WHERE r.url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"body": row[0], "etag": row[1], "last_modified": row[2], "fetched_at": row[3]}
+
+    def put(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str]):
+        sha256 = hashlib.sha256(body).hexdigest()
+        with self.lock, self._connection() as connection:
+            connection.execute("INSERT OR IGNORE INTO bodies (sha256, body) VALUES (?, ?)", (sha256, body))
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (url, sha256, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, sha256, etag, last_modified, time.time())
+            )
+
+    def touch(self, url: str):
+        """Mark a cached response as freshly revalidated."""
+        with self.lock, self._connection() as connection:
+            connection.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+
+def cache_ttl(url: str, fetched_at: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds a cached response stays fresh; None once it can never change, i.e. for a season
+    fetched after that season ended. A response fetched mid-season keeps the TTL even after
+    the year is over, so it is revalidated and picks up the final rounds.
+    """
+    match = SEASON_RE.search(url)
+    fetched_year = time.localtime(time.time() if fetched_at is None else fetched_at).tm_year
+    if match and int(match.group(1)) < fetched_year:
+        return None
+    return JOLPICA_CACHE_TTL
+
+
+def create_rate_limiter(burst_rate: float = JOLPICA_BURST_RATE, hourly_limit: float = JOLPICA_HOURLY_LIMIT) -> RateLimiter:
+    return RateLimiter([
+        TokenBucket(burst_rate, burst_rate),
+        TokenBucket(hourly_limit / 3600, hourly_limit),
+    ])
+
+
+def create_session(pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+    """Keep-alive session with a connection pool sized for the fetch workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+rate_limiter = create_rate_limiter()
+session = create_session()
+response_cache = ResponseCache(JOLPICA_CACHE_PATH) if JOLPICA_CACHE else None
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), if any."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_data(endpoint: str, max_retries: int = 10, initial_delay: int = 5,
+               params: Optional[Dict[str, Any]] = None) -> Dict[str, Any] | None:
+    """
+    Fetch data from the API through the shared session and rate limiter, honouring Retry-After.
+    Fresh cached responses are returned without touching the network; stale ones are
+    revalidated with a conditional request. `params` become the query string.
+    """
+    url = f"{endpoint}.json"
+    if params:
+        url = f"{url}?{urlencode(params)}"
+    cached = response_cache.get(url) if response_cache else None
+    headers = {}
+    if cached:
+        ttl = cache_ttl(url, cached["fetched_at"])
+        if ttl is None or time.time() - cached["fetched_at"] < ttl:
+            return json.loads(cached["body"])
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
 
-def fetch_data(endpoint: str, max_retries: int = 10, initial_delay: int = 5) -> Dict[str, Any] | None:
-    """Fetch data from the API with more robust exponential backoff."""
     delay = initial_delay
     for attempt in range(max_retries):
         try:
-            response = requests.get(f"{endpoint}.json")
+            rate_limiter.acquire()
+            response = session.get(url, headers=headers, timeout=HTTP_TIMEOUT)
             if response.status_code == 200:
-                return response.json()
+                data = response.json()
+                if response_cache:
+                    response_cache.put(url, response.content, response.headers.get("ETag"),
+                                       response.headers.get("Last-Modified"))
+                return data
+            elif response.status_code == 304 and cached:
+                response_cache.touch(url)
+                return json.loads(cached["body"])
             elif response.status_code == 429:
-                print(f"Rate limit hit for {endpoint}. Retrying in {delay} seconds...")
-                time.sleep(delay)
-                delay *= 2  # Exponential backoff
-                if delay > 300:  # Cap delay at 5 minutes
-                    delay = 300
+                wait = retry_after_seconds(response)
+                if wait is None:
+                    wait = delay
+                    delay = min(delay * 2, MAX_RETRY_DELAY)  # Exponential backoff
+                wait = min(wait, MAX_RETRY_DELAY)
+                print(f"Rate limit hit for {endpoint}. Retrying in {wait:.1f} seconds...")
+                # Back off every worker, not just this one
+                rate_limiter.pause(wait)
             else:
                 print(f"Error fetching {endpoint}: {response.status_code}")
                 return None
         except requests.exceptions.RequestException as e:
             print(f"Request failed: {e}")
             time.sleep(delay)
-            delay *= 2
+            delay = min(delay * 2, MAX_RETRY_DELAY)
     print(f"Exceeded maximum retries ({max_retries}) for {endpoint}")
+    if cached:
+        print(f"Using stale cached response for {endpoint}")
+        return json.loads(cached["body"])
     return None
 
 def safe_get_data(data: Dict[str, Any], *keys: str, default: Any = None) -> Any:
@@ -63,8 +356,87 @@ def safe_get_data(data: Dict[str, Any], *keys: str, default: Any = None) -> Any:
             return default
     return data if data != {} else default
 
-def process_season_data(season: int) -> Dict[str, Any]:
-    """Fetch and consolidate all data for a specific season with improved error handling."""
+ROUND_ENDPOINTS = ("results", "qualifying", "pitstops")
+
+def merge_race_pages(pages: List[Dict[str, Any]], row_key: str) -> List[Dict[str, Any]]:
+    """
+    Join the Races of consecutive pages, re-assembling races whose rows were split across pages.
+    """
+    races = []
+    for page in pages:
+        for race in safe_get_data(page, 'MRData', 'RaceTable', 'Races', default=[]):
+            if races and races[-1].get('round') == race.get('round'):
+                races[-1][row_key].extend(race.get(row_key, []))
+            else:
+                races.append(race)
+    return races
+
+def fetch_pages(endpoint: str, executor: ThreadPoolExecutor,
+                page_limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Every page of a paginated endpoint, the first fetched on its own to learn the total and
+    the rest in parallel. None if any page failed.
+    """
+    page_limit = page_limit or JOLPICA_PAGE_LIMIT
+    first = fetch_data(endpoint, params={"limit": page_limit, "offset": 0})
+    if not first:
+        return None
+    total = int(safe_get_data(first, 'MRData', 'total', default=0))
+    offsets = range(page_limit, total, page_limit)
+    pages = [first] + list(executor.map(
+        lambda offset: fetch_data(endpoint, params={"limit": page_limit, "offset": offset}), offsets
+    ))
+    return pages if all(pages) else None
+
+def fetch_season_rows(season: int, kind: str, executor: ThreadPoolExecutor,
+                      page_limit: Optional[int] = None) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """
+    Fetch a season-wide endpoint page by page and split it into per-round Races lists,
+    shaped like the per-round endpoint responses. None if any page failed.
+    """
+    pages = fetch_pages(f"{BASE_URL}/{season}/{kind}", executor, page_limit)
+    if pages is None:
+        return None
+
+    by_round = {}
+    for race in merge_race_pages(pages, BULK_ROW_KEYS[kind]):
+        by_round[race.get('round')] = [race]
+    return by_round
+
+def build_race_info(race: Dict[str, Any], results_data, qualifying_data, pit_stops) -> Dict[str, Any]:
+    """Combine one round's results and qualifying responses and its pit stops into its race_details entry."""
+    race_info = {
+        "round": race.get('round'),
+        "raceName": race.get('raceName'),
+        "date": race.get('date'),
+        "circuit": race.get('Circuit', {}),
+        "results": None,
+        "qualifying": None,
+        "pitStops": None
+    }
+
+    if results_data:
+        race_info['results'] = safe_get_data(results_data, 'MRData', 'RaceTable', 'Races', default=[])
+    if qualifying_data:
+        race_info['qualifying'] = safe_get_data(qualifying_data, 'MRData', 'RaceTable', 'Races', default=[])
+    if pit_stops is not None:
+        race_info['pitStops'] = pit_stops
+
+    return race_info
+
+def bulk_round_response(season_rows: Dict[str, List[Dict[str, Any]]], round_number: str) -> Dict[str, Any]:
+    """A per-round style response for one round of a season-wide endpoint."""
+    return {"MRData": {"RaceTable": {"Races": season_rows.get(round_number, [])}}}
+
+def process_season_data(season: int, workers: int = JOLPICA_WORKERS, bulk: bool = JOLPICA_BULK,
+                        skip_rounds: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Fetch and consolidate all data for a specific season with improved error handling.
+    The season endpoints and the results, qualifying and pit stops of every round are
+    fetched by `workers` threads; the shared rate limiter keeps the request rate within limits.
+    With `bulk`, results and qualifying come from paginated season-wide endpoints instead.
+    Rounds in `skip_rounds` are left out of race_details; the rest are then fetched per round.
+    """
     season_data = {
         "season": season,
         "races": [],
@@ -74,105 +446,355 @@ def process_season_data(season: int) -> Dict[str, Any]:
         "race_details": []
     }
 
-    # Fetch Races
-    races_endpoint = f"{BASE_URL}/{season}/races"
-    races_data = fetch_data(races_endpoint)
-    if races_data:
-        races = safe_get_data(races_data, 'MRData', 'RaceTable', 'Races', default=[])
-        season_data['races'] = races
-
-    # Fetch Drivers
-    drivers_endpoint = f"{BASE_URL}/{season}/drivers"
-    drivers_data = fetch_data(drivers_endpoint)
-    if drivers_data:
-        drivers = safe_get_data(drivers_data, 'MRData', 'DriverTable', 'Drivers', default=[])
-        season_data['drivers'] = drivers
-
-    # Fetch Constructors
-    constructors_endpoint = f"{BASE_URL}/{season}/constructors"
-    constructors_data = fetch_data(constructors_endpoint)
-    if constructors_data:
-        constructors = safe_get_data(constructors_data, 'MRData', 'ConstructorTable', 'Constructors', default=[])
-        season_data['constructors'] = constructors
-
-    # Process each race in the season
-    for race in races:
-        round_number = race.get('round')
-        race_info = {
-            "round": round_number,
-            "raceName": race.get('raceName'),
-            "date": race.get('date'),
-            "circuit": race.get('Circuit', {}),
-            "results": None,
-            "qualifying": None,
-            "pitStops": None
-        }
-
-        # Fetch Race Results
-        results_endpoint = f"{BASE_URL}/{season}/{round_number}/results"
-        results_data = fetch_data(results_endpoint)
-        if results_data:
-            race_info['results'] = safe_get_data(results_data, 'MRData', 'RaceTable', 'Races', default=[])
-
-        # Fetch Qualifying
-        qualifying_endpoint = f"{BASE_URL}/{season}/{round_number}/qualifying"
-        qualifying_data = fetch_data(qualifying_endpoint)
-        if qualifying_data:
-            race_info['qualifying'] = safe_get_data(qualifying_data, 'MRData', 'RaceTable', 'Races', default=[])
-
-        # Fetch Pit Stops
-        pitstops_endpoint = f"{BASE_URL}/{season}/{round_number}/pitstops"
-        pitstops_data = fetch_data(pitstops_endpoint)
-        if pitstops_data:
-            race_info['pitStops'] = safe_get_data(pitstops_data, 'MRData', 'RaceTable', 'Races', 'PitStops', default=[])
-
-        season_data['race_details'].append(race_info)
-
-    # Fetch Driver Standings
-    driver_standings_endpoint = f"{BASE_URL}/{season}/driverStandings"
-    driver_standings_data = fetch_data(driver_standings_endpoint)
-    if driver_standings_data:
-        season_data['standings']['drivers'] = safe_get_data(driver_standings_data, 'MRData', 'StandingsTable', 'StandingsLists', default=[])
-
-    # Fetch Constructor Standings
-    constructor_standings_endpoint = f"{BASE_URL}/{season}/constructorStandings"
-    constructor_standings_data = fetch_data(constructor_standings_endpoint)
-    if constructor_standings_data:
-        season_data['standings']['constructors'] = safe_get_data(constructor_standings_data, 'MRData', 'StandingsTable', 'StandingsLists', default=[])
+    endpoints = {
+        "races": f"{BASE_URL}/{season}/races",
+        "drivers": f"{BASE_URL}/{season}/drivers",
+        "constructors": f"{BASE_URL}/{season}/constructors",
+        "driverStandings": f"{BASE_URL}/{season}/driverStandings",
+        "constructorStandings": f"{BASE_URL}/{season}/constructorStandings",
+    }
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, \
+            ThreadPoolExecutor(max_workers=workers) as page_executor:
+        futures = {name: executor.submit(fetch_data, endpoint) for name, endpoint in endpoints.items()}
+
+        # Fetch Races
+        races_data = futures["races"].result()
+        races = []
+        if races_data:
+            races = safe_get_data(races_data, 'MRData', 'RaceTable', 'Races', default=[])
+            season_data['races'] = races
+        skip_rounds = set(skip_rounds)
+        if skip_rounds:
+            races = [race for race in races if race.get('round') not in skip_rounds]
+
+        # In bulk mode results and qualifying come from the season-wide endpoints; any that
+        # cannot be fetched in bulk fall back to per-round requests
+        season_rows = {}
+        if bulk and races and not skip_rounds:
+            bulk_futures = {kind: executor.submit(fetch_season_rows, season, kind, page_executor)
+                            for kind in BULK_ROW_KEYS}
+            season_rows = {kind: future.result() for kind, future in bulk_futures.items()
+                           if future.result() is not None}
+
+        def fetch_round(race, kind):
+            if kind in season_rows:
+                return executor.submit(bulk_round_response, season_rows[kind], race.get('round'))
+            if kind == "pitstops":
+                # Paged like the lap time ingestion, which reuses these pit stops
+                return executor.submit(fetch_race_pit_stops, season, race.get('round'), page_executor)
+            return executor.submit(fetch_data, f"{BASE_URL}/{season}/{race.get('round')}/{kind}")
+
+        # Fetch results, qualifying and pit stops of every round in parallel
+        round_futures = [(race, [fetch_round(race, kind) for kind in ROUND_ENDPOINTS]) for race in races]
+
+        # Fetch Drivers
+        drivers_data = futures["drivers"].result()
+        if drivers_data:
+            season_data['drivers'] = safe_get_data(drivers_data, 'MRData', 'DriverTable', 'Drivers', default=[])
+
+        # Fetch Constructors
+        constructors_data = futures["constructors"].result()
+        if constructors_data:
+            season_data['constructors'] = safe_get_data(constructors_data, 'MRData', 'ConstructorTable', 'Constructors', default=[])
+
+        # Process each race in the season, keeping round order
+        season_data['race_details'] = [
+            build_race_info(race, *(future.result() for future in futures_by_kind))
+            for race, futures_by_kind in round_futures
+        ]
+
+        # Fetch Driver Standings
+        driver_standings_data = futures["driverStandings"].result()
+        if driver_standings_data:
+            season_data['standings']['drivers'] = safe_get_data(driver_standings_data, 'MRData', 'StandingsTable', 'StandingsLists', default=[])
+
+        # Fetch Constructor Standings
+        constructor_standings_data = futures["constructorStandings"].result()
+        if constructor_standings_data:
+            season_data['standings']['constructors'] = safe_get_data(constructor_standings_data, 'MRData', 'StandingsTable', 'StandingsLists', default=[])
 
     return season_data
 
-def upload_to_s3(data: Dict[str, Any], key: str):
-    """Upload JSON data to S3 with error handling."""
+def upload_to_s3(data: Dict[str, Any], key: str) -> bool:
+    """Stream JSON data to S3 as compressed, compact JSON with error handling."""
     try:
-        s3_client.put_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=key,
-            Body=json.dumps(data, indent=2),
-            ContentType="application/json",
-        )
+        write_json(S3Store(S3_BUCKET_NAME, client=s3_client), key, data)
         print(f"Uploaded to S3: {key}")
+        return True
     except Exception as e:
         print(f"Error uploading {key} to S3: {e}")
+        return False
+
+def season_key(season: int) -> str:
+    return f"f1-data/{season}/{season}_season_data.json"
+
+def load_season(season: int) -> Optional[Dict[str, Any]]:
+    """The stored season file, or None if there is none yet."""
+    body = S3Store(S3_BUCKET_NAME, client=s3_client).read(season_key(season))
+    return json.loads(body) if body is not None else None
+
+def changed_rounds_key(season: int) -> str:
+    return f"f1-data/{season}/changed_rounds.json"
+
+def write_changed_rounds(season: int, rounds: List[str], store=None) -> Dict[str, Any]:
+    """
+    Record the rounds the last ingestion changed, so downstream steps (re-embedding, the
+    history store) can process only those. Returns the written record.
+    """
+    record = {"season": season, "rounds": list(rounds), "updated_at": datetime.now(timezone.utc).isoformat()}
+    write_json(store or S3Store(S3_BUCKET_NAME, client=s3_client), changed_rounds_key(season), record)
+    return record
+
+def is_provisional(race_info: Dict[str, Any], today: Optional[date] = None) -> bool:
+    """
+    Whether a race_details entry may still change: a fetch failed or came back empty,
+    or the race is too recent for its classification to be final.
+    """
+    if not race_info.get('results') or not race_info.get('qualifying') or race_info.get('pitStops') is None:
+        return True
+    try:
+        race_date = date.fromisoformat(race_info.get('date') or "")
+    except ValueError:
+        return True
+    today = today or date.today()
+    return (today - race_date).days < JOLPICA_PROVISIONAL_DAYS
 
-def main():
+def merge_race_info(stored: Optional[Dict[str, Any]], fetched: Dict[str, Any]) -> Dict[str, Any]:
+    """A refetched race_details entry, keeping stored parts whose fetch failed this time."""
+    if not stored:
+        return fetched
+    merged = dict(fetched)
+    for field in ("results", "qualifying", "pitStops"):
+        if merged[field] is None:
+            merged[field] = stored.get(field)
+    return merged
+
+def refresh_season(season: int, workers: int = JOLPICA_WORKERS) -> List[str]:
+    """
+    Bring the stored season file up to date, fetching the season endpoints and only the
+    rounds that are missing or still provisional. The file is rewritten only if something
+    changed. Returns the rounds whose race_details were added, changed or removed.
+    """
+    key = season_key(season)
+    stored = load_season(season)
+    if stored is None:
+        print(f"No stored data for season {season}, fetching it in full")
+        season_data = process_season_data(season, workers=workers)
+        upload_to_s3(season_data, key)
+        return [race['round'] for race in season_data['race_details']]
+
+    stored_rounds = {race.get('round'): race for race in stored.get('race_details', [])}
+    today = date.today()
+    final = [round_number for round_number, race in stored_rounds.items() if not is_provisional(race, today)]
+    fresh = process_season_data(season, workers=workers, skip_rounds=final)
+    if not fresh['races']:
+        print(f"Could not fetch the schedule for season {season}, keeping the stored data")
+        return []
+
+    # Season-wide lists that failed to fetch keep their stored values
+    merged = {name: value if value or name not in stored else stored[name] for name, value in fresh.items()}
+    merged['standings'] = {**stored.get('standings', {}), **fresh['standings']}
+    fetched = {race['round']: race for race in fresh['race_details']}
+    merged['race_details'] = [
+        merge_race_info(stored_rounds.get(race.get('round')), fetched[race.get('round')])
+        if race.get('round') in fetched else stored_rounds[race.get('round')]
+        for race in fresh['races']
+    ]
+
+    merged_rounds = {race['round']: race for race in merged['race_details']}
+    changed = [round_number for round_number, race in merged_rounds.items() if stored_rounds.get(round_number) != race]
+    # Rounds dropped from the schedule
+    changed += [round_number for round_number in stored_rounds if round_number not in merged_rounds]
+
+    if merged == stored:
+        print(f"Season {season} is up to date")
+        return []
+    upload_to_s3(merged, key)
+    print(f"Refreshed season {season}, changed rounds: {', '.join(changed) or 'none'}")
+    return changed
+
+def fetch_race_laps(season: int, round_number: str, executor: ThreadPoolExecutor) -> Optional[List[Dict[str, Any]]]:
+    """Every lap of a race with all its timings, re-joining laps split across pages. None on failure."""
+    pages = fetch_pages(f"{BASE_URL}/{season}/{round_number}/laps", executor)
+    if pages is None:
+        return None
+    laps = []
+    for race in merge_race_pages(pages, 'Laps'):
+        for lap in race.get('Laps', []):
+            if laps and laps[-1].get('number') == lap.get('number'):
+                laps[-1]['Timings'].extend(lap.get('Timings', []))
+            else:
+                laps.append(lap)
+    return laps
+
+def fetch_race_pit_stops(season: int, round_number: str, executor: ThreadPoolExecutor) -> Optional[List[Dict[str, Any]]]:
+    """Every pit stop of a race. None on failure."""
+    pages = fetch_pages(f"{BASE_URL}/{season}/{round_number}/pitstops", executor)
+    if pages is None:
+        return None
+    return [stop for race in merge_race_pages(pages, 'PitStops') for stop in race.get('PitStops', [])]
+
+def get_lap_store():
+    if LAP_TIMES_DIR:
+        return LocalStore(LAP_TIMES_DIR)
+    return S3Store(S3_BUCKET_NAME, client=s3_client)
+
+def ingest_lap_times(season: int, rounds: Iterable[str] = (), store=None, workers: int = JOLPICA_WORKERS,
+                     season_data: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Fetch the lap times and pit stops of a season's races into the array-backed lap store.
+    Races already run but missing from the lap index are fetched, plus `rounds`, which are
+    fetched again. The schedule and pit stops in `season_data` (from process_season_data or
+    the stored season file) are reused; only rounds without pit stops there fetch them.
+    Returns the rounds that were stored.
+    """
+    store = store or get_lap_store()
+    if season_data is not None:
+        races = season_data.get('races', [])
+        known_pit_stops = {race.get('round'): race.get('pitStops') for race in season_data.get('race_details', [])}
+    else:
+        races_data = fetch_data(f"{BASE_URL}/{season}/races")
+        races = safe_get_data(races_data, 'MRData', 'RaceTable', 'Races', default=[]) if races_data else []
+        known_pit_stops = {}
+    index = load_lap_index(store)
+    rounds = set(rounds)
+    today = date.today().isoformat()
+    pending = [race for race in races if (race.get('date') or today) <= today and (
+        race.get('round') in rounds or race_laps_key(season, race.get('round')) not in index['races'])]
+
+    stored = []
+    with ThreadPoolExecutor(max_workers=workers) as executor, \
+            ThreadPoolExecutor(max_workers=workers) as page_executor:
+        # Season files written before pit stops were paged hold an empty list for every round,
+        # so empty lists are fetched again
+        futures = [
+            (race,
+             executor.submit(fetch_race_laps, season, race.get('round'), page_executor),
+             None if known_pit_stops.get(race.get('round'))
+             else executor.submit(fetch_race_pit_stops, season, race.get('round'), page_executor))
+            for race in pending
+        ]
+        for race, laps_future, pit_stops_future in futures:
+            laps = laps_future.result()
+            pit_stops = pit_stops_future.result() if pit_stops_future else known_pit_stops[race.get('round')]
+            if not laps:
+                print(f"No lap times for season {season} round {race.get('round')}")
+                continue
+            race_laps = RaceLaps.from_jolpica(laps, pit_stops)
+            key = race_laps_key(season, race.get('round'))
+            body = race_laps.encode()
+            store.write(key, body, content_type="application/octet-stream")
+            index['races'][key] = {
+                "season": season,
+                "round": race.get('round'),
+                "raceName": race.get('raceName'),
+                "date": race.get('date'),
+                "country": safe_get_data(race, 'Circuit', 'Location', 'country'),
+                "drivers": race_laps.drivers,
+                "laps": race_laps.lap_count,
+                "sha256": hashlib.sha256(body).hexdigest(),
+            }
+            stored.append(race.get('round'))
+
+    if stored:
+        write_lap_index(store, index)
+        print(f"Stored lap times for season {season}, rounds: {', '.join(stored)}")
+    return stored
+
+def parse_seasons(text: str) -> List[int]:
+    """Seasons from a range such as '2013-2024', a single '2021', or a comma-separated mix."""
+    seasons = []
+    for part in text.split(","):
+        first, _, last = part.strip().partition("-")
+        seasons.extend(range(int(first), int(last or first) + 1))
+    return sorted(set(seasons))
+
+def init_backfill_worker(limiter_state, limits: List[tuple], base_url: str):
+    """
+    Set up a backfill process: the shared rate limiter, plus its own HTTP session and S3
+    client, since neither may be shared with the parent across a fork.
+    """
+    global rate_limiter, session, s3_client, BASE_URL
+    rate_limiter = SharedRateLimiter(limiter_state, limits)
+    session = create_session()
+    s3_client = get_s3_client()
+    BASE_URL = base_url
+
+def backfill_season(season: int, laps: bool = False) -> Dict[str, Any]:
+    """Fetch and upload one season; returns its status for progress reporting."""
+    start = time.monotonic()
+    try:
+        season_data = process_season_data(season)
+        uploaded = upload_to_s3(season_data, season_key(season))
+        if uploaded:
+            write_changed_rounds(season, [race['round'] for race in season_data['race_details']])
+        if laps:
+            ingest_lap_times(season, season_data=season_data)
+        status = "ok" if uploaded else "upload failed"
+        return {"season": season, "status": status, "races": len(season_data['race_details']),
+                "seconds": time.monotonic() - start}
+    except Exception as e:
+        return {"season": season, "status": f"error: {e}", "races": 0, "seconds": time.monotonic() - start}
+
+def backfill(seasons: List[int], processes: int = JOLPICA_PROCESSES, laps: bool = False,
+             limiter: Optional[SharedRateLimiter] = None, mp_context=None) -> List[Dict[str, Any]]:
+    """
+    Fetch and upload several seasons, `processes` at a time. Each season is uploaded by its
+    worker as soon as it is done; every worker draws from one rate limiter, so the API quota
+    rather than the loop bounds throughput. Returns each season's status in completion order.
+    """
+    start = time.monotonic()
+    statuses = []
+
+    def report(status):
+        statuses.append(status)
+        print(f"[{len(statuses)}/{len(seasons)}] Season {status['season']}: {status['status']}, "
+              f"{status['races']} races in {status['seconds']:.1f}s")
+
+    if processes <= 1:
+        for season in seasons:
+            report(backfill_season(season, laps))
+    else:
+        limiter = limiter or SharedRateLimiter.create()
+        with ProcessPoolExecutor(max_workers=min(processes, len(seasons)), mp_context=mp_context,
+                                 initializer=init_backfill_worker,
+                                 initargs=(limiter.state, limiter.limits, BASE_URL)) as executor:
+            futures = [executor.submit(backfill_season, season, laps) for season in seasons]
+            for future in as_completed(futures):
+                report(future.result())
+
+    failed = [status['season'] for status in statuses if status['status'] != "ok"]
+    print(f"Backfilled {len(seasons) - len(failed)}/{len(seasons)} seasons in {time.monotonic() - start:.1f}s"
+          + (f"; failed: {', '.join(map(str, sorted(failed)))}" if failed else ""))
+    return statuses
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch F1 season data from the Jolpica API and upload it to S3.")
+    parser.add_argument("--seasons", type=parse_seasons,
+                        help=f"seasons to process, e.g. 2013-2024 or 2019,2021-2023 "
+                             f"(default: {FIRST_SEASON} to the current season, or just the current one with --incremental)")
+    parser.add_argument("--processes", type=int, default=JOLPICA_PROCESSES,
+                        help="seasons to backfill in parallel, each in its own process")
+    parser.add_argument("--incremental", action="store_true", default=JOLPICA_INCREMENTAL,
+                        help="only refresh the new and provisional rounds of each season, recording the "
+                             "changed rounds in f1-data/<season>/changed_rounds.json")
+    parser.add_argument("--laps", action="store_true",
+                        help="also ingest lap times and pit stops into the lap store")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function to fetch and upload data with improved error handling."""
+    args = parse_args(argv)
     current_year = time.localtime().tm_year
-    for season in range(2013, current_year + 1):
-        try:
-            print(f"Processing season: {season}")
-            consolidated_season_data = process_season_data(season)
-            
-            # Upload consolidated season data to S3
-            season_key = f"f1-data/{season}/{season}_season_data.json"
-            upload_to_s3(consolidated_season_data, season_key)
-            print(f"Uploaded consolidated data for season {season}")
-            
-            # Add a small delay between seasons to prevent overwhelming the API
-            time.sleep(2)
-        except Exception as e:
-            print(f"Error processing season {season}: {e}")
-            continue
+    if args.incremental:
+        for season in args.seasons or [current_year]:
+            changed = refresh_season(season)
+            write_changed_rounds(season, changed)
+            if args.laps:
+                ingest_lap_times(season, rounds=changed, season_data=load_season(season))
+        return
+    backfill(args.seasons or list(range(FIRST_SEASON, current_year + 1)), processes=args.processes, laps=args.laps)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
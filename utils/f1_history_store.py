@@ -0,0 +1,364 @@
+import os
+import json
+import argparse
+import hashlib
+import sqlite3
+import time
+from dotenv import load_dotenv
+from typing import Dict, Any, Iterable, List, Optional
+
+from artifact_store import LocalStore, S3Store, get_s3_client
+
+load_dotenv()
+
+S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
+
+# Normalized copy of the Jolpica season files: one SQLite database that the embedder and
+# the agent tools query instead of walking the nested season JSON.
+F1_STORE_PATH = os.getenv("F1_STORE_PATH", os.path.join(".cache", "f1_history.sqlite"))
+# Read season files from a local directory instead of the S3 bucket
+F1_SEASON_DIR = os.getenv("F1_SEASON_DIR")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seasons (
+    season INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS races (
+    season INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    race_name TEXT,
+    date TEXT,
+    circuit_id TEXT,
+    circuit_name TEXT,
+    locality TEXT,
+    country TEXT,
+    PRIMARY KEY (season, round)
+);
+CREATE TABLE IF NOT EXISTS drivers (
+    driver_id TEXT PRIMARY KEY,
+    code TEXT,
+    permanent_number TEXT,
+    given_name TEXT,
+    family_name TEXT,
+    date_of_birth TEXT,
+    nationality TEXT
+);
+CREATE TABLE IF NOT EXISTS constructors (
+    constructor_id TEXT PRIMARY KEY,
+    name TEXT,
+    nationality TEXT
+);
+CREATE TABLE IF NOT EXISTS season_drivers (
+    season INTEGER NOT NULL,
+    driver_id TEXT NOT NULL,
+    PRIMARY KEY (season, driver_id)
+);
+CREATE TABLE IF NOT EXISTS season_constructors (
+    season INTEGER NOT NULL,
+    constructor_id TEXT NOT NULL,
+    PRIMARY KEY (season, constructor_id)
+);
+CREATE TABLE IF NOT EXISTS results (
+    season INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    driver_id TEXT NOT NULL,
+    constructor_id TEXT,
+    number TEXT,
+    grid INTEGER,
+    position INTEGER,
+    position_text TEXT,
+    points REAL,
+    laps INTEGER,
+    status TEXT,
+    time_millis INTEGER,
+    fastest_lap_rank INTEGER,
+    fastest_lap_time TEXT,
+    PRIMARY KEY (season, round, driver_id)
+);
+CREATE TABLE IF NOT EXISTS qualifying (
+    season INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    driver_id TEXT NOT NULL,
+    constructor_id TEXT,
+    position INTEGER,
+    q1 TEXT,
+    q2 TEXT,
+    q3 TEXT,
+    PRIMARY KEY (season, round, driver_id)
+);
+CREATE TABLE IF NOT EXISTS pit_stops (
+    season INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    driver_id TEXT NOT NULL,
+    stop INTEGER NOT NULL,
+    lap INTEGER,
+    time TEXT,
+    duration TEXT,
+    PRIMARY KEY (season, round, driver_id, stop)
+);
+CREATE TABLE IF NOT EXISTS driver_standings (
+    season INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    driver_id TEXT NOT NULL,
+    constructor_id TEXT,
+    position INTEGER,
+    points REAL,
+    wins INTEGER,
+    PRIMARY KEY (season, round, driver_id)
+);
+CREATE TABLE IF NOT EXISTS constructor_standings (
+    season INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    constructor_id TEXT NOT NULL,
+    position INTEGER,
+    points REAL,
+    wins INTEGER,
+    PRIMARY KEY (season, round, constructor_id)
+);
+CREATE INDEX IF NOT EXISTS results_driver ON results (driver_id, season);
+CREATE INDEX IF NOT EXISTS results_constructor ON results (constructor_id, season);
+CREATE INDEX IF NOT EXISTS qualifying_driver ON qualifying (driver_id, season);
+CREATE INDEX IF NOT EXISTS qualifying_constructor ON qualifying (constructor_id, season);
+CREATE INDEX IF NOT EXISTS pit_stops_driver ON pit_stops (driver_id, season);
+CREATE INDEX IF NOT EXISTS driver_standings_driver ON driver_standings (driver_id, season);
+CREATE INDEX IF NOT EXISTS constructor_standings_constructor ON constructor_standings (constructor_id, season);
+CREATE INDEX IF NOT EXISTS season_drivers_driver ON season_drivers (driver_id);
+CREATE INDEX IF NOT EXISTS season_constructors_constructor ON season_constructors (constructor_id);
+CREATE INDEX IF NOT EXISTS drivers_family_name ON drivers (family_name);
+CREATE INDEX IF NOT EXISTS constructors_name ON constructors (name);
+"""
+
+# Tables holding one season's rows, cleared before the season is reloaded
+SEASON_TABLES = ("races", "season_drivers", "season_constructors", "results", "qualifying",
+                 "pit_stops", "driver_standings", "constructor_standings")
+
+
+def connect(path: str = F1_STORE_PATH, read_only: bool = False) -> sqlite3.Connection:
+    """Open the store, creating the schema unless `read_only`."""
+    if read_only:
+        connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def driver_row(driver: Dict[str, Any]) -> tuple:
+    return (driver.get('driverId'), driver.get('code'), driver.get('permanentNumber'), driver.get('givenName'),
+            driver.get('familyName'), driver.get('dateOfBirth'), driver.get('nationality'))
+
+
+def constructor_row(constructor: Dict[str, Any]) -> tuple:
+    return (constructor.get('constructorId'), constructor.get('name'), constructor.get('nationality'))
+
+
+def race_rows(races: Optional[List[Dict[str, Any]]], row_key: str) -> Iterable[Dict[str, Any]]:
+    """Rows of a race_details entry, which holds the per-round endpoint's Races list."""
+    for race in races or []:
+        if isinstance(race, dict):
+            yield from race.get(row_key, [])
+
+
+def load_season(connection: sqlite3.Connection, season_data: Dict[str, Any], sha256: str = ""):
+    """Replace one season's rows with the normalized contents of its season file."""
+    season = int(season_data['season'])
+    drivers, constructors = {}, {}
+    races, results, qualifying, pit_stops = [], [], [], []
+    driver_standings, constructor_standings = [], []
+
+    for driver in season_data.get('drivers') or []:
+        drivers[driver.get('driverId')] = driver_row(driver)
+    for constructor in season_data.get('constructors') or []:
+        constructors[constructor.get('constructorId')] = constructor_row(constructor)
+    season_drivers = [(season, driver_id) for driver_id in drivers]
+    season_constructors = [(season, constructor_id) for constructor_id in constructors]
+
+    for race in season_data.get('races') or []:
+        circuit = race.get('Circuit') or {}
+        location = circuit.get('Location') or {}
+        races.append((season, to_int(race.get('round')), race.get('raceName'), race.get('date'),
+                      circuit.get('circuitId'), circuit.get('circuitName'), location.get('locality'),
+                      location.get('country')))
+
+    for details in season_data.get('race_details') or []:
+        round_number = to_int(details.get('round'))
+        for row in race_rows(details.get('results'), 'Results'):
+            driver, constructor = row.get('Driver') or {}, row.get('Constructor') or {}
+            drivers.setdefault(driver.get('driverId'), driver_row(driver))
+            constructors.setdefault(constructor.get('constructorId'), constructor_row(constructor))
+            fastest_lap = row.get('FastestLap') or {}
+            results.append((season, round_number, driver.get('driverId'), constructor.get('constructorId'),
+                            row.get('number'), to_int(row.get('grid')), to_int(row.get('position')),
+                            row.get('positionText'), to_float(row.get('points')), to_int(row.get('laps')),
+                            row.get('status'), to_int((row.get('Time') or {}).get('millis')),
+                            to_int(fastest_lap.get('rank')), (fastest_lap.get('Time') or {}).get('time')))
+        for row in race_rows(details.get('qualifying'), 'QualifyingResults'):
+            driver, constructor = row.get('Driver') or {}, row.get('Constructor') or {}
+            drivers.setdefault(driver.get('driverId'), driver_row(driver))
+            constructors.setdefault(constructor.get('constructorId'), constructor_row(constructor))
+            qualifying.append((season, round_number, driver.get('driverId'), constructor.get('constructorId'),
+                               to_int(row.get('position')), row.get('Q1'), row.get('Q2'), row.get('Q3')))
+        # pitStops is either the per-round Races list or a flat list of stops
+        stops = details.get('pitStops') or []
+        if stops and 'PitStops' in stops[0]:
+            stops = list(race_rows(stops, 'PitStops'))
+        for row in stops:
+            pit_stops.append((season, round_number, row.get('driverId'), to_int(row.get('stop')),
+                              to_int(row.get('lap')), row.get('time'), row.get('duration')))
+
+    standings = season_data.get('standings') or {}
+    for standings_list in standings.get('drivers') or []:
+        round_number = to_int(standings_list.get('round'))
+        for row in standings_list.get('DriverStandings', []):
+            driver = row.get('Driver') or {}
+            team = (row.get('Constructors') or [{}])[-1]
+            drivers.setdefault(driver.get('driverId'), driver_row(driver))
+            driver_standings.append((season, round_number, driver.get('driverId'), team.get('constructorId'),
+                                     to_int(row.get('position')), to_float(row.get('points')), to_int(row.get('wins'))))
+    for standings_list in standings.get('constructors') or []:
+        round_number = to_int(standings_list.get('round'))
+        for row in standings_list.get('ConstructorStandings', []):
+            constructor = row.get('Constructor') or {}
+            constructors.setdefault(constructor.get('constructorId'), constructor_row(constructor))
+            constructor_standings.append((season, round_number, constructor.get('constructorId'),
+                                          to_int(row.get('position')), to_float(row.get('points')),
+                                          to_int(row.get('wins'))))
+
+    drivers.pop(None, None)
+    constructors.pop(None, None)
+    with connection:
+        for table in SEASON_TABLES:
+            connection.execute(f"DELETE FROM {table} WHERE season = ?", (season,))
+        # A driver's latest season file has the most recent details (number, code)
+        connection.executemany("INSERT OR REPLACE INTO drivers VALUES (?, ?, ?, ?, ?, ?, ?)", drivers.values())
+        connection.executemany("INSERT OR REPLACE INTO constructors VALUES (?, ?, ?)", constructors.values())
+        connection.executemany("INSERT INTO season_drivers VALUES (?, ?)", season_drivers)
+        connection.executemany("INSERT INTO season_constructors VALUES (?, ?)", season_constructors)
+        connection.executemany("INSERT OR REPLACE INTO races VALUES (?, ?, ?, ?, ?, ?, ?, ?)", races)
+        connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               results)
+        connection.executemany("INSERT OR REPLACE INTO qualifying VALUES (?, ?, ?, ?, ?, ?, ?, ?)", qualifying)
+        connection.executemany("INSERT OR REPLACE INTO pit_stops VALUES (?, ?, ?, ?, ?, ?, ?)", pit_stops)
+        connection.executemany("INSERT OR REPLACE INTO driver_standings VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               driver_standings)
+        connection.executemany("INSERT OR REPLACE INTO constructor_standings VALUES (?, ?, ?, ?, ?, ?)",
+                               constructor_standings)
+        connection.execute("INSERT OR REPLACE INTO seasons VALUES (?, ?)", (season, sha256))
+
+
+def get_season_store():
+    """Where the season files live: F1_SEASON_DIR if set, else the S3 bucket."""
+    if F1_SEASON_DIR:
+        return LocalStore(F1_SEASON_DIR)
+    return S3Store(S3_BUCKET_NAME, client=get_s3_client())
+
+
+def build_store(seasons: Iterable[int], path: str = F1_STORE_PATH, store=None) -> List[int]:
+    """
+    Load season files into the store at `path`, skipping seasons whose file has not
+    changed since it was last loaded. Returns the seasons that were (re)loaded.
+    """
+    store = store or get_season_store()
+    connection = connect(path)
+    loaded = []
+    try:
+        for season in seasons:
+            key = f"f1-data/{season}/{season}_season_data.json"
+            body = store.read(key)
+            if body is None:
+                print(f"Season file not found: {key}")
+                continue
+            sha256 = hashlib.sha256(body).hexdigest()
+            row = connection.execute("SELECT sha256 FROM seasons WHERE season = ?", (season,)).fetchone()
+            if row is not None and row['sha256'] == sha256:
+                continue
+            load_season(connection, json.loads(body), sha256)
+            loaded.append(season)
+            print(f"Loaded season {season} into {path}")
+    finally:
+        connection.close()
+    return loaded
+
+
+def race_results(connection: sqlite3.Connection, season: int) -> List[Dict[str, Any]]:
+    """
+    A season's race results in the Ergast shape (raceName, date, round, Results with Driver
+    and Constructor), ordered by round and finishing position.
+    """
+    rows = connection.execute("""
+        SELECT r.round, r.race_name, r.date, res.position, res.points, res.status,
+               d.driver_id, d.given_name, d.family_name, c.constructor_id, c.name AS constructor_name
+        FROM races r
+        JOIN results res ON res.season = r.season AND res.round = r.round
+        LEFT JOIN drivers d ON d.driver_id = res.driver_id
+        LEFT JOIN constructors c ON c.constructor_id = res.constructor_id
+        WHERE r.season = ?
+        ORDER BY r.round, res.position IS NULL, res.position
+    """, (season,)).fetchall()
+    races = []
+    for row in rows:
+        if not races or races[-1]['round'] != str(row['round']):
+            races.append({"round": str(row['round']), "raceName": row['race_name'], "date": row['date'],
+                          "Results": []})
+        races[-1]['Results'].append({
+            "position": None if row['position'] is None else str(row['position']),
+            "points": row['points'],
+            "status": row['status'],
+            "Driver": {"driverId": row['driver_id'], "givenName": row['given_name'],
+                       "familyName": row['family_name']},
+            "Constructor": {"constructorId": row['constructor_id'], "name": row['constructor_name']},
+        })
+    return races
+
+
+def driver_results(connection: sqlite3.Connection, driver_id: str, season: Optional[int] = None) -> List[sqlite3.Row]:
+    """One driver's race results, optionally for a single season, through the driver index."""
+    query = """
+        SELECT res.season, res.round, r.race_name, r.date, res.constructor_id, res.grid, res.position,
+               res.points, res.status
+        FROM results res JOIN races r ON r.season = res.season AND r.round = res.round
+        WHERE res.driver_id = ?
+    """
+    params = [driver_id]
+    if season is not None:
+        query += " AND res.season = ?"
+        params.append(season)
+    return connection.execute(query + " ORDER BY res.season, res.round", params).fetchall()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Normalize the F1 season files into an indexed SQLite store.")
+    parser.add_argument("--start", type=int, default=2013, help="first season to load")
+    parser.add_argument("--end", type=int, default=time.localtime().tm_year,
+                        help="last season to load (default: the current season)")
+    parser.add_argument("--path", default=F1_STORE_PATH, help="SQLite database to build")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    loaded = build_store(range(args.start, args.end + 1), path=args.path)
+    print(f"Loaded {len(loaded)} seasons into {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,22 @@
 import os
+import re
 import json
-import boto3
+import time
+import argparse
+import array
+import hashlib
+import sqlite3
+import openai
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from pinecone import Pinecone, ServerlessSpec
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
 from langchain_openai import OpenAIEmbeddings
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
+
+from artifact_store import S3Store, get_s3_client
+import f1_history_store
 
 # Load environment variables
 load_dotenv()
@@ -19,26 +31,330 @@ PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# Initialize AWS S3 Client
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION,
-)
+# "openai", or "fake" for deterministic local vectors (tests and benchmarks)
+EMBEDDINGS_BACKEND = os.getenv("EMBEDDINGS_BACKEND", "openai")
+EMBEDDING_DIMENSION = 1536
+# Texts are embedded EMBED_BATCH_SIZE at a time with embed_documents; rate limits and
+# transient API errors are retried with exponential backoff, honouring Retry-After.
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+EMBED_RETRY_DELAY = 1.0
+EMBED_MAX_RETRY_DELAY = 60.0
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)
+# "pinecone", or "memory" for a local InMemoryIndex (tests and benchmarks)
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "pinecone")
+# Upserts are buffered and sent in batches of at most UPSERT_BATCH_SIZE vectors and
+# UPSERT_MAX_BYTES of estimated JSON payload (Pinecone rejects requests over 2 MB),
+# UPSERT_WORKERS requests at a time.
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "100"))
+UPSERT_MAX_BYTES = int(os.getenv("UPSERT_MAX_BYTES", str(2 * 1000 * 1000 - 64 * 1024)))
+UPSERT_WORKERS = int(os.getenv("UPSERT_WORKERS", "4"))
+FLOAT_JSON_BYTES = 25
+# Pinecone deletes at most 1000 ids per request
+DELETE_BATCH_SIZE = 1000
+# Embeddings are cached on disk by sha256 of model and text, and a per-season manifest records
+# what each index already holds, so unchanged texts cost neither an embedding call nor an upsert
+# and vectors whose source data is gone are deleted.
+EMBED_CACHE = os.getenv("EMBED_CACHE", "1") == "1"
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", os.path.join(".cache", "embeddings.sqlite"))
+
+# Shared, pooled S3 client
+s3_client = get_s3_client()
 
 # Initialize Pinecone
 pc = Pinecone(api_key=PINECONE_API_KEY)
 
-# Initialize OpenAI Embeddings
-embeddings = OpenAIEmbeddings()
+
+def create_embeddings(backend: str = EMBEDDINGS_BACKEND) -> Embeddings:
+    if backend == "fake":
+        return DeterministicFakeEmbedding(size=EMBEDDING_DIMENSION)
+    return OpenAIEmbeddings()
+
+
+# Initialize Embeddings
+embeddings = create_embeddings()
+
+
+def embedding_model_name(backend: Optional[Embeddings] = None) -> str:
+    backend = backend or embeddings
+    if isinstance(backend, DeterministicFakeEmbedding):
+        return f"fake-{backend.size}"
+    return getattr(backend, "model", None) or type(backend).__name__
+
+
+def embedding_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def content_hash(key: str, metadata: Dict[str, Any]) -> str:
+    """Hash of everything an upserted vector carries: its embedding key and its metadata."""
+    return hashlib.sha256(f"{key}\0{json.dumps(metadata, sort_keys=True)}".encode("utf-8")).hexdigest()
+
+
+def vector_round(unique_id: str) -> Optional[str]:
+    """The race round of a race-level vector id such as '2023_race_5_winner'; None for summaries."""
+    match = re.match(r"\d+_race_([^_]+)_", unique_id)
+    return match.group(1) if match else None
+
+
+class EmbeddingCache:
+    """
+    SQLite cache of embedding vectors keyed by embedding_key(), plus, per index and season, a
+    manifest of the content hash of every vector id known to be upserted. Each process opens
+    its own connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self._connections = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        pid = os.getpid()
+        if pid not in self._connections:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL);
+                CREATE TABLE IF NOT EXISTS manifest (
+                    index_name TEXT NOT NULL,
+                    season INTEGER NOT NULL,
+                    vector_id TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    PRIMARY KEY (index_name, vector_id)
+                );
+                CREATE INDEX IF NOT EXISTS manifest_season ON manifest (index_name, season);
+            """)
+            self._connections[pid] = connection
+        return self._connections[pid]
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self.lock:
+            row = self._connection().execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return array.array('d', row[0]).tolist()
+
+    def put_many(self, items: List[tuple]):
+        """Store (key, vector) pairs."""
+        with self.lock, self._connection() as connection:
+            connection.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                                   [(key, array.array('d', vector).tobytes()) for key, vector in items])
+
+    def manifest(self, index_name: str, season: int) -> Dict[str, str]:
+        """Vector id -> content hash of a season's vectors in the index."""
+        with self.lock:
+            rows = self._connection().execute(
+                "SELECT vector_id, content_hash FROM manifest WHERE index_name = ? AND season = ?", (index_name, season)
+            ).fetchall()
+        return dict(rows)
+
+    def mark_indexed(self, index_name: str, items: List[tuple]):
+        """Record (season, vector_id, content_hash) triples as upserted into the index."""
+        with self.lock, self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO manifest (index_name, season, vector_id, content_hash) VALUES (?, ?, ?, ?)",
+                [(index_name, season, vector_id, content) for season, vector_id, content in items]
+            )
+
+    def remove_indexed(self, index_name: str, vector_ids: List[str]):
+        with self.lock, self._connection() as connection:
+            connection.executemany("DELETE FROM manifest WHERE index_name = ? AND vector_id = ?",
+                                   [(index_name, vector_id) for vector_id in vector_ids])
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def log_summary(self):
+        stats = self.stats()
+        print(f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+
+
+def embed_with_retry(texts: List[str], max_retries: int = EMBED_MAX_RETRIES,
+                     initial_delay: float = EMBED_RETRY_DELAY) -> List[List[float]]:
+    """Embed a batch of texts in one call, backing off on rate limits and transient errors."""
+    delay = initial_delay
+    for attempt in range(max_retries):
+        try:
+            return embeddings.embed_documents(texts)
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_retries - 1:
+                raise
+            response = getattr(e, "response", None)
+            retry_after = response.headers.get("retry-after") if response is not None else None
+            try:
+                wait = float(retry_after) if retry_after else delay
+            except ValueError:
+                wait = delay
+            wait = min(wait, EMBED_MAX_RETRY_DELAY)
+            print(f"Embedding batch of {len(texts)} failed ({type(e).__name__}). Retrying in {wait:.1f} seconds...")
+            time.sleep(wait)
+            delay = min(delay * 2, EMBED_MAX_RETRY_DELAY)
+
+
+
+class InMemoryIndex:
+    """
+    Local stand-in for a Pinecone index, keeping vectors in a dict. `latency` seconds are
+    spent on every request, like a round trip to the service.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.vectors = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def upsert(self, vectors):
+        self._round_trip()
+        with self.lock:
+            self.requests += 1
+            for unique_id, values, metadata in vectors:
+                self.vectors[unique_id] = (values, metadata)
+        return {"upserted_count": len(vectors)}
+
+    def fetch(self, ids):
+        with self.lock:
+            return {unique_id: self.vectors[unique_id] for unique_id in ids if unique_id in self.vectors}
+
+    def delete(self, ids):
+        self._round_trip()
+        with self.lock:
+            self.requests += 1
+            for unique_id in ids:
+                self.vectors.pop(unique_id, None)
+
+
+def vector_payload_bytes(unique_id: str, values: List[float], metadata: Dict[str, Any]) -> int:
+    """
+    Upper bound on the size of a vector in an upsert request body, without serializing the
+    values: no float64 takes more than FLOAT_JSON_BYTES characters, separator included.
+    """
+    return len(unique_id) + FLOAT_JSON_BYTES * len(values) + len(json.dumps(metadata)) + 40
+
+
+class UpsertWriter:
+    """
+    Buffers vectors for an index (Pinecone's or InMemoryIndex) and upserts them in batches
+    capped by vector count and payload bytes, with up to `workers` requests in flight.
+    Upsert errors are raised from the next add/flush or from wait().
+    """
+
+    def __init__(self, index, max_vectors: int = UPSERT_BATCH_SIZE, max_bytes: int = UPSERT_MAX_BYTES,
+                 workers: int = UPSERT_WORKERS):
+        self.index = index
+        self.max_vectors = max_vectors
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.futures = []
+        self.vectors = 0
+        self.requests = 0
+        self.bytes = 0
+        self.started = None
+        self.finished = None
+        # Called with each batch once it has been upserted
+        self.on_upsert = None
+
+    def _upsert(self, batch):
+        self.index.upsert(vectors=batch)
+        if self.on_upsert:
+            self.on_upsert(batch)
+
+    def add(self, unique_id: str, values: List[float], metadata: Dict[str, Any]):
+        size = vector_payload_bytes(unique_id, values, metadata)
+        if self.buffer and (len(self.buffer) >= self.max_vectors or self.buffer_bytes + size > self.max_bytes):
+            self.flush()
+        self.buffer.append((unique_id, values, metadata))
+        self.buffer_bytes += size
+
+    def flush(self):
+        """Send the buffered vectors as one upsert request, in the background."""
+        if not self.buffer:
+            return
+        # Bound the batches held in memory; this also surfaces earlier failures
+        while len(self.futures) >= 2 * self.workers:
+            self.futures.pop(0).result()
+        if self.started is None:
+            self.started = time.perf_counter()
+        batch, size = self.buffer, self.buffer_bytes
+        self.buffer, self.buffer_bytes = [], 0
+        self.vectors += len(batch)
+        self.requests += 1
+        self.bytes += size
+        self.futures.append(self.executor.submit(self._upsert, batch))
+
+    def wait(self):
+        """Flush the buffer and block until every upsert has completed."""
+        self.flush()
+        futures, self.futures = self.futures, []
+        for future in futures:
+            future.result()
+        self.finished = time.perf_counter()
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            self.executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, float]:
+        seconds = (self.finished or time.perf_counter()) - self.started if self.started else 0.0
+        return {
+            "vectors": self.vectors,
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "seconds": seconds,
+            "vectors_per_second": self.vectors / seconds if seconds else 0.0,
+        }
+
+    def log_summary(self):
+        stats = self.stats()
+        print(f"Upserted {stats['vectors']} vectors in {stats['requests']} requests "
+              f"({stats['bytes'] / 1e6:.1f} MB) over {stats['seconds']:.1f}s: "
+              f"{stats['vectors_per_second']:.1f} vectors/s")
 
 
 class F1DataEnhancedEmbedder:
-    def __init__(self, index_name: str = "f1-data-index"):
+    def __init__(self, index_name: str = "f1-data-index", index=None, batch_size: int = EMBED_BATCH_SIZE,
+                 writer: Optional[UpsertWriter] = None, cache: Optional[EmbeddingCache] = None):
         self.index_name = index_name
+        self.batch_size = batch_size
+        # (unique_id, text, metadata, embedding key) waiting for the next embedding batch
+        self.pending = []
+        if index is None:
+            index = self._create_vector_index()
+        self.index = index
+        self.writer = writer or UpsertWriter(index)
+        self.cache = cache if cache is not None else (EmbeddingCache(EMBED_CACHE_PATH) if EMBED_CACHE else None)
+        # (season, content hash) of vectors handed to the writer, recorded in the manifest once upserted
+        self.content_hashes = {}
+        # Manifest of the season being generated and the vector ids generated for it so far
+        self.manifest = {}
+        self.generated = set()
+        self.unchanged = 0
+        self.deleted = 0
+        if self.cache:
+            self.writer.on_upsert = self._mark_indexed
+
+    def _create_vector_index(self):
+        if VECTOR_INDEX_BACKEND == "memory":
+            return InMemoryIndex()
         self._create_index_if_not_exists()
-        self.index = pc.Index(index_name)
+        return pc.Index(self.index_name)
 
     def _create_index_if_not_exists(self):
         try:
@@ -58,13 +374,35 @@ class F1DataEnhancedEmbedder:
     def download_json_from_s3(self, season: int) -> Optional[Dict[str, Any]]:
         try:
             key = f"f1-data/{season}/{season}_season_data.json"
-            response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=key)
-            json_content = response['Body'].read().decode('utf-8')
-            return json.loads(json_content)
+            # Decompresses gzip/zstd season files transparently
+            body = S3Store(S3_BUCKET_NAME, client=s3_client).read(key)
+            if body is None:
+                print(f"Season file not found: {key}")
+                return None
+            return json.loads(body.decode('utf-8'))
         except Exception as e:
             print(f"Error downloading JSON for season {season}: {e}")
             return None
 
+    def load_changed_rounds(self, season: int) -> Optional[List[str]]:
+        """Rounds changed by the last f1_history_jolpica run for a season; None if none were recorded."""
+        try:
+            body = S3Store(S3_BUCKET_NAME, client=s3_client).read(f"f1-data/{season}/changed_rounds.json")
+            return json.loads(body.decode('utf-8'))["rounds"] if body is not None else None
+        except Exception as e:
+            print(f"Error reading changed rounds for season {season}: {e}")
+            return None
+
+    def load_race_results(self, season: int) -> Optional[List[Dict[str, Any]]]:
+        """A season's race results from the normalized store, if it has been built."""
+        if not os.path.exists(f1_history_store.F1_STORE_PATH):
+            return None
+        connection = f1_history_store.connect(f1_history_store.F1_STORE_PATH, read_only=True)
+        try:
+            return f1_history_store.race_results(connection, season) or None
+        finally:
+            connection.close()
+
     def _generate_text_representation(self, data: Any, category: str, season: int) -> str:
         if isinstance(data, list):
             if category == "races":
@@ -93,16 +431,75 @@ class F1DataEnhancedEmbedder:
         return "Unknown category."
 
     def _upsert_embedding(self, text: str, unique_id: str, category: str, season: int):
-        """Create and upsert embeddings into Pinecone."""
-        embedding = embeddings.embed_query(text)
+        """Queue a text for embedding; full batches are embedded and upserted into Pinecone."""
         metadata = {
             'text': text,
             'category': category,
             'season': str(season),
             'data_type': 'item-level' if "race" in category else 'key-level'
         }
-        self.index.upsert(vectors=[(unique_id, embedding, metadata)])
-        print(f"Embedded: {unique_id}")
+        key = embedding_key(embedding_model_name(), text)
+        self.generated.add(unique_id)
+        if self.cache:
+            content = content_hash(key, metadata)
+            if self.manifest.get(unique_id) == content:
+                self.unchanged += 1
+                return
+            self.content_hashes[unique_id] = (season, content)
+            vector = self.cache.get(key)
+            if vector is not None:
+                self.writer.add(unique_id, vector, metadata)
+                return
+        self.pending.append((unique_id, text, metadata, key))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def _mark_indexed(self, batch):
+        items = []
+        for unique_id, _, _ in batch:
+            if unique_id in self.content_hashes:
+                season, content = self.content_hashes.pop(unique_id)
+                items.append((season, unique_id, content))
+        self.cache.mark_indexed(self.index_name, items)
+
+    def delete_stale_vectors(self, rounds: Optional[List[str]] = None,
+                             scheduled_rounds: Iterable[str] = ()) -> List[str]:
+        """
+        Delete the manifest's vectors that were not generated for the current season, limited
+        to the season summaries and `rounds` when given. Race vectors are stale only once their
+        round is no longer in `scheduled_rounds`; a scheduled round without results this time
+        keeps the vectors already indexed. Returns the deleted ids.
+        """
+        scheduled_rounds = set(scheduled_rounds)
+        in_scope = [unique_id for unique_id in self.manifest
+                    if rounds is None or vector_round(unique_id) in (None, *rounds)]
+
+        def is_stale(unique_id):
+            if unique_id in self.generated:
+                return False
+            round_number = vector_round(unique_id)
+            # Without a schedule nothing tells which rounds were dropped, so race vectors are kept
+            return round_number is None or bool(scheduled_rounds) and round_number not in scheduled_rounds
+
+        stale = [unique_id for unique_id in in_scope if is_stale(unique_id)]
+        for start in range(0, len(stale), DELETE_BATCH_SIZE):
+            self.index.delete(ids=stale[start:start + DELETE_BATCH_SIZE])
+        if stale:
+            self.cache.remove_indexed(self.index_name, stale)
+            self.deleted += len(stale)
+            print(f"Deleted {len(stale)} stale vectors: {', '.join(stale[:5])}{' ..' if len(stale) > 5 else ''}")
+        return stale
+
+    def flush(self):
+        """Embed the queued texts with one embed_documents call per batch and hand them to the upsert writer."""
+        while self.pending:
+            batch, self.pending = self.pending[:self.batch_size], self.pending[self.batch_size:]
+            vectors = embed_with_retry([text for _, text, _, _ in batch])
+            if self.cache:
+                self.cache.put_many([(key, vector) for (_, _, _, key), vector in zip(batch, vectors)])
+            for (unique_id, _, metadata, _), vector in zip(batch, vectors):
+                self.writer.add(unique_id, vector, metadata)
+            print(f"Embedded {len(batch)} texts: {batch[0][0]} .. {batch[-1][0]}")
 
     def generate_key_level_embedding(self, season: int, data: Dict[str, Any]):
         """Create embeddings for key-level summaries."""
@@ -127,31 +524,95 @@ class F1DataEnhancedEmbedder:
                 unique_id = f"{season}_race_{race['round']}_top5"
                 self._upsert_embedding(top_5_text, unique_id, "top_5_standings", season)
 
-    def generate_embeddings_for_season(self, season: int):
-        """Generate embeddings for a season."""
+    def generate_embeddings_for_season(self, season: int, wait: bool = True, rounds: Optional[List[str]] = None):
+        """
+        Generate embeddings for a season; with `wait`, return once they are all upserted.
+
+        With the embedding cache, only vectors missing from the season's manifest or whose
+        content changed are upserted, and vectors that are no longer generated are deleted.
+        `rounds`, e.g. the changed rounds returned by refresh_season, limits the race-level
+        vectors to those rounds; the season summaries are always checked.
+        """
         season_data = self.download_json_from_s3(season)
         if not season_data:
             print(f"No data found for season {season}")
             return
 
-        print(f"Creating embeddings for season: {season}")
+        print(f"Creating embeddings for season: {season}" + (f", rounds {', '.join(rounds)}" if rounds is not None else ""))
+        self.manifest = self.cache.manifest(self.index_name, season) if self.cache else {}
+        self.generated = set()
         # Key-level embeddings
         self.generate_key_level_embedding(season, season_data)
 
-        # Race-level embeddings
-        self.generate_race_embeddings(season, season_data.get("races", []))
+        # Race-level embeddings, from the normalized store when it has been built
+        races = self.load_race_results(season) or season_data.get("races", [])
+        if rounds is not None:
+            races = [race for race in races if str(race.get('round')) in rounds]
+        self.generate_race_embeddings(season, races)
+        self.flush()
+        if self.cache:
+            self.delete_stale_vectors(rounds, [str(race.get('round')) for race in season_data.get("races", [])])
+        if wait:
+            self.writer.wait()
 
-    def batch_embed_seasons(self, start_year: int, end_year: int):
-        """Batch process multiple seasons."""
+    def batch_embed_seasons(self, start_year: int, end_year: int, rounds: Optional[List[str]] = None,
+                            changed_rounds: bool = False):
+        """
+        Batch process multiple seasons; upserts carry on in the background across seasons.
+        `rounds` limits a single season to those rounds. With `changed_rounds`, each season is
+        limited to the rounds recorded by its last ingestion, and seasons with no record are skipped.
+        """
+        if rounds is not None and start_year != end_year:
+            raise ValueError("rounds can only be given for a single season")
         for season in range(start_year, end_year + 1):
+            season_rounds = rounds
+            if changed_rounds:
+                season_rounds = self.load_changed_rounds(season)
+                if season_rounds is None:
+                    print(f"No changed rounds recorded for season {season}, skipping")
+                    continue
             try:
-                self.generate_embeddings_for_season(season)
+                self.generate_embeddings_for_season(season, wait=False, rounds=season_rounds)
                 print(f"Completed embeddings for season {season}")
             except Exception as e:
+                # Drop the failed season's queued texts so they are not upserted with the next one
+                self.pending = []
                 print(f"Error processing season {season}: {e}")
+        try:
+            self.writer.wait()
+        except Exception as e:
+            print(f"Error upserting embeddings: {e}")
+        self.writer.log_summary()
+        if self.cache:
+            print(f"Delta: {self.unchanged} unchanged vectors skipped, {self.deleted} stale vectors deleted")
+            self.cache.log_summary()
 
 
-if __name__ == "__main__":
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Embed F1 season data into the Pinecone index.")
+    parser.add_argument("--start", type=int, default=2013, help="first season to embed")
+    parser.add_argument("--end", type=int, default=int(os.getenv('MAX_SEASON_YEAR', '2024')),
+                        help="last season to embed")
+    parser.add_argument("--season", type=int, help="embed only this season")
+    parser.add_argument("--rounds", type=lambda value: [part.strip() for part in value.split(",") if part.strip()],
+                        help="only re-embed these rounds of --season")
+    parser.add_argument("--changed-rounds", action="store_true",
+                        help="only re-embed the rounds each season's last f1_history_jolpica run recorded as changed")
+    args = parser.parse_args(argv)
+    if args.rounds is not None and args.season is None:
+        parser.error("--rounds requires --season")
+    if args.rounds is not None and args.changed_rounds:
+        parser.error("--rounds and --changed-rounds are mutually exclusive")
+    if args.season is not None:
+        args.start = args.end = args.season
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
     embedder = F1DataEnhancedEmbedder()
-    current_year = int(os.getenv('MAX_SEASON_YEAR', '2024'))
-    embedder.batch_embed_seasons(2013, current_year)
+    embedder.batch_embed_seasons(args.start, args.end, rounds=args.rounds, changed_rounds=args.changed_rounds)
+
+
+if __name__ == "__main__":
+    main()
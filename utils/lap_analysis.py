@@ -1,19 +1,43 @@
 import requests
-from bs4 import BeautifulSoup
+import hashlib
+import re
+from bs4 import BeautifulSoup, SoupStrainer
 import json
 import time
 import logging
+import queue
+import shutil
+import threading
+import trio
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import functools
+from contextlib import contextmanager
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import (
+    NoSuchElementException, SessionNotCreatedException, TimeoutException, WebDriverException
+)
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
-from datetime import datetime, timezone
-import boto3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urljoin
+from datetime import datetime, timedelta, timezone
 import os
 from dotenv import load_dotenv
+from artifact_store import S3Store, LocalStore, write_json
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+try:
+    import lxml.html
+except ImportError:  # lxml is optional; the full BeautifulSoup extractor is used instead
+    lxml = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -28,6 +52,144 @@ AWS_REGION = os.getenv("AWS_REGION")
 
 BASE_URL = "https://www.autosport.com"
 
+# Scraper pacing (seconds) and concurrency
+LINK_DELAY = 0.5
+SCRAPE_WORKERS = int(os.getenv("LAP_SCRAPE_WORKERS", "1"))
+
+# Page readiness (seconds): pages are polled until content shows up instead of
+# sleeping for a fixed time. The 'Load more' timeout adapts to observed load times.
+PAGE_READY_TIMEOUT = 10
+LOAD_MORE_TIMEOUT = 5
+LOAD_MORE_TIMEOUT_MIN = 1
+LOAD_MORE_TIMEOUT_MAX = 30
+READY_POLL_INTERVAL = 0.1
+READY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+# Returns message count, whether 'Load more' is shown and listing item count in one round trip
+PAGE_STATE_SCRIPT = """
+var button = document.querySelector('button.mslt-more__btn');
+return {
+    messages: document.querySelectorAll('div.mslt-msg').length,
+    load_more: !!(button && button.offsetParent !== null && !button.disabled),
+    listing_items: document.querySelectorAll('a.ms-item').length
+};
+"""
+
+# Browser sessions: leased from a warm pool and recycled after a number of page loads.
+# The chromedriver binary is pinned (CHROMEDRIVER_PATH or CHROMEDRIVER_VERSION) and its
+# resolved path cached locally so startup needs no network. LAP_WEBDRIVER_URL points the
+# scraper at a long-lived remote browser service instead of launching Chrome locally.
+SESSION_MAX_PAGES = int(os.getenv("LAP_SESSION_MAX_PAGES", "50"))
+WEBDRIVER_URL = os.getenv("LAP_WEBDRIVER_URL")
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")
+CHROMEDRIVER_VERSION = os.getenv("CHROMEDRIVER_VERSION")
+DRIVER_PIN_FILE = os.path.expanduser(os.getenv("LAP_DRIVER_PIN_FILE", "~/.cache/f1-intelligence/chromedriver.json"))
+
+# Resource policy: which requests headless Chrome may make. Chrome blocks matching URLs
+# itself (DevTools Network.setBlockedURLs), so fonts, stylesheets, media, ad and analytics
+# scripts and embedded players are never downloaded; every other resource type the policy
+# does not allow is failed through DevTools Fetch interception. LAP_RESOURCE_POLICY picks
+# a named policy per job ("off", "text", "strict").
+RESOURCE_POLICY = os.getenv("LAP_RESOURCE_POLICY", "text")
+RESOURCE_BLOCKER_TIMEOUT = 15
+RESOURCE_BLOCKER_BUFFER = 256
+RESOURCE_TYPE_PATTERNS = {
+    "Image": ("*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"),
+    "Font": ("*.woff*", "*.ttf*", "*.otf*", "*.eot*"),
+    "Stylesheet": ("*.css*",),
+    "Media": ("*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*.ts?*"),
+}
+THIRD_PARTY_PATTERNS = (
+    "*doubleclick.net*", "*googlesyndication.com*", "*googletagmanager.com*", "*googletagservices.com*",
+    "*google-analytics.com*", "*adservice.google.*", "*amazon-adsystem.com*", "*scorecardresearch.com*",
+    "*facebook.net*", "*connect.facebook.*", "*hotjar.com*", "*taboola.com*", "*outbrain.com*",
+    "*chartbeat.*", "*quantserve.com*", "*imasdk.googleapis.com*", "*youtube.com/embed*",
+    "*player.vimeo.com*", "*jwplayer*", "*brightcove*", "*twitter.com/widgets*", "*platform.twitter.com*",
+    "*instagram.com/embed*", "*cdn.cookielaw.org*", "*onetrust*",
+)
+
+# Listing discovery: pages are fetched LISTING_WORKERS at a time (HTTP backend) and the
+# walk stops at the first page without race links, or at an already-known race. A page that
+# cannot be loaded is retried LISTING_RETRIES times and then fails discovery.
+LISTING_WORKERS = int(os.getenv("LAP_LISTING_WORKERS", "4"))
+LISTING_MAX_PAGES = int(os.getenv("LAP_LISTING_MAX_PAGES", "100"))
+LISTING_RETRIES = int(os.getenv("LAP_LISTING_RETRIES", "2"))
+
+# Fetch backend: "http" (browser-free, falls back to Selenium per link) or "selenium"
+FETCH_BACKEND = os.getenv("LAP_FETCH_BACKEND", "http")
+HTTP_TIMEOUT = 30
+HTTP_POOL_SIZE = 8
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Encoding": "gzip, deflate",
+}
+# Attributes on the 'Load more' button that carry the next feed page URL
+LOAD_MORE_URL_ATTRS = ("data-url", "data-href", "data-next-url")
+
+# Incremental scraping: outputs live next to each other in the lap bucket,
+# or under LAP_STORE_DIR when running against a local filesystem stand-in
+RACE_DATA_KEY = "race_data.json"
+MANIFEST_KEY = "race_manifest.json"
+# One compact object per race under races/{season}/{country}.json, listed in an index.
+# The single race_data.json is only assembled when LAP_WRITE_LEGACY=1.
+RACE_SHARD_PREFIX = "races"
+RACE_INDEX_KEY = f"{RACE_SHARD_PREFIX}/index.json"
+WRITE_LEGACY = os.getenv("LAP_WRITE_LEGACY", "0") == "1"
+# Checkpoints of the current run (local) and the retry queue of failed links (in the store)
+CHECKPOINT_DIR = os.getenv("LAP_CHECKPOINT_DIR", ".lap_checkpoint")
+RETRY_QUEUE_KEY = "retry_queue.json"
+RETRY_BASE_DELAY = 30
+RETRY_MAX_ATTEMPTS = 5
+RETRY_PASSES = 2
+RETRY_MAX_WAIT = 120
+# Columnar export of all commentary for analytics, one Parquet file per season; only the
+# seasons of changed races are rewritten
+COMMENTARY_PARQUET_PREFIX = f"{RACE_SHARD_PREFIX}/commentary"
+WRITE_PARQUET = os.getenv("LAP_WRITE_PARQUET", "1") == "1"
+COMMENTARY_SCHEMA = pa.schema([
+    ("season", pa.int16()),
+    ("country", pa.dictionary(pa.int32(), pa.string())),
+    ("race", pa.dictionary(pa.int32(), pa.string())),
+    ("time", pa.timestamp("us", tz="UTC")),
+    ("event", pa.dictionary(pa.int32(), pa.string())),
+    ("comment", pa.string()),
+])
+LAP_STORE_DIR = os.getenv("LAP_STORE_DIR")
+INCREMENTAL = os.getenv("LAP_INCREMENTAL", "1") == "1"
+# A race blog with no new messages for this long is treated as complete
+RACE_COMPLETE_AFTER = timedelta(hours=12)
+
+# Message extraction backend: "lxml" (if installed) or "soup" (full html.parser DOM,
+# the original behaviour)
+HTML_EXTRACTOR = os.getenv("LAP_HTML_EXTRACTOR", "lxml" if lxml else "soup")
+MESSAGE_XPATH = '//div[contains(concat(" ", normalize-space(@class), " "), " mslt-msg ")]'
+TIME_XPATH = './/time[contains(concat(" ", normalize-space(@class), " "), " mslt-msg__time ")]'
+BODY_XPATH = './/div[@class="mslt-msg__body ms-article-content"]'
+
+# Selenium: harvest messages after each 'Load more' instead of parsing the final page_source,
+# optionally pruning harvested nodes from the live DOM
+HARVEST_MESSAGES = os.getenv("LAP_HARVEST_MESSAGES", "1") == "1"
+HARVEST_PRUNE = os.getenv("LAP_HARVEST_PRUNE", "0") == "1"
+# Returns [id, datetime, outerHTML] for message nodes not harvested yet and marks or
+# prunes them. The last node is always kept so the feed knows where to continue.
+HARVEST_SCRIPT = """
+var prune = arguments[0];
+var nodes = document.querySelectorAll('div.mslt-msg:not([data-harvested])');
+var harvested = [];
+for (var i = 0; i < nodes.length; i++) {
+    var time = nodes[i].querySelector('time.mslt-msg__time');
+    harvested.push([nodes[i].id, time ? time.getAttribute('datetime') : '', nodes[i].outerHTML]);
+    nodes[i].setAttribute('data-harvested', '1');
+}
+if (prune) {
+    var done = document.querySelectorAll('div.mslt-msg[data-harvested]');
+    for (var j = 0; j < done.length - 1; j++) {
+        done[j].remove();
+    }
+}
+return harvested;
+"""
+
 KEYWORDS_CLASSES = {
     "mslt-msg__flag_checkered": "checkered_flag",
     "mslt-msg__safety_car": "safety_car",
@@ -51,22 +213,662 @@ grand_prix_list = [
     "Las Vegas", "Qatar", "Abu Dhabi", "Brazilian", "Styrian", "Turkish", "Imola"
 ]
 
-def create_webdriver():
+class LoadMoreUnavailable(Exception):
+    """Raised when the HTTP backend cannot follow a 'Load more' button."""
+
+
+class EmptyListing(Exception):
+    """Raised when the first listing page has no items at all, e.g. a JS shell or a bot check."""
+
+
+class LoadMoreTimeout(Exception):
+    """Raised when 'Load more' adds nothing even after waiting the maximum timeout."""
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_epoch_us(moment):
     """
-    Create and configure Selenium WebDriver with optimized settings.
+    Integer UTC microseconds since the epoch; naive datetimes are taken as UTC.
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+class RaceMessage:
+    """
+    One live blog message. The timestamp is parsed once, at ingest, into integer UTC
+    microseconds so sorting and comparisons never touch strings again; event names are
+    interned so races share one copy of each. Read access by key (message["time"]) and
+    to_dict() give the legacy {'time', 'event', 'comment'} form.
+    """
+
+    __slots__ = ("epoch_us", "event", "comment")
+
+    def __init__(self, epoch_us, event, comment):
+        self.epoch_us = epoch_us
+        self.event = sys.intern(event)
+        self.comment = comment
+
+    @classmethod
+    def from_datetime(cls, moment, event, comment):
+        return cls(to_epoch_us(moment), event, comment)
+
+    @classmethod
+    def from_dict(cls, record):
+        """
+        Build from a serialized message, using its "ts" field when present so
+        stored messages load without parsing timestamps.
+        """
+        if "ts" in record:
+            return cls(record["ts"], record["event"], record["comment"])
+        return cls.from_datetime(parse_timestamp(record["time"]), record["event"], record["comment"])
+
+    @property
+    def datetime(self):
+        return EPOCH + timedelta(microseconds=self.epoch_us)
+
+    @property
+    def time(self):
+        return self.datetime.isoformat()
+
+    def __getitem__(self, key):
+        if key not in ("time", "event", "comment"):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self):
+        return {"time": self.time, "event": self.event, "comment": self.comment}
+
+    def to_record(self):
+        """
+        Serialized form: the legacy fields plus "ts", the timestamp in epoch microseconds.
+        """
+        return {"time": self.time, "ts": self.epoch_us, "event": self.event, "comment": self.comment}
+
+    def __eq__(self, other):
+        if not isinstance(other, RaceMessage):
+            return NotImplemented
+        return (self.epoch_us, self.event, self.comment) == (other.epoch_us, other.event, other.comment)
+
+    def __hash__(self):
+        return hash((self.epoch_us, self.event, self.comment))
+
+    def __repr__(self):
+        return f"RaceMessage({self.time!r}, {self.event!r}, {self.comment!r})"
+
+
+def encode_messages(messages):
+    return [message.to_record() for message in messages]
+
+def decode_messages(records):
+    return [RaceMessage.from_dict(record) for record in records]
+
+def legacy_race_data(race_data):
+    """
+    {title: {country, race}} with messages in the legacy race_data.json dict form.
+    """
+    return {
+        race_title: {"country": data["country"], "race": [message.to_dict() for message in data["race"]]}
+        for race_title, data in race_data.items()
+    }
+
+
+class AdaptiveTimeout:
+    """
+    Timeout that tracks observed wait times: a multiple of their moving average, clamped.
+    """
+
+    def __init__(self, initial, minimum, maximum, factor=3.0, alpha=0.2):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.alpha = alpha
+        self.average = None
+        self.initial = initial
+
+    def observe(self, seconds):
+        if self.average is None:
+            self.average = seconds
+        else:
+            self.average = self.alpha * seconds + (1 - self.alpha) * self.average
+
+    @property
+    def timeout(self):
+        if self.average is None:
+            return self.initial
+        return min(self.maximum, max(self.minimum, self.factor * self.average))
+
+
+class ReadinessStats:
+    """
+    Per page-kind histograms of time-to-ready, so we can see where scraping time goes.
+    """
+
+    def __init__(self, buckets=READY_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.timeouts = {}
+
+    def record(self, kind, seconds, timed_out=False):
+        with self.lock:
+            self.samples.setdefault(kind, []).append(seconds)
+            if timed_out:
+                self.timeouts[kind] = self.timeouts.get(kind, 0) + 1
+
+    def histogram(self, kind):
+        """
+        Counts per bucket upper bound, with a final '+inf' bucket.
+        """
+        counts = {f"<={bound}s": 0 for bound in self.buckets}
+        counts["+inf"] = 0
+        for seconds in self.samples.get(kind, []):
+            for bound in self.buckets:
+                if seconds <= bound:
+                    counts[f"<={bound}s"] += 1
+                    break
+            else:
+                counts["+inf"] += 1
+        return counts
+
+    def log_summary(self):
+        for kind, samples in sorted(self.samples.items()):
+            buckets = ", ".join(f"{label}: {count}" for label, count in self.histogram(kind).items() if count)
+            logger.info(
+                f"Time to ready [{kind}]: {len(samples)} pages, total {sum(samples):.1f}s, "
+                f"max {max(samples):.2f}s, {self.timeouts.get(kind, 0)} timeouts | {buckets}"
+            )
+
+
+class RetryQueue:
+    """
+    Failed links with attempt counts and next due times. Persisted in the store so that
+    later passes and later runs re-attempt them with exponential backoff; links that
+    exhaust their attempts stay in the queue marked permanent.
+    """
+
+    def __init__(self, entries=None, base_delay=None, max_attempts=None):
+        self.entries = entries or {}
+        self.base_delay = RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_attempts = max_attempts or RETRY_MAX_ATTEMPTS
+        self.stats = {"retried": 0, "recovered": 0, "permanently_failed": 0}
+
+    @classmethod
+    def load(cls, store):
+        return cls(load_json_artifact(store, RETRY_QUEUE_KEY, {}))
+
+    def save(self, store):
+        write_json(store, RETRY_QUEUE_KEY, self.entries)
+
+    def due(self, now):
+        return [
+            link for link, entry in self.entries.items()
+            if not entry["permanent"] and parse_timestamp(entry["next_attempt"]) <= now
+        ]
+
+    def next_due(self):
+        times = [parse_timestamp(e["next_attempt"]) for e in self.entries.values() if not e["permanent"]]
+        return min(times) if times else None
+
+    def record_attempt(self, link):
+        if link in self.entries:
+            self.stats["retried"] += 1
+
+    def record_failure(self, link, now):
+        attempts = self.entries.get(link, {}).get("attempts", 0) + 1
+        permanent = attempts >= self.max_attempts
+        if permanent:
+            self.stats["permanently_failed"] += 1
+            logger.error(f"Giving up on {link} after {attempts} attempts")
+        self.entries[link] = {
+            "attempts": attempts,
+            "next_attempt": (now + timedelta(seconds=self.base_delay * 2 ** (attempts - 1))).isoformat(),
+            "permanent": permanent
+        }
+
+    def record_success(self, link):
+        if self.entries.pop(link, None) is not None:
+            self.stats["recovered"] += 1
+
+
+class ScrapeCheckpoint:
+    """
+    Progress of the current scrape run on local disk: the link list, plus one atomically
+    written record per completed race, so a crashed run can be resumed.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.store = LocalStore(root)
+
+    def start(self, links):
+        self.clear()
+        self.store.write("run.json", json.dumps({"links": links}).encode("utf-8"))
+
+    def links(self):
+        run = self.store.read("run.json")
+        return json.loads(run)["links"] if run else None
+
+    def save_race(self, link, race_title, race_data, manifest_entry):
+        data = {"country": race_data["country"], "race": encode_messages(race_data["race"])}
+        record = {"link": link, "title": race_title, "data": data, "entry": manifest_entry}
+        key = f"races/{hashlib.sha1(link.encode('utf-8')).hexdigest()}.json"
+        self.store.write(key, json.dumps(record, ensure_ascii=False).encode("utf-8"))
+
+    def completed(self):
+        races_dir = os.path.join(self.root, "races")
+        if not os.path.isdir(races_dir):
+            return {}
+        records = {}
+        for name in os.listdir(races_dir):
+            if name.endswith(".json"):
+                record = json.loads(self.store.read(f"races/{name}"))
+                record["data"]["race"] = decode_messages(record["data"]["race"])
+                records[record["link"]] = record
+        return records
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class PooledDriver:
+    """
+    WebDriver handed out by BrowserPool; forwards everything and counts page loads.
+    `broken` is set when a scrape on it failed with a WebDriver error.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.broken = False
+
+    def get(self, url):
+        self.pages += 1
+        return self.driver.get(url)
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+
+class BrowserPool:
+    """
+    Warm, pre-configured browser sessions leased to scraping code. At most `size` sessions
+    exist at once; a session is recycled after `max_pages` page loads to bound Chrome's
+    memory growth, and discarded if the lease ended with a WebDriver error.
+    `policy` is the resource policy the pool's sessions are created with.
+    """
+
+    def __init__(self, size=1, max_pages=None, factory=None, policy=None):
+        self.size = size
+        self.policy = policy
+        self.max_pages = max_pages or SESSION_MAX_PAGES
+        self.factory = factory
+        self.idle = queue.LifoQueue()  # reuse the most recently used, warmest session
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.stats = {"created": 0, "leases": 0, "recycled": 0, "discarded": 0}
+
+    def _create(self):
+        # Resolve the factory late so the module-level create_webdriver can be swapped out
+        if self.factory:
+            driver = PooledDriver(self.factory())
+        elif self.policy is not None:
+            driver = PooledDriver(create_webdriver(self.policy))
+        else:
+            driver = PooledDriver(create_webdriver())
+        with self.lock:
+            self.stats["created"] += 1
+        return driver
+
+    def warm(self, count=None):
+        """
+        Start sessions ahead of time, in parallel, so the first leases do not pay for startup.
+        """
+        count = min(count or self.size, self.size) - self.idle.qsize()
+        drivers = []
+
+        def start():
+            try:
+                drivers.append(self._create())
+            except Exception as e:
+                logger.error(f"Could not warm a browser session: {e}")
+
+        threads = [threading.Thread(target=start) for _ in range(max(0, count))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for driver in drivers:
+            self.idle.put(driver)
+
+    def acquire(self):
+        self.slots.acquire()
+        try:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                driver = self._create()
+        except Exception:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.stats["leases"] += 1
+        return driver
+
+    def release(self, driver, broken=False):
+        broken = broken or getattr(driver, "broken", False)
+        try:
+            if broken or driver.pages >= self.max_pages:
+                with self.lock:
+                    self.stats["discarded" if broken else "recycled"] += 1
+                driver.quit()
+            else:
+                self.idle.put(driver)
+        except Exception as e:
+            logger.warning(f"Error releasing browser session: {e}")
+        finally:
+            self.slots.release()
+
+    def renew(self, driver):
+        """Replace a leased session's browser in place, e.g. after it crashed mid-lease."""
+        with self.lock:
+            self.stats["discarded"] += 1
+        try:
+            driver.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error closing browser session: {e}")
+        fresh = self._create()
+        driver.driver, driver.pages, driver.broken = fresh.driver, 0, False
+
+    @contextmanager
+    def lease(self):
+        driver = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.release(driver, broken)
+
+    def close(self):
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                driver.quit()
+            except Exception as e:
+                logger.warning(f"Error closing browser session: {e}")
+        logger.info(
+            f"Browser pool: {self.stats['created']} sessions created, {self.stats['leases']} leases, "
+            f"{self.stats['recycled']} recycled, {self.stats['discarded']} discarded"
+        )
+
+
+class ResourcePolicy:
+    """
+    Allow list of resource types plus URL patterns that are always blocked. Types not in
+    `allowed_types` are blocked by their URL patterns (see RESOURCE_TYPE_PATTERNS).
+    """
+
+    def __init__(self, name, allowed_types, blocked_urls=()):
+        self.name = name
+        self.allowed_types = set(allowed_types)
+        self.blocked_urls = tuple(blocked_urls)
+
+    def blocked_patterns(self):
+        patterns = []
+        for resource_type, type_patterns in RESOURCE_TYPE_PATTERNS.items():
+            if resource_type not in self.allowed_types:
+                patterns.extend(type_patterns)
+        patterns.extend(self.blocked_urls)
+        return patterns
+
+    def __repr__(self):
+        return f"ResourcePolicy({self.name!r})"
+
+
+class ResourceTypeBlocker:
+    """
+    Fails every request whose DevTools resource type a policy does not allow, including the
+    types URL patterns cannot catch (Ping, WebSocket, Other). Fetch interception pauses each
+    matching request until a client answers its Fetch.requestPaused event, and
+    execute_cdp_cmd cannot receive events, so the blocker holds its own DevTools connection
+    (driver.bidi_connection) open on a background thread for the life of the session.
+    With `block_urls`, the policy's URL patterns are also set over that connection, for
+    sessions without execute_cdp_cmd such as remote ones.
+    """
+
+    def __init__(self, driver, policy, block_urls=False):
+        self.driver = driver
+        self.policy = policy
+        self.block_urls = block_urls
+        self.blocked = 0
+        self.error = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=trio.run, args=(self._run,), daemon=True)
+
+    def start(self, timeout=RESOURCE_BLOCKER_TIMEOUT):
+        """Start intercepting; raises RuntimeError if the policy cannot be applied."""
+        self.thread.start()
+        if not self.ready.wait(timeout):
+            raise RuntimeError(f"{self.policy}: DevTools interception did not start within {timeout}s")
+        if self.error is not None:
+            raise RuntimeError(f"{self.policy} could not be applied: {self.error}") from self.error
+        return self
+
+    async def _run(self):
+        try:
+            async with self.driver.bidi_connection() as connection:
+                session, devtools = connection.session, connection.devtools
+                if self.block_urls:
+                    await session.execute(devtools.network.enable())
+                    await session.execute(devtools.network.set_blocked_ur_ls(self.policy.blocked_patterns()))
+                patterns = [
+                    devtools.fetch.RequestPattern(url_pattern="*", resource_type=resource_type,
+                                                  request_stage=devtools.fetch.RequestStage.REQUEST)
+                    for resource_type in devtools.network.ResourceType
+                    if resource_type.value not in self.policy.allowed_types
+                ]
+                paused = session.listen(devtools.fetch.RequestPaused, buffer_size=RESOURCE_BLOCKER_BUFFER)
+                await session.execute(devtools.fetch.enable(patterns=patterns))
+                self.ready.set()
+                async for event in paused:
+                    await session.execute(devtools.fetch.fail_request(
+                        event.request_id, devtools.network.ErrorReason.BLOCKED_BY_CLIENT
+                    ))
+                    self.blocked += 1
+        except Exception as e:
+            if self.ready.is_set():
+                # The session was closed
+                logger.debug(f"Resource type blocker stopped: {e}")
+            else:
+                self.error = e
+        finally:
+            self.ready.set()
+
+
+RESOURCE_POLICIES = {
+    "off": None,
+    # Everything the page text needs: the document, scripts that render the feed and its XHRs
+    "text": ResourcePolicy("text", {"Document", "Script", "XHR", "Fetch"}, THIRD_PARTY_PATTERNS),
+    # Same, but also drops all third-party iframes and beacons reached through pixels
+    "strict": ResourcePolicy("strict", {"Document", "Script", "XHR", "Fetch"},
+                             THIRD_PARTY_PATTERNS + ("*/pixel*", "*/beacon*", "*/collect?*", "*/embed/*")),
+}
+
+
+class NetworkStats:
+    """
+    Per page-kind bytes transferred and requests made/blocked, read from Chrome's
+    performance log after every page.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pages = {}
+
+    def record(self, kind, url, transferred, requests_made, blocked):
+        with self.lock:
+            self.pages.setdefault(kind, []).append({
+                "url": url, "bytes": transferred, "requests": requests_made, "blocked": blocked
+            })
+
+    def totals(self, kind):
+        pages = self.pages.get(kind, [])
+        return {
+            "pages": len(pages),
+            "bytes": sum(p["bytes"] for p in pages),
+            "requests": sum(p["requests"] for p in pages),
+            "blocked": sum(p["blocked"] for p in pages),
+        }
+
+    def log_summary(self):
+        for kind in sorted(self.pages):
+            totals = self.totals(kind)
+            logger.info(
+                f"Network [{kind}]: {totals['pages']} pages, {totals['bytes'] / 1024:.0f} KiB transferred, "
+                f"{totals['requests']} requests, {totals['blocked']} blocked"
+            )
+
+
+readiness_stats = ReadinessStats()
+network_stats = NetworkStats()
+load_more_timeout = AdaptiveTimeout(LOAD_MORE_TIMEOUT, LOAD_MORE_TIMEOUT_MIN, LOAD_MORE_TIMEOUT_MAX)
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_chromedriver_path():
+    """
+    Path to a locally cached chromedriver. CHROMEDRIVER_PATH wins; otherwise the binary
+    recorded in the pin file by a previous install is reused, so only the very first run
+    (or a change of CHROMEDRIVER_VERSION) goes through webdriver-manager and the network.
+    create_webdriver drops the pin when Chrome rejects the pinned driver after an update.
+    """
+    if CHROMEDRIVER_PATH:
+        return CHROMEDRIVER_PATH
+
+    try:
+        with open(DRIVER_PIN_FILE, encoding="utf-8") as f:
+            pin = json.load(f)
+        if os.path.exists(pin["path"]) and pin.get("version") == CHROMEDRIVER_VERSION:
+            return pin["path"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    path = ChromeDriverManager(driver_version=CHROMEDRIVER_VERSION).install()
+    os.makedirs(os.path.dirname(DRIVER_PIN_FILE), exist_ok=True)
+    with open(DRIVER_PIN_FILE, "w", encoding="utf-8") as f:
+        json.dump({"path": path, "version": CHROMEDRIVER_VERSION}, f)
+    logger.info(f"Pinned chromedriver at {path}")
+    return path
+
+def unpin_chromedriver():
+    """Forget the pinned chromedriver so the next resolution installs a matching one."""
+    resolve_chromedriver_path.cache_clear()
+    try:
+        os.remove(DRIVER_PIN_FILE)
+    except FileNotFoundError:
+        pass
+
+def create_chrome_options():
+    """
+    Chrome options shared by local and remote sessions.
     """
     chrome_options = Options()
+    # Network events in the performance log feed the per-page traffic report
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
     chrome_options.add_argument("--headless=new")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-extensions")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--blink-settings=imagesEnabled=false")  # Disable images
+    return chrome_options
+
+def apply_resource_policy(driver, policy):
+    """
+    Make Chrome refuse requests the policy does not allow, for every page this session loads.
+    Returns the ResourceTypeBlocker, or None without a policy; raises RuntimeError if the
+    session has no DevTools access (e.g. a remote grid that does not expose CDP).
+    """
+    if policy is None:
+        return None
+    has_cdp = hasattr(driver, "execute_cdp_cmd")
+    if has_cdp:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": policy.blocked_patterns()})
+    return ResourceTypeBlocker(driver, policy, block_urls=not has_cdp).start()
+
+def collect_page_traffic(driver, kind, url):
+    """
+    Drain the performance log and record what the last page cost on the wire.
+    Drivers without a performance log (remote sessions, test doubles) are skipped.
+    """
+    get_log = getattr(driver, "get_log", None)
+    if get_log is None:
+        return None
+    try:
+        entries = get_log("performance")
+    except WebDriverException:
+        return None
+
+    transferred = requests_made = blocked = 0
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        method, params = message.get("method"), message.get("params", {})
+        if method == "Network.requestWillBeSent":
+            requests_made += 1
+        elif method == "Network.loadingFinished":
+            transferred += int(params.get("encodedDataLength", 0))
+        elif method == "Network.loadingFailed" and (
+                params.get("blockedReason") or params.get("errorText") == "net::ERR_BLOCKED_BY_CLIENT"):
+            blocked += 1
+
+    network_stats.record(kind, url, transferred, requests_made, blocked)
+    logger.debug(f"{url}: {transferred} bytes, {requests_made} requests, {blocked} blocked")
+    return transferred, requests_made, blocked
+
+def create_webdriver(policy=None):
+    """
+    Create and configure Selenium WebDriver with optimized settings.
+    `policy` is a ResourcePolicy or the name of one in RESOURCE_POLICIES;
+    by default the LAP_RESOURCE_POLICY one is applied.
+    """
+    chrome_options = create_chrome_options()
+    if policy is None:
+        policy = RESOURCE_POLICY
+    if isinstance(policy, str):
+        policy = RESOURCE_POLICIES[policy]
 
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    if WEBDRIVER_URL:
+        driver = webdriver.Remote(command_executor=WEBDRIVER_URL, options=chrome_options)
+    else:
+        try:
+            driver = webdriver.Chrome(service=Service(resolve_chromedriver_path()), options=chrome_options)
+        except SessionNotCreatedException:
+            if CHROMEDRIVER_PATH:
+                raise
+            # Usually Chrome updated itself and no longer accepts the pinned driver
+            logger.warning("Chrome rejected the pinned chromedriver; resolving it again")
+            unpin_chromedriver()
+            driver = webdriver.Chrome(service=Service(resolve_chromedriver_path()), options=chrome_options)
     driver.set_page_load_timeout(30)  # Increased timeout
     driver.implicitly_wait(10)  # Increased implicit wait
+    try:
+        apply_resource_policy(driver, policy)
+    except Exception:
+        driver.quit()
+        raise
     return driver
 
 def parse_timestamp(timestamp_str):
@@ -88,38 +890,171 @@ def parse_timestamp(timestamp_str):
         logger.warning(f"Invalid timestamp format: {timestamp_str}")
         return None
 
-def get_race_links(driver):
+def create_http_session():
+    """
+    Create a pooled keep-alive HTTP session for the browser-free fetch backend.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HTTP_HEADERS)
+    return session
+
+def fetch_page(session, url):
+    """
+    Fetch a page over HTTP and return its decoded HTML.
+    """
+    start = time.perf_counter()
+    response = session.get(url, timeout=HTTP_TIMEOUT)
+    readiness_stats.record("http", time.perf_counter() - start)
+    response.raise_for_status()
+    return response.text
+
+def page_state(driver):
+    """
+    Current message count, 'Load more' visibility and listing item count of the browser page.
+    """
+    return driver.execute_script(PAGE_STATE_SCRIPT)
+
+def wait_until_ready(driver, kind, condition, timeout):
     """
-    Scrape race links from pages p=0 to p=13 where titles strictly end with 'Race' or 'Race day'.
+    Poll the page state until `condition(state)` holds or `timeout` expires, recording
+    the time to ready under `kind`. Returns whether the page became ready.
     """
-    links = []
-    for page in range(14):  # Pages 0 to 13
-        url = f"https://www.autosport.com/live/?p={page}"
+    start = time.perf_counter()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=READY_POLL_INTERVAL).until(
+            lambda d: condition(page_state(d))
+        )
+        ready = True
+    except TimeoutException:
+        ready = False
+    elapsed = time.perf_counter() - start
+    readiness_stats.record(kind, elapsed, timed_out=not ready)
+    return ready
+
+def parse_race_listing(html, base_url=BASE_URL):
+    """
+    Extract listing items whose titles strictly end with 'Race' or 'Race day', in page order,
+    as {"url", "title", "published"} dicts; `published` is the item's ISO datetime or None.
+    """
+    return parse_listing_page(html, base_url)[1]
+
+def parse_listing_page(html, base_url=BASE_URL):
+    """
+    The number of listing items on a page, of any kind, and its race items as in parse_race_listing.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    listed = soup.find_all('a', href=True, class_='ms-item')
+    items = []
+    for a in listed:
+        title_tag = a.find('p', class_='ms-item__title')
+        if title_tag:
+            title = title_tag.text.strip()
+            if title.lower().endswith("race") or title.lower().endswith("race day"):
+                time_tag = a.find('time', datetime=True)
+                items.append({
+                    "url": base_url + a['href'],
+                    "title": title,
+                    "published": time_tag['datetime'] if time_tag else None,
+                })
+    return len(listed), items
+
+def parse_race_links(html, base_url=BASE_URL):
+    """
+    Extract links from a listing page whose titles strictly end with 'Race' or 'Race day'.
+    """
+    return [item["url"] for item in parse_race_listing(html, base_url)]
+
+def fetch_listing_page(driver, base_url, page, retries=None):
+    """
+    The number of listing items and the race items of one listing page, as in parse_listing_page.
+    Raises the last error if the page still cannot be loaded after `retries` retries, so
+    a transient failure is never mistaken for the end of the listing.
+    """
+    url = f"{base_url}/live/?p={page}"
+    retries = LISTING_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
         try:
-            driver.get(url)
-            time.sleep(3)  # Allow page content to load
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-            # Extract links with titles strictly ending with 'Race' or 'Race day'
-            page_links = []
-            for a in soup.find_all('a', href=True, class_='ms-item'):
-                title_tag = a.find('p', class_='ms-item__title')
-                if title_tag:
-                    title = title_tag.text.strip()
-                    if title.lower().endswith("race") or title.lower().endswith("race day"):
-                        page_links.append(BASE_URL + a['href'])
-
-            if not page_links:
-                logger.warning(f"No race links found on page {page}.")
+            if isinstance(driver, requests.Session):
+                html = fetch_page(driver, url)
             else:
-                logger.info(f"Page {page}: Found {len(page_links)} race links.")
-
-            links.extend(page_links)
-            time.sleep(0.5)  # Slight delay before processing next page
+                driver.get(url)
+                wait_until_ready(driver, "listing", lambda state: state["listing_items"] > 0, PAGE_READY_TIMEOUT)
+                html = driver.page_source
+                collect_page_traffic(driver, "listing", url)
+            return parse_listing_page(html, base_url)
         except Exception as e:
-            logger.error(f"Error processing page {page}: {e}")
+            if attempt == retries:
+                logger.error(f"Error processing page {page}, giving up after {attempt + 1} attempts: {e}")
+                raise
+            logger.warning(f"Error processing page {page}, retrying: {e}")
+            time.sleep(LINK_DELAY * 2 ** attempt)
+
+def discover_race_links(driver, base_url=BASE_URL, known=None, workers=LISTING_WORKERS, max_pages=LISTING_MAX_PAGES):
+    """
+    Walk the listing pages, newest first, until a page has no listing items at all; pages
+    whose items are all other sessions or series are skipped. With `known`
+    (links of races already scraped to completion) the walk also stops at the first known
+    race, since everything after it is older. Returns race items as in parse_race_listing,
+    in listing order and without duplicates. A page that cannot be loaded raises rather
+    than ending the walk early, and so does a first page without listing items (EmptyListing).
+
+    With a requests.Session, up to `workers` pages are fetched concurrently; a Selenium
+    driver loads them one at a time.
+    """
+    if not isinstance(driver, requests.Session):
+        workers = 1
+    known = set(known or ())
+    items = []
+    seen = set()
+    next_page = 0
 
-    return list(set(links))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while next_page < max_pages:
+            batch = range(next_page, min(next_page + workers, max_pages))
+            next_page = batch.stop
+            # Pages of a batch are fetched together but examined in listing order
+            for page, (listed, page_items) in zip(batch, executor.map(lambda p: fetch_listing_page(driver, base_url, p), batch)):
+                if not listed:
+                    if page == 0:
+                        raise EmptyListing(f"Listing page 0 at {base_url} has no items")
+                    logger.info(f"Page {page}: no listing items; discovery complete.")
+                    return items
+                if not page_items:
+                    logger.warning(f"No race links found on page {page}.")
+                    continue
+                logger.info(f"Page {page}: Found {len(page_items)} race links.")
+                for item in page_items:
+                    if item["url"] in known:
+                        logger.info(f"Page {page}: reached known race {item['url']}; discovery complete.")
+                        return items
+                    if item["url"] not in seen:
+                        seen.add(item["url"])
+                        items.append(item)
+
+    logger.warning(f"Stopped discovery at the {max_pages} page limit.")
+    return items
+
+def get_race_links(driver, base_url=BASE_URL, known=None, pool=None):
+    """
+    Race links from the listing pages, most recent first (see discover_race_links).
+    `driver` is either a Selenium WebDriver or a requests.Session for the HTTP backend.
+    If the listing is empty over HTTP, discovery is redone in a session leased from `pool`.
+    """
+    try:
+        return [item["url"] for item in discover_race_links(driver, base_url, known=known)]
+    except EmptyListing as e:
+        if pool is None or not isinstance(driver, requests.Session):
+            raise
+        logger.warning(f"{e} over HTTP; retrying discovery with Selenium")
+    with pool.lease() as browser:
+        return [item["url"] for item in discover_race_links(browser, base_url, known=known)]
 
 def extract_country_name(title):
     """
@@ -137,64 +1072,234 @@ def extract_country_name(title):
     return "Unknown"
 
 
-def scrape_race_content(driver, link):
+def iter_message_fields_soup(html):
     """
-    Scrape race content with detailed keyword and non-keyword messages,
-    including clicking 'Load more' button to get all content.
+    Yield (classes, timestamp string, comment text) for each message using BeautifulSoup.
     """
-    try:
-        driver.get(link)
+    soup = BeautifulSoup(html, 'html.parser')
+    for msg in soup.find_all('div', class_="mslt-msg"):
+        time_tag = msg.find('time', class_='mslt-msg__time')
+        comment_body = msg.find('div', class_='mslt-msg__body ms-article-content')
+        if time_tag and comment_body:
+            yield msg.get("class", []), time_tag.get('datetime', '').strip(), comment_body.text.strip()
 
-        # Keep clicking 'Load more' until no more content
-        while True:
-            try:
-                # Find and click 'Load more' button
-                load_more_button = WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "button.mslt-more__btn"))
-                )
-                load_more_button.click()
-
-                # Small delay to allow content to load
-                time.sleep(3)
-            except Exception:
-                # No more 'Load more' button found
+def iter_message_fields_lxml(html):
+    """
+    Yield (classes, timestamp string, comment text) for each message using lxml XPath.
+    """
+    if not html.strip():
+        return
+    tree = lxml.html.document_fromstring(html)
+    for msg in tree.xpath(MESSAGE_XPATH):
+        time_tags = msg.xpath(TIME_XPATH)
+        comment_bodies = msg.xpath(BODY_XPATH)
+        if time_tags and comment_bodies:
+            yield (msg.get("class") or "").split(), (time_tags[0].get('datetime') or '').strip(), \
+                comment_bodies[0].text_content().strip()
+
+def iter_message_fields(html, extractor=None):
+    """
+    Yield (classes, timestamp string, comment text) for each message with the chosen extractor.
+    """
+    extractor = extractor or HTML_EXTRACTOR
+    if extractor == "lxml" and lxml is not None:
+        return iter_message_fields_lxml(html)
+    return iter_message_fields_soup(html)
+
+def message_sort_key(message):
+    return message.epoch_us
+
+def parse_race_messages(html, extractor=None):
+    """
+    Extract keyword and non-keyword messages from live blog HTML as RaceMessage
+    records sorted by timestamp.
+    """
+    all_messages = []
+
+    for msg_classes, timestamp_str, comment in iter_message_fields(html, extractor):
+        parsed_time = parse_timestamp(timestamp_str)
+        if not parsed_time:
+            continue
+
+        # Determine event type
+        event_type = "non_keyword_message"
+        for k_class, k_event in KEYWORDS_CLASSES.items():
+            if k_class in msg_classes:
+                event_type = k_event
                 break
 
-        # Parse the fully loaded page
-        race_title = driver.title.strip()
-        country_name = extract_country_name(race_title)
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        messages = soup.find_all('div', class_="mslt-msg")
+        all_messages.append(RaceMessage.from_datetime(parsed_time, event_type, comment))
 
-        all_messages = []
+    # Sort messages by timestamp
+    all_messages.sort(key=message_sort_key)
+    return all_messages
 
-        for msg in messages:
-            msg_classes = msg.get("class", [])
-            time_tag = msg.find('time', class_='mslt-msg__time')
-            comment_body = msg.find('div', class_='mslt-msg__body ms-article-content')
+def find_load_more_url(html):
+    """
+    Return the URL behind the 'Load more' button in an HTML page or fragment.
+    Returns None when there is no button, and raises LoadMoreUnavailable when there
+    is a button but it does not expose a URL the HTTP backend can follow.
+    """
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('button', class_='mslt-more__btn'))
+    button = soup.find('button')
+    if button is None:
+        return None
+    for attr in LOAD_MORE_URL_ATTRS:
+        if button.get(attr):
+            return button[attr]
+    raise LoadMoreUnavailable("'Load more' button has no feed URL")
 
-            if time_tag and comment_body:
-                timestamp_str = time_tag.get('datetime', '').strip()
-                parsed_time = parse_timestamp(timestamp_str)
-                if not parsed_time:
-                    continue
+def oldest_message_time(html):
+    """
+    Return the oldest valid message timestamp in an HTML page or fragment, or None.
+    """
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('time', class_='mslt-msg__time'))
+    times = [parse_timestamp(tag.get('datetime', '').strip()) for tag in soup.find_all('time')]
+    times = [t for t in times if t]
+    return min(times) if times else None
+
+def fetch_race_page_http(session, link, since=None):
+    """
+    Fetch a race page and every paged 'Load more' fragment over HTTP.
+    The feed is newest-first, so when `since` is given paging stops as soon as a
+    page reaches messages at or before that time.
+    Returns the page title and the concatenated HTML.
+    """
+    html = fetch_page(session, link)
+    race_title = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('title')).text.strip()
 
-                # Determine event type
-                event_type = "non_keyword_message"
-                for k_class, k_event in KEYWORDS_CLASSES.items():
-                    if k_class in msg_classes:
-                        event_type = k_event
-                        break
+    fragments = [html]
+    next_url = find_load_more_url(html)
+    while next_url:
+        if since:
+            oldest = oldest_message_time(fragments[-1])
+            if oldest and oldest <= since:
+                break
+        fragment = fetch_page(session, urljoin(link, next_url))
+        fragments.append(fragment)
+        next_url = find_load_more_url(fragment)
 
-                message_entry = {
-                    'time': parsed_time.isoformat(),
-                    'event': event_type,
-                    'comment': comment_body.text.strip()
-                }
-                all_messages.append(message_entry)
+    return race_title, "".join(fragments)
+
+def wait_for_race_page(driver):
+    """
+    Wait until a freshly loaded race page shows messages or a 'Load more' button.
+    """
+    return wait_until_ready(
+        driver, "race_page", lambda state: state["messages"] > 0 or state["load_more"], PAGE_READY_TIMEOUT
+    )
+
+def click_load_more(driver):
+    """
+    Click the 'Load more' button if present and wait until the new messages have been
+    appended or the button is gone. Returns False once there is no more content.
+    Raises LoadMoreTimeout if nothing was added even after a second wait at the maximum
+    timeout, and lets any other error (an intercepted click, a stale element) propagate, so
+    a truncated race is reported as failed instead of stored as complete.
+    """
+    state = page_state(driver)
+    if not state["load_more"]:
+        # No more 'Load more' button found
+        return False
+
+    before = state["messages"]
+    try:
+        button = driver.find_element(By.CSS_SELECTOR, "button.mslt-more__btn")
+    except NoSuchElementException:
+        # The button went away between the state check and the lookup
+        return False
+    button.click()
+
+    start = time.perf_counter()
+    loaded = lambda s: s["messages"] > before or not s["load_more"]
+    ready = wait_until_ready(driver, "load_more", loaded, load_more_timeout.timeout)
+    if not ready:
+        logger.warning(f"'Load more' did not add messages within {load_more_timeout.timeout:.1f}s; "
+                       f"waiting up to {load_more_timeout.maximum:.1f}s")
+        ready = wait_until_ready(driver, "load_more", loaded, load_more_timeout.maximum)
+    if not ready:
+        raise LoadMoreTimeout(f"'Load more' did not add messages within {load_more_timeout.maximum:.1f}s")
+    load_more_timeout.observe(time.perf_counter() - start)
+    return True
+
+def fetch_race_page_selenium(driver, link):
+    """
+    Load a race page in the browser and click 'Load more' until all content is shown.
+    Returns the page title and the fully expanded page source.
+    """
+    driver.get(link)
+    wait_for_race_page(driver)
 
-        # Sort messages by timestamp
-        all_messages.sort(key=lambda x: parse_timestamp(x['time']))
+    # Keep clicking 'Load more' until no more content
+    while click_load_more(driver):
+        pass
+
+    return driver.title.strip(), driver.page_source
+
+def harvest_new_messages(driver, seen, prune=False):
+    """
+    Pull message nodes appended since the last harvest out of the live DOM and parse them.
+    Messages are deduplicated on their element id, or timestamp and markup when there is no id.
+    """
+    new_nodes = []
+    for msg_id, timestamp, outer_html in driver.execute_script(HARVEST_SCRIPT, prune):
+        key = msg_id or f"{timestamp}:{hashlib.sha1(outer_html.encode('utf-8')).hexdigest()}"
+        if key in seen:
+            continue
+        seen.add(key)
+        new_nodes.append(outer_html)
+    return parse_race_messages("".join(new_nodes)) if new_nodes else []
+
+def harvest_race_messages(driver, link, since=None, prune=HARVEST_PRUNE):
+    """
+    Load a race page and harvest messages after every 'Load more' expansion instead of
+    serializing the whole expanded DOM once at the end. With `prune`, harvested nodes are
+    removed from the page so it stays small. With `since`, expansion stops once a batch
+    reaches already-seen messages.
+    Returns the page title and the messages sorted by timestamp.
+    """
+    driver.get(link)
+    wait_for_race_page(driver)
+    seen = set()
+    batch = harvest_new_messages(driver, seen, prune)
+    all_messages = list(batch)
+    since_us = to_epoch_us(since) if since else None
+    oldest = batch[0].epoch_us if batch else None
+
+    while not (since_us is not None and oldest is not None and oldest <= since_us):
+        if not click_load_more(driver):
+            break
+        batch = harvest_new_messages(driver, seen, prune)
+        all_messages.extend(batch)
+        if batch:
+            oldest = min(oldest, batch[0].epoch_us) if oldest is not None else batch[0].epoch_us
+
+    all_messages.sort(key=message_sort_key)
+    return driver.title.strip(), all_messages
+
+def scrape_race_content(driver, link, since=None):
+    """
+    Scrape race content with detailed keyword and non-keyword messages,
+    including following 'Load more' to get all content.
+    `driver` is either a Selenium WebDriver or a requests.Session for the HTTP backend.
+    With `since`, paging stops once it reaches already-seen messages;
+    callers still need to filter out messages at or before `since`.
+    """
+    try:
+        if isinstance(driver, requests.Session):
+            race_title, page_source = fetch_race_page_http(driver, link, since=since)
+            all_messages = parse_race_messages(page_source)
+        else:
+            try:
+                if HARVEST_MESSAGES:
+                    race_title, all_messages = harvest_race_messages(driver, link, since=since)
+                else:
+                    race_title, page_source = fetch_race_page_selenium(driver, link)
+                    all_messages = parse_race_messages(page_source)
+            finally:
+                collect_page_traffic(driver, "race", link)
+
+        country_name = extract_country_name(race_title)
 
         # Final structure for the race
         race_data = {
@@ -204,12 +1309,16 @@ def scrape_race_content(driver, link):
 
         return race_title, race_data
     except Exception as e:
+        if isinstance(e, WebDriverException) and isinstance(driver, PooledDriver):
+            # The session may have crashed or hung; the pool must not hand it out again
+            driver.broken = True
         logger.error(f"Failed to scrape {link}: {e}")
         return None, None
 
-def sequential_scrape(driver, links):
+def sequential_scrape(driver, links, pool=None):
     """
-    Perform sequential scraping of links.
+    Perform sequential scraping of links. A pooled driver that breaks is renewed
+    from `pool` before the next link.
     """
     results = {}
     failed_links = []
@@ -225,54 +1334,561 @@ def sequential_scrape(driver, links):
         except Exception as e:
             logger.error(f"Error processing link {link}: {e}")
             failed_links.append(link)
+        if pool is not None and getattr(driver, "broken", False):
+            pool.renew(driver)
 
-        time.sleep(0.5)  # Slightly increased delay between links
+        time.sleep(LINK_DELAY)  # Slightly increased delay between links
 
-    # Save failed links
-    with open("failed_links.json", "w", encoding="utf-8") as failed_file:
-        json.dump(failed_links, failed_file, indent=4)
+    save_failed_links(failed_links)
 
     return results
 
-def upload_to_s3(file_path, bucket_name, object_name):
+def concurrent_scrape(links, workers=SCRAPE_WORKERS, driver_factory=None, browser_pool=None):
     """
-    Upload a file to an S3 bucket.
+    Scrape links with a bounded pool of WebDriver workers fed from a shared queue.
+    Workers lease a browser session per link from `browser_pool` (a temporary pool of
+    `workers` sessions by default). Returns the merged results, in the same
+    {title: {country, race}} structure as sequential_scrape, and per-worker timing stats.
     """
-    try:
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            region_name=AWS_REGION
+    link_queue = queue.Queue()
+    for link in links:
+        link_queue.put(link)
+
+    results = {}
+    failed_links = []
+    worker_stats = []
+    lock = threading.Lock()
+    pool = browser_pool or BrowserPool(max(1, min(workers, len(links))), factory=driver_factory)
+
+    def worker(worker_id):
+        stats = {"worker": worker_id, "scraped": 0, "failed": 0, "startup_seconds": 0.0, "scrape_seconds": 0.0}
+        worker_start = time.perf_counter()
+        while True:
+            try:
+                link = link_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            lease_start = time.perf_counter()
+            try:
+                driver = pool.acquire()
+            except Exception as e:
+                logger.error(f"Worker {worker_id} could not start a driver: {e}")
+                with lock:
+                    failed_links.append(link)
+                break
+            stats["startup_seconds"] += time.perf_counter() - lease_start
+
+            link_start = time.perf_counter()
+            try:
+                race_title, race_data = scrape_race_content(driver, link)
+            except Exception as e:
+                logger.error(f"Worker {worker_id} error processing link {link}: {e}")
+                race_title, race_data = None, None
+            finally:
+                pool.release(driver)
+            stats["scrape_seconds"] += time.perf_counter() - link_start
+
+            with lock:
+                if race_data:
+                    results[race_title] = race_data
+                    stats["scraped"] += 1
+                else:
+                    failed_links.append(link)
+                    stats["failed"] += 1
+                    logger.warning(f"Worker {worker_id} failed to scrape link: {link}")
+
+            time.sleep(LINK_DELAY)
+
+        stats["wall_seconds"] = time.perf_counter() - worker_start
+        with lock:
+            worker_stats.append(stats)
+
+    workers = max(1, min(workers, len(links)))
+    threads = [threading.Thread(target=worker, args=(i,), name=f"scrape-worker-{i}") for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if browser_pool is None:
+        pool.close()
+
+    # Links left behind by workers whose driver never started
+    while not link_queue.empty():
+        failed_links.append(link_queue.get_nowait())
+
+    for stats in sorted(worker_stats, key=lambda s: s["worker"]):
+        logger.info(
+            f"Worker {stats['worker']}: {stats['scraped']} scraped, {stats['failed']} failed, "
+            f"waiting for sessions {stats['startup_seconds']:.1f}s, scraping {stats['scrape_seconds']:.1f}s, "
+            f"wall {stats['wall_seconds']:.1f}s"
         )
-        s3_client.upload_file(file_path, bucket_name, object_name)
-        logger.info(f"File {file_path} uploaded to S3 bucket {bucket_name} as {object_name}")
-    except Exception as e:
-        logger.error(f"Failed to upload {file_path} to S3: {e}")
 
-def main():
+    save_failed_links(failed_links)
+
+    return results, sorted(worker_stats, key=lambda s: s["worker"])
+
+def save_failed_links(failed_links, path="failed_links.json"):
+    """
+    Save links that could not be scraped.
+    """
+    with open(path, "w", encoding="utf-8") as failed_file:
+        json.dump(failed_links, failed_file, indent=4)
+
+def selenium_scrape(links, workers=SCRAPE_WORKERS, browser_pool=None):
+    """
+    Scrape links with Selenium, using the worker pool when more than one worker is configured.
+    """
+    if workers > 1:
+        results, _ = concurrent_scrape(links, workers=workers, browser_pool=browser_pool)
+        return results
+
+    pool = browser_pool or BrowserPool(1)
+    try:
+        with pool.lease() as driver:
+            return sequential_scrape(driver, links, pool=pool)
+    finally:
+        if browser_pool is None:
+            pool.close()
+
+def http_scrape(session, links, browser_pool=None):
+    """
+    Scrape links with the browser-free HTTP backend, falling back to Selenium
+    for links that cannot be fetched over plain HTTP.
+    """
+    results = {}
+    fallback_links = []
+
+    for link in links:
+        race_title, race_data = scrape_race_content(session, link)
+        if race_data:
+            results[race_title] = race_data
+        else:
+            fallback_links.append(link)
+        time.sleep(LINK_DELAY)
+
+    if fallback_links:
+        logger.info(f"Falling back to Selenium for {len(fallback_links)} links")
+        results.update(selenium_scrape(fallback_links, browser_pool=browser_pool))
+    else:
+        save_failed_links([])
+
+    return results
+
+def race_content_hash(messages):
+    """
+    Stable hash of a race's messages, used to detect changes between runs.
+    """
+    payload = json.dumps([message.to_dict() for message in messages], sort_keys=True, ensure_ascii=False,
+                         separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def build_manifest_entry(race_title, messages, now):
+    """
+    Manifest record for one race URL.
+    """
+    last_time = messages[-1].time if messages else None
+    complete = bool(messages) and messages[-1].datetime < now - RACE_COMPLETE_AFTER
+    return {
+        "title": race_title,
+        "last_time": last_time,
+        "message_count": len(messages),
+        "content_hash": race_content_hash(messages),
+        "complete": complete
+    }
+
+def load_json_artifact(store, key, default):
+    """
+    Load a JSON artifact from the store, returning `default` if it does not exist.
+    """
+    data = store.read(key)
+    if data is None:
+        return default
+    return json.loads(data.decode("utf-8"))
+
+def incremental_scrape(driver, links, race_data, manifest, now=None, on_complete=None, pool=None):
+    """
+    Scrape only what is new since the last run, updating `race_data` and `manifest` in place.
+    Races marked complete in the manifest are skipped; in-progress races only get
+    messages newer than their last seen timestamp appended. `on_complete(link, race_title)`
+    is called as soon as each race is merged. A pooled driver that breaks is renewed
+    through `pool` before the next link.
+    Returns the number of races that changed and the links that failed.
+    """
+    now = now or datetime.now(timezone.utc)
+    changed = 0
+    skipped = 0
+    failed_links = []
+
+    for link in links:
+        entry = manifest.get(link)
+        if entry and entry.get("complete"):
+            skipped += 1
+            continue
+
+        # Only trust the last seen timestamp if we still hold the messages it refers to
+        since = None
+        if entry and entry.get("last_time") and entry["title"] in race_data:
+            since = parse_timestamp(entry["last_time"])
+
+        race_title, scraped = scrape_race_content(driver, link, since=since)
+        if not scraped:
+            failed_links.append(link)
+            logger.warning(f"Failed to scrape link: {link}")
+            if pool is not None and getattr(driver, "broken", False):
+                pool.renew(driver)
+            continue
+
+        if since:
+            race_title = entry["title"]
+            since_us = to_epoch_us(since)
+            new_messages = [m for m in scraped["race"] if m.epoch_us > since_us]
+            messages = race_data[race_title]["race"] + new_messages
+        else:
+            messages = scraped["race"]
+
+        race_data[race_title] = {
+            "country": scraped["country"],
+            "race": messages
+        }
+        new_entry = build_manifest_entry(race_title, messages, now)
+        if new_entry != entry:
+            changed += 1
+        manifest[link] = new_entry
+        if on_complete:
+            on_complete(link, race_title)
+
+        time.sleep(LINK_DELAY)
+
+    logger.info(f"Incremental scrape: {changed} changed, {skipped} complete races skipped, {len(failed_links)} failed")
+    return changed, failed_links
+
+def get_store():
+    """
+    Artifact store for scraper outputs: local directory if LAP_STORE_DIR is set, else the S3 bucket.
+    """
+    if LAP_STORE_DIR:
+        return LocalStore(LAP_STORE_DIR)
+    return S3Store(AWS_BUCKET_NAME)
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+def race_season(race_data):
+    """
+    Season of a race, taken from its first message like the lap-by-lap page does.
+    """
+    if not race_data["race"]:
+        return None
+    return race_data["race"][0].datetime.year
+
+def shard_key_for_title(index, race_title):
+    for key, info in index["races"].items():
+        if info["title"] == race_title:
+            return key
+    return None
+
+def assign_shard_key(index, race_title, race_data):
+    """
+    Shard key for a race: its existing key if already indexed, otherwise
+    races/{season}/{country}.json, falling back to the title on collisions
+    or when the country is unknown.
+    """
+    key = shard_key_for_title(index, race_title)
+    if key:
+        return key
+    season = race_season(race_data) or "unknown"
+    name = race_data["country"] if race_data["country"] != "Unknown" else race_title
+    key = f"{RACE_SHARD_PREFIX}/{season}/{slugify(name)}.json"
+    if key in index["races"]:
+        key = f"{RACE_SHARD_PREFIX}/{season}/{slugify(race_title)}.json"
+    return key
+
+def race_shard(race_title, race_data):
+    return {"title": race_title, "country": race_data["country"], "race": encode_messages(race_data["race"])}
+
+def read_race_shard(store, key):
+    """
+    Read one race shard, returning (title, {country, race}) or (None, None) if missing.
+    """
+    shard = load_json_artifact(store, key, None)
+    if shard is None:
+        return None, None
+    return shard["title"], {"country": shard["country"], "race": decode_messages(shard["race"])}
+
+def write_race_shards(store, race_data, titles, index):
+    """
+    Write one shard per race in `titles` and update the index with the stored sizes and checksums.
+    """
+    for race_title in titles:
+        data = race_data[race_title]
+        key = assign_shard_key(index, race_title, data)
+        stored = write_json(store, key, race_shard(race_title, data))
+        index["races"][key] = {
+            "title": race_title,
+            "season": race_season(data),
+            "country": data["country"],
+            "messages": len(data["race"]),
+            "bytes": stored["bytes"],
+            "sha256": stored["sha256"]
+        }
+
+    index["updated_at"] = datetime.now(timezone.utc).isoformat()
+    write_json(store, RACE_INDEX_KEY, index)
+
+def write_legacy_race_data(store, index=None):
+    """
+    Compatibility step: assemble the legacy single race_data.json from the shards.
+    """
+    index = index or load_json_artifact(store, RACE_INDEX_KEY, {"races": {}})
+    race_data = {}
+    for key in index["races"]:
+        race_title, data = read_race_shard(store, key)
+        if race_title:
+            race_data[race_title] = data
+    write_json(store, RACE_DATA_KEY, legacy_race_data(race_data))
+    return race_data
+
+def race_data_to_table(race_data):
+    """
+    Flatten {title: {country, race}} into a commentary table sorted by season, country, race and time.
+    `event`, `country` and `race` are dictionary-encoded; `time` is a UTC timestamp column.
+    """
+    rows = []
+    for race_title, data in race_data.items():
+        season = race_season(data)
+        for message in data["race"]:
+            rows.append((season, data["country"], race_title, message.epoch_us, message.event, message.comment))
+    # Dictionary columns cannot be sorted by Arrow, so order the rows before encoding
+    rows.sort(key=lambda row: row[:4])
+
+    columns = list(zip(*rows)) if rows else [[] for _ in COMMENTARY_SCHEMA]
+    return pa.table(
+        [pa.array(values, type=field.type) for values, field in zip(columns, COMMENTARY_SCHEMA)],
+        schema=COMMENTARY_SCHEMA
+    )
+
+def commentary_parquet_key(season):
+    return f"{COMMENTARY_PARQUET_PREFIX}/{season}.parquet"
+
+def encode_commentary_parquet(table):
+    """
+    Serialize the commentary table to Parquet with one row group per season, so
+    season filters can skip whole row groups.
+    """
+    sink = pa.BufferOutputStream()
+    with pq.ParquetWriter(sink, COMMENTARY_SCHEMA, compression="zstd") as writer:
+        for season in sorted(table.column("season").unique().to_pylist()):
+            writer.write_table(table.filter(pc.equal(table["season"], season)))
+    return sink.getvalue().to_pybytes()
+
+def write_commentary_seasons(store, table):
+    """
+    Write the commentary table as one Parquet file per season it contains.
+    """
+    for season in sorted(table.column("season").unique().to_pylist()):
+        season_table = table.filter(pc.equal(table["season"], season))
+        store.write(commentary_parquet_key(season), encode_commentary_parquet(season_table),
+                    content_type="application/vnd.apache.parquet")
+
+def write_commentary_parquet(store, index=None, seasons=None):
+    """
+    Rebuild the Parquet commentary export of `seasons` (all seasons by default), reading
+    only the race shards of those seasons.
+    """
+    index = index or load_json_artifact(store, RACE_INDEX_KEY, {"races": {}})
+    race_data = {}
+    for key, info in index["races"].items():
+        if info["season"] is None or (seasons is not None and info["season"] not in seasons):
+            continue
+        race_title, data = read_race_shard(store, key)
+        if race_title:
+            race_data[race_title] = data
+    table = race_data_to_table(race_data)
+    write_commentary_seasons(store, table)
+    return table
+
+def read_commentary(path, columns=None, filters=None):
+    """
+    Memory-map a local copy of the commentary export (one season's file or the directory
+    of all of them), reading only the requested columns, e.g.
+    read_commentary(path, ["season", "race", "time"], [("event", "in", ["safety_car"])]).
+    """
+    return pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+
+def run_incremental(store, base_url=BASE_URL, resume=False, checkpoint_dir=CHECKPOINT_DIR, browser_pool=None):
+    """
+    Incrementally refresh race data in the store and write it back only if something changed.
+    Only shards of races that are still in progress are read, and only changed races are
+    rewritten. Deleting the manifest from the store forces a full rebuild.
+
+    Every completed race is checkpointed locally right away; with `resume`, the link list
+    and finished races of an interrupted run are reused instead of starting over. Failed
+    links go to a persistent retry queue and are re-attempted with exponential backoff
+    in later passes of this run and in later runs.
+
+    Browser sessions are leased from `browser_pool`, or from a private single-session
+    pool that is closed when the run ends.
+    """
+    manifest = load_json_artifact(store, MANIFEST_KEY, {})
+    index = load_json_artifact(store, RACE_INDEX_KEY, {"races": {}})
+
+    race_data = {}
+    for entry in manifest.values():
+        key = shard_key_for_title(index, entry["title"])
+        if not entry.get("complete") and key:
+            race_title, data = read_race_shard(store, key)
+            if race_title:
+                race_data[race_title] = data
+    previous_hashes = {link: entry["content_hash"] for link, entry in manifest.items()}
+
+    retry_queue = RetryQueue.load(store)
+    queued_before = json.dumps(retry_queue.entries, sort_keys=True)
+    checkpoint = ScrapeCheckpoint(checkpoint_dir)
+
+    def on_complete(link, race_title):
+        checkpoint.save_race(link, race_title, race_data[race_title], manifest[link])
+
+    pool = browser_pool or BrowserPool(1)
     driver = None
     try:
-        driver = create_webdriver()
-        race_links = get_race_links(driver)
+        if FETCH_BACKEND == "http":
+            client = create_http_session()
+        else:
+            client = driver = pool.acquire()
+
+        race_links = checkpoint.links() if resume else None
+        if race_links is None:
+            # Discovery stops at the first finished race; races still in progress are always revisited
+            finished = {link for link, entry in manifest.items() if entry.get("complete")}
+            race_links = get_race_links(client, base_url, known=finished, pool=pool)
+            race_links += [link for link in manifest if link not in finished and link not in race_links]
+            checkpoint.start(race_links)
+            done = set()
+        else:
+            restored = checkpoint.completed()
+            for link, record in restored.items():
+                race_data[record["title"]] = record["data"]
+                manifest[link] = record["entry"]
+            done = set(restored)
+            logger.info(f"Resuming: {len(done)} of {len(race_links)} races restored from checkpoint")
         logger.info(f"Total race links found: {len(race_links)}")
 
-        all_race_data = sequential_scrape(driver, race_links)
+        due = [link for link in retry_queue.due(datetime.now(timezone.utc)) if link not in race_links]
+        pending = [link for link in race_links + due if link not in done]
 
-        # Save race data with proper encoding
-        local_file_path = "race_data.json"
-        with open(local_file_path, "w", encoding='utf-8') as json_file:
-            json.dump(all_race_data, json_file, indent=4, ensure_ascii=False)
+        for attempt in range(RETRY_PASSES + 1):
+            for link in pending:
+                retry_queue.record_attempt(link)
+            _, failed_links = incremental_scrape(client, pending, race_data, manifest, on_complete=on_complete,
+                                                 pool=pool)
 
-        logger.info("Scraping completed and saved to race_data.json.")
+            if failed_links and FETCH_BACKEND == "http":
+                logger.info(f"Falling back to Selenium for {len(failed_links)} links")
+                if driver is None:
+                    driver = pool.acquire()
+                _, failed_links = incremental_scrape(driver, failed_links, race_data, manifest, on_complete=on_complete,
+                                                     pool=pool)
 
-        # Upload to S3
-        upload_to_s3(local_file_path, AWS_BUCKET_NAME, "race_data.json")
+            now = datetime.now(timezone.utc)
+            for link in pending:
+                if link in failed_links:
+                    retry_queue.record_failure(link, now)
+                else:
+                    retry_queue.record_success(link)
+
+            # Wait for the next due retry within this run unless it is too far away
+            next_due = retry_queue.next_due()
+            if attempt == RETRY_PASSES or not failed_links or next_due is None:
+                break
+            wait = (next_due - now).total_seconds()
+            if wait > RETRY_MAX_WAIT:
+                break
+            time.sleep(max(0, wait))
+            pending = [link for link in failed_links if link in retry_queue.due(datetime.now(timezone.utc))]
+    finally:
+        if driver:
+            pool.release(driver)
+        if browser_pool is None:
+            pool.close()
+
+    logger.info(
+        f"Retry queue: {retry_queue.stats['retried']} retried, {retry_queue.stats['recovered']} recovered, "
+        f"{retry_queue.stats['permanently_failed']} permanently failed, {len(retry_queue.entries)} queued"
+    )
+    if json.dumps(retry_queue.entries, sort_keys=True) != queued_before:
+        retry_queue.save(store)
+
+    changed_titles = [
+        entry["title"] for link, entry in manifest.items()
+        if previous_hashes.get(link) != entry["content_hash"]
+    ]
+    if not changed_titles:
+        logger.info("No race changes detected; outputs left untouched.")
+        checkpoint.clear()
+        return race_data, manifest
+
+    write_race_shards(store, race_data, changed_titles, index)
+    write_json(store, MANIFEST_KEY, manifest)
+    if WRITE_LEGACY:
+        write_legacy_race_data(store, index)
+    if WRITE_PARQUET:
+        changed_seasons = {race_season(race_data[race_title]) for race_title in changed_titles}
+        write_commentary_parquet(store, index, changed_seasons)
+    checkpoint.clear()
+    return race_data, manifest
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape Autosport live blogs for lap-by-lap analysis.")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run from its last checkpoint (incremental mode only)")
+    parser.add_argument("--checkpoint-dir", default=None,
+                        help="local directory for run checkpoints (incremental mode only)")
+    parser.add_argument("--resource-policy", choices=sorted(RESOURCE_POLICIES), default=RESOURCE_POLICY,
+                        help="which requests headless Chrome may make")
+    args = parser.parse_args(argv)
+    # Only the incremental run checkpoints its progress; a full crawl always starts over
+    if not INCREMENTAL and (args.resume or args.checkpoint_dir):
+        parser.error("--resume and --checkpoint-dir need LAP_INCREMENTAL=1")
+    args.checkpoint_dir = args.checkpoint_dir or CHECKPOINT_DIR
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    browser_pool = BrowserPool(max(1, SCRAPE_WORKERS), policy=args.resource_policy)
+    try:
+        store = get_store()
+        if INCREMENTAL:
+            run_incremental(store, resume=args.resume, checkpoint_dir=args.checkpoint_dir,
+                            browser_pool=browser_pool)
+            logger.info(f"Incremental scrape completed for {store}.")
+            return
+
+        if FETCH_BACKEND == "http":
+            session = create_http_session()
+            race_links = get_race_links(session, pool=browser_pool)
+            logger.info(f"Total race links found: {len(race_links)}")
+            all_race_data = http_scrape(session, race_links, browser_pool=browser_pool)
+        else:
+            with browser_pool.lease() as driver:
+                race_links = get_race_links(driver)
+            # The listing session goes back to the pool; start the remaining workers up front
+            browser_pool.warm()
+            logger.info(f"Total race links found: {len(race_links)}")
+            all_race_data = selenium_scrape(race_links, workers=SCRAPE_WORKERS, browser_pool=browser_pool)
+
+        # Save race data with proper encoding
+        write_race_shards(store, all_race_data, list(all_race_data), {"races": {}})
+        if WRITE_PARQUET:
+            write_commentary_seasons(store, race_data_to_table(all_race_data))
+        write_json(store, RACE_DATA_KEY, legacy_race_data(all_race_data))
+        logger.info(f"Scraping completed and saved {len(all_race_data)} race shards and {RACE_DATA_KEY} to {store}.")
     except Exception as e:
         logger.error(f"Unexpected error in main: {e}")
     finally:
-        if driver:
-            driver.quit()
+        browser_pool.close()
+        readiness_stats.log_summary()
+        network_stats.log_summary()
 
 if __name__ == "__main__":
     main()
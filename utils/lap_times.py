@@ -0,0 +1,115 @@
+import io
+import os
+import sys
+import json
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+from artifact_store import LocalStore, write_json
+
+# Each race is one int32 array of shape (3, drivers, laps) holding lap time in milliseconds,
+# running position and pit stops per lap, with 0 where a driver has no data for a lap. Races
+# are stored as .npy files; the index records each race's driver order, so local copies can
+# be memory-mapped and queried without parsing JSON. The key prefix, index key and planes are
+# defined once, in streamlit_app/lap_charts.py next to the lap_by_lap page's queries; the app
+# does not import utils, so this module imports them from there.
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app"))
+from lap_charts import LAP_TIMES_PREFIX, LAP_INDEX_KEY, TIME, POSITION, PIT  # noqa: E402
+
+
+def parse_lap_time(text: Optional[str]) -> int:
+    """Milliseconds of a lap time such as '1:37.284' or '58.123'; 0 if missing or malformed."""
+    if not text:
+        return 0
+    try:
+        seconds = 0.0
+        for part in text.split(":"):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return 0
+    return int(round(seconds * 1000))
+
+
+def race_laps_key(season: int, round_number: int) -> str:
+    return f"{LAP_TIMES_PREFIX}/{season}/{int(round_number):02d}.npy"
+
+
+class RaceLaps:
+    """One race's lap data: `drivers` in row order and the (3, drivers, laps) int32 array."""
+
+    __slots__ = ("drivers", "data")
+
+    def __init__(self, drivers: List[str], data: np.ndarray):
+        self.drivers = list(drivers)
+        self.data = data
+
+    @classmethod
+    def from_jolpica(cls, laps: List[Dict[str, Any]], pit_stops: Optional[List[Dict[str, Any]]] = None) -> "RaceLaps":
+        """Build from the Laps of a /laps response and the PitStops of a /pitstops response."""
+        drivers = sorted({timing.get('driverId') for lap in laps for timing in lap.get('Timings', [])})
+        rows = {driver_id: i for i, driver_id in enumerate(drivers)}
+        lap_count = max((int(lap.get('number', 0)) for lap in laps), default=0)
+        data = np.zeros((3, len(drivers), lap_count), dtype=np.int32)
+        for lap in laps:
+            column = int(lap['number']) - 1
+            for timing in lap.get('Timings', []):
+                row = rows[timing.get('driverId')]
+                data[TIME, row, column] = parse_lap_time(timing.get('time'))
+                data[POSITION, row, column] = int(timing.get('position') or 0)
+        for stop in pit_stops or []:
+            row = rows.get(stop.get('driverId'))
+            lap = int(stop.get('lap') or 0)
+            if row is not None and 0 < lap <= lap_count:
+                data[PIT, row, lap - 1] += 1
+        return cls(drivers, data)
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.data[TIME]
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.data[POSITION]
+
+    @property
+    def pits(self) -> np.ndarray:
+        return self.data[PIT]
+
+    @property
+    def lap_count(self) -> int:
+        return self.data.shape[2]
+
+    def row(self, driver_id: str) -> int:
+        return self.drivers.index(driver_id)
+
+    def encode(self) -> bytes:
+        buffer = io.BytesIO()
+        np.save(buffer, np.ascontiguousarray(self.data, dtype=np.int32), allow_pickle=False)
+        return buffer.getvalue()
+
+    @classmethod
+    def decode(cls, drivers: List[str], body: bytes) -> "RaceLaps":
+        return cls(drivers, np.load(io.BytesIO(body), allow_pickle=False))
+
+
+def load_lap_index(store) -> Dict[str, Any]:
+    body = store.read(LAP_INDEX_KEY)
+    return json.loads(body) if body else {"races": {}}
+
+
+def write_lap_index(store, index: Dict[str, Any]):
+    write_json(store, LAP_INDEX_KEY, index)
+
+
+def load_race_laps(store, key: str, drivers: List[str]) -> Optional[RaceLaps]:
+    """
+    Read a race array; files in a LocalStore are memory-mapped rather than read into memory.
+    """
+    if isinstance(store, LocalStore):
+        path = os.path.join(store.root, *key.split("/"))
+        if not os.path.exists(path):
+            return None
+        return RaceLaps(drivers, np.load(path, mmap_mode="r", allow_pickle=False))
+    body = store.read(key)
+    return RaceLaps.decode(drivers, body) if body is not None else None
+